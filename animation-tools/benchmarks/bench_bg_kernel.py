@@ -0,0 +1,88 @@
+"""
+Benchmark: threshold + gradient background removal
+Compares the float64 implementation the converters used to carry
+(gray image, np.sqrt over the gradient) with bg_kernel's integer kernel,
+frame by frame and as one 4-D batch, and checks the masks are identical
+
+Usage:
+    python bench_bg_kernel.py [width] [height] [frames]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(BENCH_DIR))
+from bg_kernel import BackgroundKernel
+from synthetic_media import character_frames
+
+# (label, dark_threshold, light_threshold, edge_tolerance) as used by the callers
+SETTINGS = [
+    ('mp4 simple', 30, 200, 10),
+    ('gif', None, 200, 10),
+    ('fix_all_done', 15, None, 5),
+    ('fix_champion', None, 240, 5),
+]
+
+
+def legacy_removal_mask(data, dark_threshold=None, light_threshold=None, edge_tolerance=None):
+    """The original per-caller code: float64 gray image and np.sqrt gradient"""
+    r, g, b = data[:, :, 0], data[:, :, 1], data[:, :, 2]
+    mask = np.zeros(r.shape, dtype=bool)
+    if dark_threshold is not None:
+        mask |= (r < dark_threshold) & (g < dark_threshold) & (b < dark_threshold)
+    if light_threshold is not None:
+        mask |= (r > light_threshold) & (g > light_threshold) & (b > light_threshold)
+    if edge_tolerance is not None:
+        gray = (r.astype(float) + g.astype(float) + b.astype(float)) / 3
+        gradient_x = np.abs(np.diff(gray, axis=1, prepend=gray[:, 0:1]))
+        gradient_y = np.abs(np.diff(gray, axis=0, prepend=gray[0:1, :]))
+        gradient = np.sqrt(gradient_x**2 + gradient_y**2)
+        mask &= ~(gradient > edge_tolerance)
+    return mask
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1280
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 720
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 24
+    frames = []
+    for background in ('black', 'white', 'noise'):
+        frames.extend(character_frames(width, height, count // 3, background))
+    batch = np.stack(frames)
+    kernel = BackgroundKernel()
+
+    print("=" * 72)
+    print(f"BACKGROUND KERNEL BENCHMARK ({len(frames)} frames, {width}x{height})")
+    print("=" * 72)
+    print(f"  {'settings':<14}{'float64 ms':>12}{'kernel ms':>12}{'batch ms':>12}{'speedup':>10}  identical")
+    for label, *args in SETTINGS:
+        start = time.perf_counter()
+        expected = [legacy_removal_mask(frame, *args) for frame in frames]
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for frame in frames:
+            kernel.removal_mask(frame, *args)
+        kernel_seconds = time.perf_counter() - start
+        identical = all(np.array_equal(kernel.removal_mask(frame, *args), reference)
+                        for frame, reference in zip(frames, expected))
+
+        start = time.perf_counter()
+        batched = kernel.removal_mask(batch, *args)
+        batch_seconds = time.perf_counter() - start
+        identical &= all(np.array_equal(batched[i], reference) for i, reference in enumerate(expected))
+
+        per_frame = 1000 / len(frames)
+        print(f"  {label:<14}{legacy_seconds * per_frame:>12.2f}{kernel_seconds * per_frame:>12.2f}"
+              f"{batch_seconds * per_frame:>12.2f}{legacy_seconds / kernel_seconds:>9.1f}x  "
+              f"{'yes' if identical else 'NO'}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
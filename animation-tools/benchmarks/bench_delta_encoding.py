@@ -0,0 +1,89 @@
+"""
+Benchmark: full-frame vs delta-encoded Lottie animations
+Encodes a synthetic mostly-static mascot clip (and any MP4s given) both ways
+and compares file size and total image pixels the player has to decode
+
+Usage:
+    python bench_delta_encoding.py [video.mp4 ...]
+"""
+
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+import lottie_writer
+from frame_delta import DeltaEncoder
+from mp4_to_lottie import extract_frames_from_mp4, frame_to_base64
+
+
+def synthetic_mascot(frame_count=48, size=256):
+    """Static body on a transparent background with a waving arm and blinking eyes"""
+    frames = []
+    for i in range(frame_count):
+        frame = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(frame)
+        draw.ellipse((64, 48, 192, 224), fill=(255, 170, 60, 255), outline=(90, 40, 0, 255), width=4)
+        for x in range(72, 184, 12):
+            draw.line((x, 120, x + 6, 210), fill=(230, 140, 40, 255), width=3)
+
+        eye_height = 2 if i % 16 == 0 else 14
+        for x in (100, 140):
+            draw.ellipse((x, 96 - eye_height // 2, x + 16, 96 + eye_height // 2), fill=(20, 20, 20, 255))
+
+        angle = math.radians(35 * math.sin(i / frame_count * 4 * math.pi))
+        shoulder = (186, 130)
+        hand = (shoulder[0] + 50 * math.cos(angle - 0.6), shoulder[1] + 50 * math.sin(angle - 0.6))
+        draw.line((shoulder, hand), fill=(255, 170, 60, 255), width=12)
+        draw.ellipse((hand[0] - 9, hand[1] - 9, hand[0] + 9, hand[1] + 9), fill=(255, 200, 120, 255))
+        frames.append((frame, 83))
+    return frames
+
+
+def encode(frame):
+    return frame_to_base64(frame, format='WEBP', quality=85)
+
+
+def measure(frames, output_path, delta):
+    with contextlib.redirect_stdout(io.StringIO()):
+        lottie_writer.create_lottie_animation(frames, output_path, encode=encode, fps=12,
+                                              delta=delta)
+    with open(output_path, 'r') as f:
+        data = json.load(f)
+    decoded_pixels = sum(asset["w"] * asset["h"] for asset in data["assets"])
+    return os.path.getsize(output_path), decoded_pixels, len(data["layers"])
+
+
+def compare(label, frames, tmp):
+    full_size, full_pixels, full_layers = measure(frames, os.path.join(tmp, "full.json"), None)
+    delta = DeltaEncoder()
+    delta_size, delta_pixels, delta_layers = measure(frames, os.path.join(tmp, "delta.json"), delta)
+    print(f"{label:<22}{len(frames):>7}{full_size / 1024:>10.1f}{delta_size / 1024:>10.1f}"
+          f"{full_size / delta_size:>7.1f}x{full_pixels / 1e6:>10.2f}{delta_pixels / 1e6:>10.2f}"
+          f"{full_pixels / delta_pixels:>7.1f}x   {delta.keyframes} key / {delta.patches} patch")
+
+
+def main():
+    print("=" * 100)
+    print("DELTA ENCODING BENCHMARK")
+    print("=" * 100)
+    print(f"{'Clip':<22}{'Frames':>7}{'Full KB':>10}{'Delta KB':>10}{'Size':>8}"
+          f"{'Full MPx':>10}{'Delta MPx':>10}{'Decode':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        compare("synthetic mascot", synthetic_mascot(), tmp)
+        for video in sys.argv[1:]:
+            with contextlib.redirect_stdout(io.StringIO()):
+                frames = extract_frames_from_mp4(video, max_size=256, target_fps=12)
+            compare(Path(video).name, frames, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: inline Lottie JSON vs dotLottie (.lottie) archive
+For every animation with embedded images, compares file size, JSON parse time
+and time until the first image's bytes are available
+
+Usage:
+    python bench_dotlottie.py [animation.json ...]
+    (default: every app asset with embedded images)
+"""
+
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from lottie_writer import save_dotlottie
+
+ASSETS_DIR = Path(__file__).resolve().parent.parent.parent / "app" / "src" / "main" / "assets"
+REPEATS = 5
+
+
+def best_of(fn, repeats=REPEATS):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def load_inline(path):
+    """Parse the whole document, then decode the first image"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    first = data["assets"][0]["p"]
+    base64.b64decode(first.partition(',')[2])
+    return data
+
+
+def load_dotlottie(path):
+    """Parse the manifest and animation JSON, then read the first image"""
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+        animation_id = manifest["activeAnimationId"]
+        data = json.loads(archive.read(f"animations/{animation_id}.json"))
+        archive.read("images/" + data["assets"][0]["p"])
+    return data
+
+
+def has_embedded_images(path):
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return any(str(asset.get("p", "")).startswith("data:") for asset in data.get("assets", []))
+
+
+def main():
+    paths = [Path(arg) for arg in sys.argv[1:]]
+    if not paths:
+        paths = [path for path in sorted(ASSETS_DIR.glob("*.json")) if has_embedded_images(path)]
+
+    print("=" * 86)
+    print("INLINE JSON vs DOTLOTTIE")
+    print("=" * 86)
+    print(f"{'Animation':<24}{'JSON KB':>10}{'.lottie KB':>12}{'Size':>8}"
+          f"{'JSON parse':>12}{'.lottie parse':>15}{'Speedup':>9}")
+
+    total_json = total_lottie = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in paths:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            lottie_path = os.path.join(tmp, path.stem + ".lottie")
+            lottie_size = save_dotlottie(data, lottie_path)
+            json_size = os.path.getsize(path)
+            total_json += json_size
+            total_lottie += lottie_size
+
+            inline_seconds = best_of(lambda: load_inline(path))
+            dotlottie_seconds = best_of(lambda: load_dotlottie(lottie_path))
+
+            print(f"{path.name:<24}{json_size / 1024:>10.1f}{lottie_size / 1024:>12.1f}"
+                  f"{lottie_size / json_size:>7.0%} "
+                  f"{inline_seconds * 1000:>10.2f}ms{dotlottie_seconds * 1000:>13.2f}ms"
+                  f"{inline_seconds / max(dotlottie_seconds, 1e-9):>8.1f}x")
+
+    if total_json:
+        print("-" * 86)
+        print(f"Total: {total_json / 1024:.1f} KB -> {total_lottie / 1024:.1f} KB "
+              f"({1 - total_lottie / total_json:.0%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
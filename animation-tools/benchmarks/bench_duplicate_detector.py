@@ -0,0 +1,83 @@
+"""
+Benchmark: duplicate detection cost per frame
+Compares mp4_to_lottie.calculate_frame_difference (full-resolution float64
+against the previous processed frame) with frame_dedup.DuplicateDetector
+(uint8 luma thumbnail computed once per frame, window of recent frames)
+
+Usage:
+    python bench_duplicate_detector.py [width] [height] [frames]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from frame_dedup import DuplicateDetector, luma_thumbnail
+from mp4_to_lottie import calculate_frame_difference, optimize_frame
+
+
+def synthetic_frames(width, height, count):
+    """Noisy background with a square that moves every other frame"""
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+    side = height // 4
+    for i in range(count):
+        frame = base.copy()
+        x = (i // 2) * (width // 8) % (width - side)
+        frame[height // 3:height // 3 + side, x:x + side] = (220, 80, 40)
+        yield frame
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1920
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 1080
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 60
+    threshold = 0.02
+    frames = list(synthetic_frames(width, height, count))
+
+    print("=" * 60)
+    print(f"DUPLICATE DETECTOR BENCHMARK ({count} frames, {width}x{height})")
+    print("=" * 60)
+
+    # Old: compare each raw RGBA frame with the previous processed (256px) frame
+    prev_frame = None
+    legacy_seconds = 0.0
+    legacy_duplicates = 0
+    for rgb in frames:
+        pil_frame = Image.fromarray(rgb).convert('RGBA')
+        start = time.perf_counter()
+        if prev_frame is not None and calculate_frame_difference(prev_frame, pil_frame) < threshold:
+            legacy_duplicates += 1
+            legacy_seconds += time.perf_counter() - start
+            continue
+        legacy_seconds += time.perf_counter() - start
+        prev_frame = optimize_frame(pil_frame, 256)
+
+    # New: one luma thumbnail per frame, compared against a window of 4
+    for window in (1, 4):
+        detector = DuplicateDetector(threshold, window=window)
+        detector_seconds = 0.0
+        detector_duplicates = 0
+        for rgb in frames:
+            start = time.perf_counter()
+            thumb = luma_thumbnail(rgb)
+            if detector.match(thumb) is not None:
+                detector_duplicates += 1
+            else:
+                detector.add(thumb)
+            detector_seconds += time.perf_counter() - start
+
+        print(f"DuplicateDetector (window={window}): {detector_seconds / count * 1000:8.3f} ms/frame, "
+              f"{detector_duplicates} duplicates")
+
+    print(f"calculate_frame_difference:     {legacy_seconds / count * 1000:8.3f} ms/frame, "
+          f"{legacy_duplicates} duplicates")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: decoding an MP4 vs reading a memory-mapped frame store
+Times the one-off cost of decoding a clip into frame_store, then the frames
+each re-run needs at several target FPS, from cv2.VideoCapture and from the
+store, and checks both give the same frames and durations
+
+Usage:
+    python bench_frame_store.py [video]     # default: synthetic 1280x720 clip
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(BENCH_DIR))
+from frame_sampler import TimestampSampler, sample_store_frames, sample_video_frames
+from frame_store import write_frame_store
+from synthetic_media import character_frames, write_mp4
+
+TARGET_FPS = [24, 12, 8]
+
+
+def from_video(video_path, target_fps):
+    video = cv2.VideoCapture(str(video_path))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return list(sample_video_frames(video, TimestampSampler(target_fps),
+                                            video.get(cv2.CAP_PROP_FPS)))
+    finally:
+        video.release()
+
+
+def from_store(store, target_fps):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return list(sample_store_frames(store, TimestampSampler(target_fps)))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    frames = fn(*args)
+    # Touch every pixel, as background removal would
+    checksum = sum(int(rgb[::8, ::8].sum()) for rgb, _ in frames)
+    return time.perf_counter() - start, frames, checksum
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            video_path = sys.argv[1]
+        else:
+            video_path = os.path.join(tmp, "clip-720p.mp4")
+            write_mp4(video_path, character_frames(1280, 720, 96, 'noise'), fps=24)
+
+        start = time.perf_counter()
+        store = write_frame_store(video_path, os.path.join(tmp, "clip.frames"))
+        build_seconds = time.perf_counter() - start
+        _, height, width, _ = store.shape
+
+        print("=" * 72)
+        print(f"FRAME STORE BENCHMARK ({len(store)} frames, {width}x{height})")
+        print("=" * 72)
+        print(f"  Decode into store (once): {build_seconds:.2f}s, "
+              f"{store.nbytes / 1024 / 1024:.0f} MB on disk")
+        print(f"  {'target fps':<12}{'frames':>8}{'decode s':>10}{'store s':>10}{'speedup':>10}  identical")
+        for target_fps in TARGET_FPS:
+            video_seconds, decoded, video_sum = timed(from_video, video_path, target_fps)
+            store_seconds, stored, store_sum = timed(from_store, store, target_fps)
+            identical = (video_sum == store_sum and len(decoded) == len(stored)
+                         and all(a[1] == b[1] and np.array_equal(a[0], b[0])
+                                 for a, b in zip(decoded, stored)))
+            print(f"  {target_fps:<12}{len(stored):>8}{video_seconds:>10.2f}{store_seconds:>10.2f}"
+                  f"{video_seconds / store_seconds:>9.1f}x  {'yes' if identical else 'NO'}")
+            del decoded, stored
+        store.close()
+        print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
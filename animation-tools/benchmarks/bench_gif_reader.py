@@ -0,0 +1,100 @@
+"""
+Benchmark: GIF decode + background removal
+Compares the old per-frame loop (gif.copy().convert('RGBA') and full-canvas
+remove_background) with gif_reader's dirty rectangles, where only the pixels
+a frame changed are converted and reprocessed, and checks the frames match
+
+Usage:
+    python bench_gif_reader.py [gif ...]     # default: synthetic sticker GIFs
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(BENCH_DIR))
+from bg_kernel import BackgroundKernel
+from gif_reader import iter_gif_frames
+from gif_to_lottie import remove_background
+from synthetic_media import character_frames
+
+REPEATS = 3
+
+
+def sticker_gif(path, canvas_size, sprite_size, count, disposal):
+    """A small character moving on a large transparent canvas, like a chat sticker"""
+    frames = []
+    offset = (canvas_size - sprite_size) // 2
+    for sprite in character_frames(sprite_size, sprite_size, count, 'transparent'):
+        canvas = np.zeros((canvas_size, canvas_size, 4), dtype=np.uint8)
+        canvas[offset:offset + sprite_size, offset:offset + sprite_size] = sprite
+        frames.append(Image.fromarray(canvas, 'RGBA'))
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=60, loop=0,
+                   disposal=disposal)
+    return path
+
+
+def legacy_frames(gif_path):
+    gif = Image.open(gif_path)
+    try:
+        while True:
+            yield np.asarray(remove_background(gif.copy().convert('RGBA')))
+            gif.seek(gif.tell() + 1)
+    except EOFError:
+        pass
+    finally:
+        gif.close()
+
+
+def reader_frames(gif_path):
+    kernel = BackgroundKernel()
+    processed = None
+    for canvas, dirty, _ in iter_gif_frames(gif_path):
+        if processed is None:
+            processed = canvas.copy()
+        if dirty is not None:
+            kernel.update_region(canvas, processed, dirty, light_threshold=200, edge_tolerance=10)
+        yield processed
+
+
+def best_time(frames_fn, gif_path):
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        count = sum(1 for _ in frames_fn(gif_path))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = sys.argv[1:] or [
+            sticker_gif(os.path.join(tmp, "sticker-512-dispose1.gif"), 512, 160, 48, 1),
+            sticker_gif(os.path.join(tmp, "sticker-720-dispose2.gif"), 720, 192, 48, 2),
+        ]
+
+        print("=" * 84)
+        print("GIF READER BENCHMARK (decode + background removal, no resize/encode)")
+        print("=" * 84)
+        print(f"  {'gif':<32}{'frames':>8}{'old ms/frame':>15}{'new ms/frame':>15}{'speedup':>10}  identical")
+        for path in paths:
+            legacy_seconds, count = best_time(legacy_frames, path)
+            reader_seconds, _ = best_time(reader_frames, path)
+            identical = all(np.array_equal(old, new)
+                            for old, new in zip(legacy_frames(path), reader_frames(path)))
+            print(f"  {Path(path).name:<32}{count:>8}{legacy_seconds / count * 1000:>15.2f}"
+                  f"{reader_seconds / count * 1000:>15.2f}{legacy_seconds / reader_seconds:>9.1f}x  "
+                  f"{'yes' if identical else 'NO'}")
+        print("=" * 84)
+
+
+if __name__ == "__main__":
+    main()
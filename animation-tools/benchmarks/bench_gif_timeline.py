@@ -0,0 +1,85 @@
+"""
+Benchmark: GIF timeline resampling
+Converts sticker-style GIFs with 10-20 ms frames and static holds using the
+GIF's own timing and resampled to fixed frame rates, and reports layer count,
+JSON size, conversion time and the animation's duration next to the GIF's
+(equal up to Lottie's rounding to whole frames)
+
+Usage:
+    python bench_gif_timeline.py [gif ...]     # default: synthetic sticker GIFs
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(BENCH_DIR))
+from gif_reader import iter_gif_frames
+from gif_to_lottie import convert_gif_to_lottie
+from synthetic_media import character_frames
+
+TARGET_FPS = [None, 25, 15]
+
+
+def fast_sticker_gif(path, canvas_size, sprite_size, count, frame_ms, hold_ms):
+    """A character animated with very short frames, pausing for hold_ms every 8 frames"""
+    frames, durations = [], []
+    offset = (canvas_size - sprite_size) // 2
+    for i, sprite in enumerate(character_frames(sprite_size, sprite_size, count, 'transparent')):
+        canvas = np.zeros((canvas_size, canvas_size, 4), dtype=np.uint8)
+        canvas[offset:offset + sprite_size, offset:offset + sprite_size] = sprite
+        frames.append(Image.fromarray(canvas, 'RGBA'))
+        durations.append(hold_ms if i % 8 == 7 else frame_ms)
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=durations, loop=0)
+    return path
+
+
+def gif_duration_ms(gif_path):
+    return sum(duration for _, _, duration in iter_gif_frames(gif_path))
+
+
+def convert(gif_path, output_path, target_fps):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        convert_gif_to_lottie(gif_path, output_path, max_size=256, target_fps=target_fps)
+    elapsed = time.perf_counter() - start
+    with open(output_path) as f:
+        doc = json.load(f)
+    duration_ms = (doc['op'] - doc['ip']) * 1000 / doc['fr']
+    return elapsed, len(doc['layers']), os.path.getsize(output_path), duration_ms, doc['fr']
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = sys.argv[1:] or [
+            fast_sticker_gif(os.path.join(tmp, "sticker-10ms.gif"), 256, 128, 64, 10, 400),
+            fast_sticker_gif(os.path.join(tmp, "sticker-20ms.gif"), 256, 128, 64, 20, 600),
+        ]
+
+        print("=" * 84)
+        print("GIF TIMELINE BENCHMARK (GIF timing vs resampled to a fixed frame rate)")
+        print("=" * 84)
+        print(f"  {'gif':<22}{'target fps':>11}{'fps':>6}{'layers':>8}{'size KB':>10}"
+              f"{'seconds':>9}{'duration ms':>13}  (GIF ms)")
+        for path in paths:
+            gif_ms = gif_duration_ms(path)
+            for target_fps in TARGET_FPS:
+                output_path = os.path.join(tmp, f"{Path(path).stem}-{target_fps}.json")
+                seconds, layers, size, duration_ms, fps = convert(path, output_path, target_fps)
+                print(f"  {Path(path).name:<22}{str(target_fps or 'GIF'):>11}{fps:>6}{layers:>8}"
+                      f"{size / 1024:>10.1f}{seconds:>9.2f}{duration_ms:>13.0f}  ({gif_ms})")
+        print("=" * 84)
+
+
+if __name__ == "__main__":
+    main()
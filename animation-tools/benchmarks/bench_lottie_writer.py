@@ -0,0 +1,72 @@
+"""
+Benchmark: Lottie timeline construction and writing at 10k frames
+Compares the old per-frame prefix sum (quadratic) with lottie_writer.build_timeline
+and times a full streaming write with tiny placeholder assets
+
+Usage:
+    python bench_lottie_writer.py [frame_count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from lottie_writer import StreamingLottieWriter, build_timeline
+
+PLACEHOLDER_URI = "data:image/webp;base64,UklGRhoAAABXRUJQVlA4TA0AAAAvAAAAEAcQERGIiP4HAA=="
+
+
+def legacy_timeline(durations, fps):
+    """Timing math as it was in the copy-pasted create_lottie_animation"""
+    ranges = []
+    for i, duration in enumerate(durations):
+        start_frame = sum(durations[j] * fps / 1000 for j in range(i))
+        end_frame = start_frame + (duration * fps / 1000)
+        ranges.append((start_frame, end_frame))
+    return ranges
+
+
+def main():
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    fps = 12
+    durations = [83] * frame_count
+
+    print("=" * 60)
+    print(f"LOTTIE WRITER BENCHMARK ({frame_count} frames, {fps} FPS)")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    legacy = legacy_timeline(durations, fps)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ranges, total_frames = build_timeline(durations, fps)
+    timeline_seconds = time.perf_counter() - start
+
+    gaps = sum(1 for (_, end), (start_next, _) in zip(ranges, ranges[1:]) if end != start_next)
+    legacy_total = legacy[-1][1]
+    exact_total = sum(durations) * fps / 1000
+
+    print(f"Legacy timeline:   {legacy_seconds * 1000:10.2f} ms  (end frame {legacy_total:.4f})")
+    print(f"Prefix timeline:   {timeline_seconds * 1000:10.2f} ms  (end frame {total_frames})")
+    print(f"Speedup:           {legacy_seconds / max(timeline_seconds, 1e-9):10.1f}x")
+    print(f"Exact duration:    {exact_total:.4f} frames, gaps between layers: {gaps}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "bench.json")
+        start = time.perf_counter()
+        with StreamingLottieWriter(output_path, fps=fps, name="Benchmark") as writer:
+            for duration in durations:
+                writer.add_frame(PLACEHOLDER_URI, (256, 256), duration)
+        write_seconds = time.perf_counter() - start
+        size_kb = os.path.getsize(output_path) / 1024
+
+    print(f"Full write:        {write_seconds * 1000:10.2f} ms  ({size_kb:.1f} KB)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
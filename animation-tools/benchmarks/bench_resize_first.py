@@ -0,0 +1,111 @@
+"""
+Benchmark: downscale-first vs background-removal-first pipeline ordering
+Processes the same frames with mp4_to_lottie's default order (background
+removal at source resolution, then resize) and with frame_scale.DownscaleFirst
+at edge_scale 1 and 2, and reports time per frame and how close the results are
+to the default order (alpha error, mask IoU, colour PSNR)
+
+Usage:
+    python bench_resize_first.py [video] [max_size]     # default: synthetic 1080p frames, 256
+"""
+
+import contextlib
+import io
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(BENCH_DIR))
+import bg_engine
+from frame_scale import DownscaleFirst
+from mp4_to_lottie import _finish_frame, remove_background_rembg, remove_background_simple
+from synthetic_media import character_frames
+
+from PIL import Image
+
+SAMPLE_FPS = 4
+EDGE_SCALES = [1, 2]
+
+
+def video_frames(video_path):
+    import cv2
+    from frame_sampler import TimestampSampler, sample_video_frames
+
+    video = cv2.VideoCapture(str(video_path))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return [rgb for rgb, _ in sample_video_frames(video, TimestampSampler(SAMPLE_FPS),
+                                                          video.get(cv2.CAP_PROP_FPS))]
+    finally:
+        video.release()
+
+
+def synthetic_frames():
+    frames = []
+    for background in ('black', 'white'):
+        for rgba in character_frames(1920, 1080, 6, background):
+            frames.append(np.ascontiguousarray(rgba[:, :, :3]))
+    return frames
+
+
+def process(frames, remove, max_size, edge_scale=None):
+    """Processed RGBA arrays and seconds per frame; edge_scale=None is the default order"""
+    scaler = DownscaleFirst(max_size, edge_scale) if edge_scale else None
+    results = []
+    start = time.perf_counter()
+    for rgb in frames:
+        frame = scaler.prepare(rgb) if scaler else Image.fromarray(rgb).convert('RGBA')
+        results.append(np.asarray(_finish_frame(remove(frame), max_size, scaler)))
+    return results, (time.perf_counter() - start) / len(frames)
+
+
+def compare(reference, candidate):
+    """(mean alpha error 0-255, mask IoU, premultiplied colour PSNR dB)"""
+    alpha_error, iou, psnr = [], [], []
+    for ref, new in zip(reference, candidate):
+        ref_alpha, new_alpha = ref[..., 3].astype(float), new[..., 3].astype(float)
+        alpha_error.append(np.abs(ref_alpha - new_alpha).mean())
+        ref_mask, new_mask = ref_alpha >= 128, new_alpha >= 128
+        union = (ref_mask | new_mask).sum()
+        iou.append((ref_mask & new_mask).sum() / union if union else 1.0)
+        ref_rgb = ref[..., :3] * (ref_alpha[..., None] / 255)
+        new_rgb = new[..., :3] * (new_alpha[..., None] / 255)
+        mse = ((ref_rgb - new_rgb) ** 2).mean()
+        psnr.append(10 * math.log10(255 ** 2 / mse) if mse else float('inf'))
+    return np.mean(alpha_error), np.mean(iou), np.mean(psnr)
+
+
+def main():
+    video_path = sys.argv[1] if len(sys.argv) > 1 else None
+    max_size = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    frames = video_frames(video_path) if video_path else synthetic_frames()
+    height, width = frames[0].shape[:2]
+
+    methods = [('simple', remove_background_simple)]
+    if bg_engine.is_available():
+        methods.append(('ai', remove_background_rembg))
+
+    print("=" * 84)
+    print(f"RESIZE-FIRST BENCHMARK ({len(frames)} frames, {width}x{height} -> max_size {max_size})")
+    print("=" * 84)
+    print(f"  {'method':<8}{'order':<22}{'ms/frame':>10}{'speedup':>9}"
+          f"{'alpha err':>11}{'mask IoU':>10}{'PSNR dB':>9}")
+    for name, remove in methods:
+        reference, reference_seconds = process(frames, remove, max_size)
+        print(f"  {name:<8}{'background first':<22}{reference_seconds * 1000:>10.1f}{'1.0x':>9}"
+              f"{'-':>11}{'-':>10}{'-':>9}")
+        for edge_scale in EDGE_SCALES:
+            results, seconds = process(frames, remove, max_size, edge_scale)
+            alpha_error, iou, psnr = compare(reference, results)
+            print(f"  {name:<8}{f'resize first x{edge_scale}':<22}{seconds * 1000:>10.1f}"
+                  f"{reference_seconds / seconds:>8.1f}x{alpha_error:>11.2f}{iou:>10.3f}{psnr:>9.1f}")
+    print("=" * 84)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: Sharingan preview GIF rendering
+Compares the old preview (90 rotations at 512px, LANCZOS down to 256, per-frame
+palettes) with create_sharingan_from_image's symmetry-aware renderer for every
+Mangekyo animation in the app, and reports time, frames, GIF size and fidelity
+
+Usage:
+    python bench_sharingan_preview.py [image ...]     # default: the app's mangekyo_*.json images
+"""
+
+import base64
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parents[1]
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(REPO_ROOT))
+from create_sharingan_from_image import PREVIEW_FRAMES, PREVIEW_SIZE, create_preview_gif
+
+ANIMATIONS_DIR = REPO_ROOT / "app" / "src" / "main" / "assets" / "animations"
+
+
+def legacy_preview_gif(img, output_path):
+    frames = []
+    for i in range(PREVIEW_FRAMES):
+        angle = (i / PREVIEW_FRAMES) * 360
+        rotated = img.rotate(-angle, resample=Image.BICUBIC, expand=False)
+        frames.append(rotated.resize((PREVIEW_SIZE, PREVIEW_SIZE), Image.LANCZOS))
+    frames[0].save(output_path, save_all=True, append_images=frames[1:], duration=1000 // 30,
+                   loop=0, optimize=True, transparency=0)
+
+
+def app_images():
+    """(name, RGBA image) for the image embedded in each Mangekyo animation"""
+    for path in sorted(ANIMATIONS_DIR.glob("mangekyo_*.json")):
+        data_uri = json.loads(path.read_text())['assets'][0]['p']
+        data = base64.b64decode(data_uri.partition(',')[2])
+        yield path.stem, Image.open(io.BytesIO(data)).convert('RGBA')
+
+
+def fidelity(img, gif_path):
+    """Mean premultiplied-RGBA PSNR of the GIF against 512px rotations shrunk to preview size"""
+    gif = Image.open(gif_path)
+    scores = []
+    for i in range(0, PREVIEW_FRAMES, 7):
+        gif.seek(i % gif.n_frames)
+        frame = np.asarray(gif.convert('RGBA'), dtype=np.float32)
+        reference = np.asarray(img.rotate(-i * 360 / PREVIEW_FRAMES, resample=Image.BICUBIC)
+                               .resize((PREVIEW_SIZE, PREVIEW_SIZE), Image.LANCZOS), dtype=np.float32)
+        error = np.concatenate([reference[..., :3] * reference[..., 3:] / 255
+                                - frame[..., :3] * frame[..., 3:] / 255,
+                                reference[..., 3:] - frame[..., 3:]], axis=-1)
+        scores.append(10 * math.log10(255 ** 2 / max(float(np.mean(error ** 2)), 1e-9)))
+    gif.close()
+    return sum(scores) / len(scores)
+
+
+def timed(fn, img, path):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(img, path)
+    return time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) > 1:
+        images = [(Path(name).stem, Image.open(name).convert('RGBA').resize((512, 512), Image.LANCZOS))
+                  for name in sys.argv[1:]]
+    else:
+        images = list(app_images())
+
+    print("=" * 84)
+    print(f"SHARINGAN PREVIEW BENCHMARK ({len(images)} images, {PREVIEW_FRAMES} frames per turn)")
+    print("=" * 84)
+    print(f"  {'image':<20}{'renderer':<11}{'seconds':>9}{'frames':>8}{'KB':>9}{'PSNR dB':>9}{'speedup':>9}")
+    totals = {'old': 0.0, 'new': 0.0}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, img in images:
+            legacy_seconds = None
+            for label, fn in (('old', legacy_preview_gif), ('new', create_preview_gif)):
+                path = os.path.join(tmp, f"{name}_{label}.gif")
+                seconds = timed(fn, img, path)
+                totals[label] += seconds
+                legacy_seconds = legacy_seconds or seconds
+                with Image.open(path) as gif:
+                    frames = gif.n_frames
+                print(f"  {name:<20}{label:<11}{seconds:>9.2f}{frames:>8}"
+                      f"{os.path.getsize(path) / 1024:>9.1f}{fidelity(img, path):>9.1f}"
+                      f"{legacy_seconds / seconds:>8.1f}x")
+    print("-" * 84)
+    print(f"  All previews: {totals['old']:.2f}s -> {totals['new']:.2f}s "
+          f"({totals['old'] / totals['new']:.1f}x faster)")
+    print("=" * 84)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Benchmark suite: per-stage and end-to-end timings against a stored baseline
+Generates synthetic MP4/GIF inputs, records frames/s, peak RSS and output bytes,
+and exits non-zero when a case regresses past the thresholds
+
+Usage:
+    python bench_suite.py                      # compare with baseline.json
+    python bench_suite.py --update-baseline    # record this machine's baseline
+    python bench_suite.py --filter e2e/mp4     # only matching cases
+    python bench_suite.py --filter startup     # import/startup time only
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+import gif_to_lottie
+import mp4_to_lottie
+from memory_stats import format_bytes, peak_rss_bytes
+from synthetic_media import character_frames, write_gif, write_mp4
+
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+
+# A case fails when it is this much worse than the baseline
+THRESHOLDS = {
+    'fps': 0.25,           # 25% fewer frames/s
+    'output_bytes': 0.02,  # 2% bigger output
+    'peak_rss': 0.20,      # 20% more memory
+    'startup_s': 0.25,     # 25% slower to start
+}
+
+# (name, width, height, frames, background)
+STAGE_INPUTS = {
+    'black-320x240': (320, 240, 24, 'black'),
+    'black-1280x720': (1280, 720, 24, 'black'),
+    'white-320x240': (320, 240, 24, 'white'),
+    'transparent-128': (128, 128, 12, 'transparent'),
+}
+
+# (name, kind, width, height, frames, background, converter kwargs)
+E2E_CASES = [
+    ('e2e/mp4/black-320x240', 'mp4', 320, 240, 48, 'black', {'max_size': 128, 'target_fps': 12}),
+    ('e2e/mp4/noise-320x240', 'mp4', 320, 240, 24, 'noise', {'max_size': 96, 'target_fps': 12}),
+    ('e2e/mp4/gradient-320x240-nobg', 'mp4', 320, 240, 48, 'gradient',
+     {'max_size': 128, 'target_fps': 12, 'remove_bg': False}),
+    ('e2e/gif/transparent-200x200', 'gif', 200, 200, 24, 'transparent', {'max_size': 128}),
+    ('e2e/gif/white-320x240', 'gif', 320, 240, 24, 'white', {'max_size': 128}),
+]
+MP4_FPS = 24
+
+# (name, python -c code) run in a fresh interpreter; time includes interpreter startup
+STARTUP_CASES = [
+    ('startup/python', 'pass'),
+    ('startup/import mp4_to_lottie', 'import mp4_to_lottie'),
+    ('startup/import gif_to_lottie', 'import gif_to_lottie'),
+    ('startup/check_dependencies', 'import mp4_to_lottie; mp4_to_lottie.check_dependencies()'),
+]
+
+
+def environment():
+    import cv2
+    import PIL
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pillow': PIL.__version__,
+        'opencv': cv2.__version__,
+    }
+
+
+def best_time(fn, repeats):
+    """Fastest of `repeats` runs of fn, plus fn's last result"""
+    best = None
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def stage_cases(tmp):
+    """
+    (name, frame count, fn) for every per-stage case
+
+    fn runs the stage once over all frames and returns the output size in
+    bytes, or None when the stage produces no output.
+    """
+    inputs = {name: [Image.fromarray(frame, 'RGBA') for frame in character_frames(w, h, n, bg)]
+              for name, (w, h, n, bg) in STAGE_INPUTS.items()}
+    small = [mp4_to_lottie.optimize_frame(frame, 128) for frame in inputs['transparent-128']]
+
+    def run_each(fn, frames):
+        def stage():
+            for frame in frames:
+                fn(frame)
+        return stage
+
+    def run_pairs(fn, frames):
+        def stage():
+            for previous, frame in zip(frames, frames[1:]):
+                fn(previous, frame)
+        return stage
+
+    def encode(frames):
+        def stage():
+            return sum(len(mp4_to_lottie.frame_to_base64(frame)) for frame in frames)
+        return stage
+
+    def lottie(frames):
+        output = os.path.join(tmp, "stage.json")
+
+        def stage():
+            with contextlib.redirect_stdout(io.StringIO()):
+                mp4_to_lottie.create_lottie_animation([(frame, 83) for frame in frames], output, fps=12)
+            return os.path.getsize(output)
+        return stage
+
+    cases = []
+    for name in ('black-320x240', 'black-1280x720'):
+        frames = inputs[name]
+        cases.append((f"stage/remove_background_simple/{name}", len(frames),
+                      run_each(mp4_to_lottie.remove_background_simple, frames)))
+        cases.append((f"stage/calculate_frame_difference/{name}", len(frames) - 1,
+                      run_pairs(mp4_to_lottie.calculate_frame_difference, frames)))
+    frames = inputs['white-320x240']
+    cases.append(("stage/gif_remove_background/white-320x240", len(frames),
+                  run_each(gif_to_lottie.remove_background, frames)))
+    frames = inputs['black-1280x720']
+    cases.append(("stage/optimize_frame/1280x720-to-256", len(frames),
+                  run_each(lambda frame: mp4_to_lottie.optimize_frame(frame, 256), frames)))
+    cases.append(("stage/frame_to_base64/transparent-128", len(small), encode(small)))
+    cases.append(("stage/create_lottie_animation/transparent-128", len(small), lottie(small)))
+    return cases
+
+
+def run_stage_cases(tmp, repeats, selected):
+    results = {}
+    for name, frame_count, fn in stage_cases(tmp):
+        if not selected(name):
+            continue
+        seconds, output_bytes = best_time(fn, repeats)
+        results[name] = {'frames': frame_count, 'seconds': seconds, 'fps': frame_count / seconds}
+        if output_bytes is not None:
+            results[name]['output_bytes'] = output_bytes
+        print_result(name, results[name])
+    return results
+
+
+def _run_conversion(kind, input_path, output_path, options):
+    """End-to-end conversion in a fresh process so peak RSS belongs to this case alone"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if kind == 'mp4':
+            mp4_to_lottie.convert_mp4_to_lottie(input_path, output_path, **options)
+        else:
+            gif_to_lottie.convert_gif_to_lottie(input_path, output_path, **options)
+    seconds = time.perf_counter() - start
+    return seconds, peak_rss_bytes(), os.path.getsize(output_path)
+
+
+def run_e2e_cases(tmp, repeats, selected):
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for name, kind, width, height, count, bg, options in E2E_CASES:
+        if not selected(name):
+            continue
+        input_path = os.path.join(tmp, f"{name.replace('/', '_')}.{kind}")
+        frames = character_frames(width, height, count, bg)
+        if kind == 'mp4':
+            write_mp4(input_path, frames, MP4_FPS)
+            processed = round(count * min(1.0, options.get('target_fps', MP4_FPS) / MP4_FPS))
+        else:
+            write_gif(input_path, frames)
+            processed = count
+        output_path = os.path.join(tmp, "e2e.json")
+
+        best = None
+        for _ in range(repeats):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                run = executor.submit(_run_conversion, kind, input_path, output_path, options).result()
+            if best is None or run[0] < best[0]:
+                best = run
+        seconds, peak_rss, output_bytes = best
+        results[name] = {'frames': processed, 'seconds': seconds, 'fps': processed / seconds,
+                         'peak_rss': peak_rss, 'output_bytes': output_bytes}
+        print_result(name, results[name])
+    return results
+
+
+def run_startup_cases(repeats, selected):
+    """Best-of-`repeats` wall time of short scripts, each in a new interpreter"""
+    results = {}
+    for name, code in STARTUP_CASES:
+        if not selected(name):
+            continue
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], cwd=SCRIPTS_DIR, check=True,
+                           stdout=subprocess.DEVNULL)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {'startup_s': best}
+        print_result(name, results[name])
+    return results
+
+
+def print_result(name, result):
+    if 'startup_s' in result:
+        print(f"  {name:<52}{result['startup_s'] * 1000:>10.1f} ms")
+        return
+    line = f"  {name:<52}{result['fps']:>10.1f} fps"
+    if 'output_bytes' in result:
+        line += f"{result['output_bytes'] / 1024:>10.1f} KB"
+    if result.get('peak_rss'):
+        line += f"{format_bytes(result['peak_rss']):>12} RSS"
+    print(line)
+
+
+def compare(results, baseline, thresholds):
+    """
+    Compare results with a baseline
+
+    Returns:
+        List of regression messages (empty = pass)
+    """
+    regressions = []
+    print("-" * 96)
+    print(f"  {'case':<52}{'metric':<14}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"  {name:<52}(new case, no baseline)")
+            continue
+        for metric, tolerance in thresholds.items():
+            if metric not in result or metric not in previous or not previous[metric]:
+                continue
+            change = result[metric] / previous[metric] - 1
+            # For fps higher is better, for bytes, memory and startup time lower is better
+            worse = -change if metric == 'fps' else change
+            status = ""
+            if worse > tolerance:
+                status = "  REGRESSION"
+                regressions.append(f"{name}: {metric} {change:+.0%} (limit {tolerance:.0%})")
+            elif worse < -tolerance:
+                status = "  improved"
+            print(f"  {name:<52}{metric:<14}{_format(metric, previous[metric]):>12}"
+                  f"{_format(metric, result[metric]):>12}{change:>+9.0%}{status}")
+    return regressions
+
+
+def _format(metric, value):
+    if metric == 'fps':
+        return f"{value:.1f}"
+    if metric == 'peak_rss':
+        return format_bytes(value)
+    if metric == 'startup_s':
+        return f"{value * 1000:.1f} ms"
+    return f"{value / 1024:.1f} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Animation tools benchmark suite")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Write this run's results as the new baseline")
+    parser.add_argument('--filter', default=None, help="Only run cases whose name contains this")
+    parser.add_argument('--repeats', type=int, default=3,
+                        help="Runs per stage case (fastest is kept)")
+    parser.add_argument('--e2e-repeats', type=int, default=1,
+                        help="Runs per end-to-end case (each is a full conversion)")
+    parser.add_argument('--fps-tolerance', type=float, default=THRESHOLDS['fps'])
+    parser.add_argument('--size-tolerance', type=float, default=THRESHOLDS['output_bytes'])
+    parser.add_argument('--rss-tolerance', type=float, default=THRESHOLDS['peak_rss'])
+    parser.add_argument('--startup-tolerance', type=float, default=THRESHOLDS['startup_s'])
+    args = parser.parse_args()
+
+    def selected(name):
+        return args.filter is None or args.filter in name
+
+    print("=" * 96)
+    print("ANIMATION TOOLS BENCHMARK SUITE")
+    print("=" * 96)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run_stage_cases(tmp, args.repeats, selected)
+        results.update(run_e2e_cases(tmp, args.e2e_repeats, selected))
+    results.update(run_startup_cases(max(args.repeats, 5), selected))
+
+    if args.update_baseline:
+        baseline = {'environment': environment(), 'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as f:
+                baseline['results'] = json.load(f).get('results', {})
+        baseline['results'].update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written: {args.baseline} ({len(results)} cases)")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --update-baseline")
+        return 0
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    if baseline.get('environment') != environment():
+        print("⚠️ Baseline was recorded on a different machine or library versions; "
+              "timings may not be comparable")
+
+    thresholds = {'fps': args.fps_tolerance, 'output_bytes': args.size_tolerance,
+                  'peak_rss': args.rss_tolerance, 'startup_s': args.startup_tolerance}
+    regressions = compare(results, baseline['results'], thresholds)
+    print("-" * 96)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s):")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print("✓ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Synthetic benchmark media
+Generates a bouncing, waving character over different backgrounds and writes
+it as MP4, GIF or PNG so benchmarks need no checked-in inputs
+"""
+
+import math
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+BACKGROUNDS = ('black', 'white', 'gradient', 'noise', 'transparent')
+
+
+def background(width, height, kind, seed=0):
+    """RGBA background array of the given kind"""
+    rgba = np.zeros((height, width, 4), dtype=np.uint8)
+    rgba[:, :, 3] = 255
+    if kind == 'white':
+        rgba[:, :, :3] = 255
+    elif kind == 'gradient':
+        ramp = np.linspace(40, 200, width, dtype=np.float32).astype(np.uint8)
+        rgba[:, :, 0] = ramp
+        rgba[:, :, 1] = ramp[::-1]
+        rgba[:, :, 2] = 120
+    elif kind == 'noise':
+        # Dark sensor-like noise: still background, but never two identical frames
+        rng = np.random.default_rng(seed)
+        rgba[:, :, :3] = rng.integers(0, 24, (height, width, 3), dtype=np.uint8)
+    elif kind == 'transparent':
+        rgba[:, :, 3] = 0
+    elif kind != 'black':
+        raise ValueError(f"Unknown background: {kind}")
+    return rgba
+
+
+def character_frames(width, height, count, background_kind='black', hold_every=3):
+    """
+    RGBA frames of a character bouncing and waving over a background
+
+    Every hold_every-th frame repeats the one before it (0 = never), so
+    duplicate detection has something to find.
+
+    Yields:
+        (height, width, 4) uint8 arrays
+    """
+    unit = min(width, height)
+    static_background = None if background_kind == 'noise' else background(width, height, background_kind)
+    pose = 0
+    for i in range(count):
+        if not (hold_every and i % hold_every == hold_every - 1):
+            pose = i
+        canvas = background(width, height, background_kind, seed=i) if static_background is None \
+            else static_background.copy()
+        image = Image.fromarray(canvas, 'RGBA')
+        draw = ImageDraw.Draw(image)
+
+        phase = pose / max(1, count) * 2 * math.pi
+        cx = width / 2 + unit * 0.2 * math.sin(phase)
+        cy = height * 0.55 - unit * 0.12 * abs(math.sin(2 * phase))
+        rx, ry = unit * 0.18, unit * 0.26
+        draw.ellipse((cx - rx, cy - ry, cx + rx, cy + ry), fill=(255, 170, 60, 255),
+                     outline=(90, 40, 0, 255), width=max(1, unit // 64))
+        for side in (-1, 1):
+            ex = cx + side * rx * 0.4
+            draw.ellipse((ex - unit * 0.03, cy - ry * 0.4 - unit * 0.03,
+                          ex + unit * 0.03, cy - ry * 0.4 + unit * 0.03), fill=(30, 30, 30, 255))
+        angle = 0.8 * math.sin(3 * phase)
+        shoulder = (cx + rx * 0.9, cy - ry * 0.1)
+        hand = (shoulder[0] + unit * 0.2 * math.cos(angle - 0.7),
+                shoulder[1] + unit * 0.2 * math.sin(angle - 0.7))
+        draw.line((shoulder, hand), fill=(255, 170, 60, 255), width=max(2, unit // 24))
+        yield np.asarray(image)
+
+
+def write_mp4(path, frames, fps=24):
+    """Write RGBA/RGB frames to an MP4 (alpha is dropped); returns the frame count"""
+    import cv2
+    writer = None
+    written = 0
+    try:
+        for frame in frames:
+            if writer is None:
+                height, width = frame.shape[:2]
+                writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+                if not writer.isOpened():
+                    raise RuntimeError("OpenCV cannot write MP4 files on this system")
+            writer.write(cv2.cvtColor(np.ascontiguousarray(frame[:, :, :3]), cv2.COLOR_RGB2BGR))
+            written += 1
+    finally:
+        if writer is not None:
+            writer.release()
+    return written
+
+
+def write_gif(path, frames, duration_ms=80):
+    """Write RGBA frames to a looping GIF; fully transparent pixels stay transparent"""
+    images = [Image.fromarray(frame, 'RGBA') for frame in frames]
+    images[0].save(path, save_all=True, append_images=images[1:], duration=duration_ms,
+                   loop=0, disposal=2)
+    return len(images)
+
+
+def write_png(path, frame):
+    Image.fromarray(frame, 'RGBA').save(path)
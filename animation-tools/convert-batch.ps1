@@ -0,0 +1,61 @@
+#!/usr/bin/env pwsh
+<#
+.SYNOPSIS
+    Convert every GIF/MP4 in a folder (or a manifest) to Lottie
+.DESCRIPTION
+    Runs the conversions concurrently under one CPU and memory budget, largest files first
+.PARAMETER Source
+    Input folder or JSON manifest (default: input folder)
+.PARAMETER MaxSize
+    Maximum dimension in pixels (default: 256)
+.PARAMETER TargetFps
+    Target frames per second for MP4 inputs (default: 12)
+.PARAMETER BackgroundMethod
+    Background removal method: 'ai', 'simple', or 'none' (default: simple)
+.PARAMETER Cpus
+    Total cores for all conversions (default: all)
+.PARAMETER MemoryMB
+    Total memory budget in MB (default: half of physical memory)
+.EXAMPLE
+    .\convert-batch.ps1
+.EXAMPLE
+    .\convert-batch.ps1 -Source "jobs.json" -Cpus 4 -MemoryMB 4096
+#>
+
+param(
+    [string]$Source = "$PSScriptRoot\input",
+    
+    [int]$MaxSize = 256,
+    
+    [int]$TargetFps = 12,
+    
+    [ValidateSet('ai', 'simple', 'none')]
+    [string]$BackgroundMethod = 'simple',
+    
+    [int]$Cpus = 0,
+    
+    [int]$MemoryMB = 0
+)
+
+$RootDir = Split-Path -Parent $PSScriptRoot
+$PythonExe = "$RootDir\.venv\Scripts\python.exe"
+$ScriptPath = "$PSScriptRoot\scripts\batch_convert.py"
+$OutputDir = "$PSScriptRoot\output"
+
+$BatchArgs = @($Source, "--output", $OutputDir, "--max-size", $MaxSize, "--fps", $TargetFps, "--bg-method", $BackgroundMethod)
+if ($Cpus -gt 0) { $BatchArgs += @("--cpus", $Cpus) }
+if ($MemoryMB -gt 0) { $BatchArgs += @("--memory-mb", $MemoryMB) }
+
+Write-Host "🎞️ Batch Lottie Converter" -ForegroundColor Cyan
+
+# Run the batch converter
+& $PythonExe $ScriptPath @BatchArgs
+
+if ($LASTEXITCODE -eq 0) {
+    Write-Host ""
+    Write-Host "✅ All conversions completed!" -ForegroundColor Green
+    Write-Host "📁 Output: $OutputDir" -ForegroundColor Cyan
+} else {
+    Write-Host "❌ Some conversions failed!" -ForegroundColor Red
+    exit 1
+}
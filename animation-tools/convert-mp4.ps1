@@ -18,6 +18,17 @@
     Target frames per second (default: 12)
 .PARAMETER Speed
     Animation speed multiplier in Kotlin code (default: 0.75)
+.PARAMETER Workers
+    Parallel workers for frame processing and encoding (default: 1 = serial)
+.PARAMETER ResizeFirst
+    Shrink frames to MaxSize before background removal instead of after
+    (much faster for HD sources, slightly different edges)
+.PARAMETER CheckBudgets
+    Fail the conversion when the animation is over the load-cost budgets in
+    scripts\lottie_cost.py (file size, decoded bitmap memory, layers; default: off)
+.PARAMETER UseDaemon
+    Send the job to a running conversion daemon (scripts\convert_daemon.py serve)
+    instead of starting a new Python converter, so imports and the AI model stay loaded
 .EXAMPLE
     .\convert-mp4.ps1 -InputFile "my-video.mp4" -OutputName "my_animation"
 .EXAMPLE
@@ -42,7 +53,15 @@ param(
     
     [double]$Speed = 0.75,
     
-    [bool]$SkipDuplicates = $true
+    [bool]$SkipDuplicates = $true,
+    
+    [int]$Workers = 1,
+    
+    [switch]$ResizeFirst,
+    
+    [switch]$CheckBudgets,
+    
+    [switch]$UseDaemon
 )
 
 $RootDir = Split-Path -Parent $PSScriptRoot
@@ -74,6 +93,9 @@ Write-Host "  - Background Removal: $BackgroundMethod"
 Write-Host "  - Remove BG: $RemoveBackground"
 Write-Host "  - Skip Duplicates: $SkipDuplicates"
 Write-Host "  - Speed (for Kotlin): ${Speed}x"
+Write-Host "  - Workers: $Workers"
+Write-Host "  - Resize First: $ResizeFirst"
+Write-Host "  - Check Budgets: $CheckBudgets"
 Write-Host "=" * 60
 
 # Build Python command - use forward slashes for Python
@@ -82,6 +104,8 @@ $InputPathPy = $InputPath -replace '\\', '/'
 $OutputPathPy = $OutputPath -replace '\\', '/'
 $RemoveBgPy = if ($RemoveBackground) { "True" } else { "False" }
 $DuplicateThreshold = if ($SkipDuplicates) { "0.02" } else { "0" }
+$ResizeFirstPy = if ($ResizeFirst) { "True" } else { "False" }
+$CheckBudgetsPy = if ($CheckBudgets) { "True" } else { "None" }
 
 $PythonCmd = @"
 import sys
@@ -95,12 +119,22 @@ convert_mp4_to_lottie(
     target_fps=$TargetFps, 
     skip_frames=1, 
     duplicate_threshold=$DuplicateThreshold, 
-    bg_method='$BackgroundMethod'
+    bg_method='$BackgroundMethod',
+    workers=$Workers,
+    resize_first=$ResizeFirstPy,
+    budgets=$CheckBudgetsPy
 )
 "@
 
 # Run the converter
-& $PythonExe -c $PythonCmd
+if ($UseDaemon) {
+    & $PythonExe "$PSScriptRoot\scripts\convert_daemon.py" convert $InputPath $OutputPath `
+        -p "remove_bg=$($RemoveBgPy.ToLower())" -p "max_size=$MaxSize" -p "target_fps=$TargetFps" `
+        -p "duplicate_threshold=$DuplicateThreshold" -p "bg_method=$BackgroundMethod" -p "workers=$Workers" `
+        -p "resize_first=$($ResizeFirstPy.ToLower())" -p "budgets=$(if ($CheckBudgets) { 'true' } else { 'null' })"
+} else {
+    & $PythonExe -c $PythonCmd
+}
 
 if ($LASTEXITCODE -eq 0) {
     Write-Host ""
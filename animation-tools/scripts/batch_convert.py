@@ -0,0 +1,302 @@
+"""
+Batch converter for a directory of GIF/MP4 files or a JSON manifest
+Runs conversions concurrently under one CPU and memory budget, largest jobs
+first, and prints files/s and frames/s at the end
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from memory_stats import format_bytes
+
+ANIMATION_TOOLS_DIR = Path(__file__).resolve().parent.parent
+CONVERTERS = {'.mp4': 'mp4', '.gif': 'gif'}
+
+# Rough resident memory of one conversion process before any frames are held
+JOB_BASE_BYTES = 150 * 1024 * 1024
+AI_MODEL_BYTES = 600 * 1024 * 1024
+
+
+def total_memory_bytes():
+    """Physical memory of the machine, or None if it cannot be read"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def jobs_from_directory(input_dir, output_dir, options):
+    """One job per GIF/MP4 in input_dir, written to output_dir/<name>.json"""
+    jobs = []
+    for path in sorted(Path(input_dir).iterdir()):
+        if path.suffix.lower() in CONVERTERS:
+            jobs.append(dict(options, input=str(path), output=str(Path(output_dir) / f"{path.stem}.json")))
+    return jobs
+
+
+def jobs_from_manifest(manifest_path, output_dir, options):
+    """
+    Jobs listed in a JSON manifest
+
+    The manifest is a list of objects with an "input" path and optionally an
+    "output" path plus any converter keyword arguments, e.g.
+        [{"input": "dance.mp4", "max_size": 128, "target_fps": 15}]
+    Relative paths are resolved against the manifest's directory.
+    """
+    manifest_path = Path(manifest_path)
+    with open(manifest_path, 'r') as f:
+        entries = json.load(f)
+
+    jobs = []
+    for entry in entries:
+        job = dict(options, **entry)
+        input_path = manifest_path.parent / job['input']
+        job['input'] = str(input_path)
+        if 'output' in job:
+            job['output'] = str(manifest_path.parent / job['output'])
+        else:
+            job['output'] = str(Path(output_dir) / f"{input_path.stem}.json")
+        jobs.append(job)
+    return jobs
+
+
+def probe(job):
+    """
+    Estimate the frames a job will process and the pixels it will touch
+
+    Returns:
+        (frames, cost) where cost is frames x source pixels
+    """
+    path = job['input']
+    kind = CONVERTERS.get(Path(path).suffix.lower())
+    if kind == 'mp4':
+        import cv2
+        video = cv2.VideoCapture(path)
+        try:
+            fps = video.get(cv2.CAP_PROP_FPS) or 1.0
+            frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+            pixels = int(video.get(cv2.CAP_PROP_FRAME_WIDTH)) * int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        finally:
+            video.release()
+        target_fps = job.get('target_fps') or fps
+        frames = max(1, round(frame_count * min(1.0, target_fps / fps) / job.get('skip_frames', 1)))
+    else:
+        from PIL import Image
+        with Image.open(path) as gif:
+            frames = getattr(gif, 'n_frames', 1)
+            pixels = gif.width * gif.height
+    return frames, frames * pixels
+
+
+def memory_estimate(job, frames):
+    """
+    Peak memory of a job: process baseline plus the processed frames it holds
+
+    A streaming job keeps only a handful of frames in memory at a time.
+    """
+    max_size = job.get('max_size', 512)
+    frame_bytes = max_size * max_size * 4
+    held = 8 if job.get('streaming') else frames
+    estimate = JOB_BASE_BYTES + held * frame_bytes * 2
+    if job.get('bg_method') == 'ai' and job.get('remove_bg', True):
+        estimate += AI_MODEL_BYTES
+    return estimate
+
+
+def plan_jobs(jobs, cpu_budget, memory_budget):
+    """
+    Probe and order jobs for scheduling
+
+    Jobs are sorted largest first (longest-processing-time order), so the
+    big clips start right away and the small ones fill the gaps at the end.
+    The CPU budget is split between the jobs that run at once; cores left
+    over from an even split go to the largest jobs. A job that would not fit
+    the memory budget even on its own is switched to streaming.
+
+    Returns:
+        List of job dicts with 'frames', 'cost', 'memory' and 'workers' added
+    """
+    for job in jobs:
+        job['frames'], job['cost'] = probe(job)
+        job['memory'] = memory_estimate(job, job['frames'])
+        if memory_budget and job['memory'] > memory_budget and not job.get('streaming'):
+            job['streaming'] = True
+            job['memory'] = memory_estimate(job, job['frames'])
+    jobs.sort(key=lambda job: job['cost'], reverse=True)
+
+    concurrency = max(1, min(cpu_budget, len(jobs)))
+    share, remainder = divmod(cpu_budget, concurrency)
+    for index, job in enumerate(jobs):
+        # Cores that do not divide evenly go to the largest jobs, which start first
+        job['workers'] = max(1, share + (index < remainder))
+    return jobs
+
+
+def _run_job(job):
+    """
+    Convert one file in a worker process
+
+    Returns:
+        (job, seconds, log text, error text or None)
+    """
+    options = {key: value for key, value in job.items()
+               if key not in ('input', 'output', 'frames', 'cost', 'memory', 'workers')}
+    log = io.StringIO()
+    start = time.perf_counter()
+    error = None
+    try:
+        Path(job['output']).parent.mkdir(parents=True, exist_ok=True)
+        with contextlib.redirect_stdout(log):
+            if CONVERTERS[Path(job['input']).suffix.lower()] == 'mp4':
+                from mp4_to_lottie import convert_mp4_to_lottie
+                if options.get('bg_method') == 'ai':
+                    # Keep jobs x ONNX threads within this job's share of the cores
+                    options.setdefault('ai_threads', job['workers'])
+                result = convert_mp4_to_lottie(job['input'], job['output'],
+                                               workers=job['workers'], **options)
+            else:
+                from gif_to_lottie import convert_gif_to_lottie
+                result = convert_gif_to_lottie(job['input'], job['output'], **options)
+        if result is None:
+            error = "no frames extracted"
+        else:
+            job['output'] = result
+    except Exception:
+        error = traceback.format_exc()
+    return job, time.perf_counter() - start, log.getvalue(), error
+
+
+def run_batch(jobs, cpu_budget=None, memory_budget=None, verbose=False):
+    """
+    Convert all jobs concurrently within the CPU and memory budgets
+
+    A job is started when a slot is free and its estimated memory fits next
+    to the jobs already running; the largest job that fits goes first. A
+    job is always started when nothing else is running.
+
+    Args:
+        jobs: Job dicts from jobs_from_directory / jobs_from_manifest
+        cpu_budget: Total cores for all conversions (default: all cores)
+        memory_budget: Total bytes for all conversions (None = no limit)
+        verbose: Print each job's full converter output when it finishes
+
+    Returns:
+        List of (job, seconds, error) in completion order
+    """
+    cpu_budget = cpu_budget or os.cpu_count() or 1
+    jobs = plan_jobs(jobs, cpu_budget, memory_budget)
+    if not jobs:
+        print("No GIF/MP4 files to convert")
+        return []
+
+    slots = max(1, min(cpu_budget, len(jobs)))
+    print("=" * 60)
+    print("BATCH CONVERT")
+    print("=" * 60)
+    print(f"Jobs: {len(jobs)} ({sum(job['frames'] for job in jobs)} frames)")
+    print(f"CPU budget: {cpu_budget} cores ({slots} jobs at a time, "
+          f"{jobs[0]['workers']} worker(s) each)")
+    print(f"Memory budget: {format_bytes(memory_budget) if memory_budget else 'unlimited'}")
+    print("=" * 60)
+
+    queue = list(jobs)
+    running = {}  # future -> job
+    results = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=slots) as executor:
+        while queue or running:
+            in_use = sum(job['memory'] for job in running.values())
+            while queue and len(running) < slots:
+                fitting = [job for job in queue
+                           if not memory_budget or not running or in_use + job['memory'] <= memory_budget]
+                if not fitting:
+                    break
+                job = fitting[0]
+                queue.remove(job)
+                running[executor.submit(_run_job, job)] = job
+                in_use += job['memory']
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                job, seconds, log, error = future.result()
+                results.append((job, seconds, error))
+                name = Path(job['input']).name
+                if error:
+                    print(f"❌ {name} failed after {seconds:.1f}s")
+                    print(error.rstrip())
+                else:
+                    print(f"✓ {name} -> {job['output']} ({job['frames']} frames, {seconds:.1f}s)")
+                if verbose or error:
+                    print(log.rstrip())
+
+    wall = time.perf_counter() - start
+    print_summary(results, wall)
+    return results
+
+
+def print_summary(results, wall):
+    converted = [(job, seconds) for job, seconds, error in results if not error]
+    frames = sum(job['frames'] for job, _ in converted)
+    busy = sum(seconds for _, seconds in converted)
+    print("-" * 60)
+    print(f"Converted {len(converted)}/{len(results)} files in {wall:.1f}s")
+    if wall > 0:
+        print(f"Throughput: {len(converted) / wall:.2f} files/s, {frames / wall:.1f} frames/s")
+        print(f"Sum of job times: {busy:.1f}s ({busy / wall:.2f}x concurrency)")
+    print("-" * 60)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a directory or manifest of GIF/MP4 files to Lottie")
+    parser.add_argument('source', nargs='?', default=str(ANIMATION_TOOLS_DIR / "input"),
+                        help="Input directory or JSON manifest (default: animation-tools/input)")
+    parser.add_argument('--output', default=str(ANIMATION_TOOLS_DIR / "output"),
+                        help="Output directory for jobs without an explicit output")
+    parser.add_argument('--cpus', type=int, default=None, help="Total cores to use (default: all)")
+    parser.add_argument('--memory-mb', type=int, default=None,
+                        help="Total memory budget (default: half of physical memory)")
+    parser.add_argument('--max-size', type=int, default=256)
+    parser.add_argument('--fps', type=int, default=12, help="Target FPS for MP4 inputs")
+    parser.add_argument('--bg-method', choices=('ai', 'simple', 'none'), default='simple')
+    parser.add_argument('--container', choices=('json', 'dotlottie'), default='json')
+    parser.add_argument('--cache', action='store_true', help="Use the conversion cache")
+    parser.add_argument('--verbose', action='store_true', help="Print every converter's full output")
+    args = parser.parse_args(argv)
+
+    options = {'max_size': args.max_size, 'container': args.container}
+    if args.cache:
+        options['cache'] = True
+    if Path(args.source).is_dir():
+        jobs = jobs_from_directory(args.source, args.output, options)
+        for job in jobs:
+            if job['input'].lower().endswith('.mp4'):
+                job.update(target_fps=args.fps, bg_method=args.bg_method,
+                           remove_bg=args.bg_method != 'none')
+            else:
+                job['remove_bg'] = args.bg_method != 'none'
+    else:
+        jobs = jobs_from_manifest(args.source, args.output, options)
+
+    if args.memory_mb:
+        memory_budget = args.memory_mb * 1024 * 1024
+    else:
+        physical = total_memory_bytes()
+        memory_budget = physical // 2 if physical else None
+
+    results = run_batch(jobs, cpu_budget=args.cpus, memory_budget=memory_budget,
+                        verbose=args.verbose)
+    return 1 if any(error for _, _, error in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
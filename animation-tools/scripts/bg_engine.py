@@ -0,0 +1,210 @@
+"""
+Shared AI background-removal engine (rembg)
+Keeps one ONNX session per process, takes PIL images or ndarrays directly
+(no PNG round trip) and runs several frames per inference call
+"""
+
+import threading
+
+from lazy_imports import is_installed, lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+ImageOps = lazy_import('PIL.ImageOps')
+
+# Models that use rembg's U2-Net preprocessing (320x320, ImageNet mean/std),
+# which the batched path reproduces on the session's ONNX inner_session. Other
+# models, and rembg versions without inner_session, go through session.predict.
+U2NET_MODELS = ('u2net', 'u2netp', 'u2net_human_seg', 'silueta')
+
+_engines = {}
+# Engines and their sessions are shared by concurrent jobs in convert_daemon
+_lock = threading.RLock()
+
+
+def is_available():
+    """True if rembg and onnxruntime are installed (without importing them)"""
+    return is_installed('rembg') and is_installed('onnxruntime')
+
+
+def get_engine(model_name='u2net', intra_op_threads=None, batch_size=4):
+    """
+    Process-wide engine for a model, created on first use
+
+    Args:
+        model_name: rembg model name
+        intra_op_threads: ONNX Runtime intra-op thread count (None = runtime default)
+        batch_size: Frames per inference call
+
+    Returns:
+        RembgEngine
+    """
+    key = (model_name, intra_op_threads, batch_size)
+    with _lock:
+        if key not in _engines:
+            _engines[key] = RembgEngine(model_name, intra_op_threads, batch_size)
+        return _engines[key]
+
+
+class RembgEngine:
+    """
+    Batched in-memory wrapper around a single rembg session
+
+    Usage:
+        engine = get_engine('u2net', intra_op_threads=4)
+        cutouts = engine.remove_background([frame1, frame2, frame3])
+    """
+
+    def __init__(self, model_name='u2net', intra_op_threads=None, batch_size=4):
+        self.model_name = model_name
+        self.intra_op_threads = intra_op_threads
+        self.batch_size = max(1, batch_size)
+        self.batched_inference = model_name in U2NET_MODELS
+        self.inference_calls = 0
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            with _lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        import onnxruntime as ort
+        from rembg import new_session
+
+        if self.intra_op_threads is None:
+            return new_session(self.model_name)
+
+        sess_opts = ort.SessionOptions()
+        sess_opts.intra_op_num_threads = self.intra_op_threads
+        try:
+            from rembg.sessions import sessions_class
+            for session_class in sessions_class:
+                if session_class.name() == self.model_name:
+                    return session_class(self.model_name, sess_opts)
+        except (ImportError, TypeError):
+            pass
+
+        # Older rembg: no way to pass options, fall back to the default threads
+        print(f"Warning: this rembg version ignores intra_op_threads={self.intra_op_threads}")
+        return new_session(self.model_name)
+
+    def predict_masks(self, images):
+        """
+        Foreground masks for a list of images
+
+        Args:
+            images: List of PIL Images or RGB/RGBA uint8 ndarrays
+
+        Returns:
+            List of PIL 'L' masks, same sizes as the inputs
+        """
+        return self._predict([_to_pil(image) for image in images])
+
+    def _predict(self, images):
+        masks = []
+        for start in range(0, len(images), self.batch_size):
+            chunk = images[start:start + self.batch_size]
+            if self.batched_inference:
+                masks.extend(self._predict_u2net(chunk))
+            else:
+                masks.extend(self._predict_each(chunk))
+        return masks
+
+    def _predict_each(self, images):
+        # rembg's own per-image pipeline, the one rembg.remove runs
+        masks = []
+        for image in images:
+            self.inference_calls += 1
+            masks.append(self.session.predict(image.convert('RGB'))[0])
+        return masks
+
+    def _predict_u2net(self, images):
+        session = self.session
+        if getattr(session, 'inner_session', None) is None:
+            # rembg version without a raw ONNX session to batch on
+            self.batched_inference = False
+            return self._predict_each(images)
+        inputs = np.concatenate([_u2net_input(image) for image in images])
+        input_name = session.inner_session.get_inputs()[0].name
+
+        try:
+            self.inference_calls += 1
+            outputs = session.inner_session.run(None, {input_name: inputs})[0]
+        except Exception:
+            # Model exported with a fixed batch dimension of 1
+            self.batched_inference = False
+            self.inference_calls -= 1
+            outputs = []
+            for i in range(len(images)):
+                self.inference_calls += 1
+                outputs.append(session.inner_session.run(None, {input_name: inputs[i:i + 1]})[0][0])
+            outputs = np.stack(outputs)
+
+        masks = []
+        for image, output in zip(images, outputs):
+            pred = output[0]
+            ma, mi = np.max(pred), np.min(pred)
+            pred = (pred - mi) / (ma - mi)
+            mask = Image.fromarray((pred * 255).astype("uint8"), mode="L")
+            masks.append(mask.resize(image.size, Image.Resampling.LANCZOS))
+        return masks
+
+    def remove_background(self, images, alpha_matting=False,
+                          alpha_matting_foreground_threshold=240,
+                          alpha_matting_background_threshold=10,
+                          alpha_matting_erode_size=10):
+        """
+        Cut out the foreground of each image
+
+        Args:
+            images: List of PIL Images or RGB/RGBA uint8 ndarrays
+            alpha_matting: Refine edges with alpha matting (slower)
+
+        Returns:
+            List of RGBA PIL Images
+        """
+        images = [_to_pil(image) for image in images]
+        masks = self._predict(images)
+        return [
+            cutout(image, mask, alpha_matting, alpha_matting_foreground_threshold,
+                   alpha_matting_background_threshold, alpha_matting_erode_size)
+            for image, mask in zip(images, masks)
+        ]
+
+
+def cutout(image, mask, alpha_matting=False, foreground_threshold=240,
+           background_threshold=10, erode_size=10):
+    """Apply a mask to an image the same way rembg.remove does"""
+    if alpha_matting:
+        from rembg.bg import alpha_matting_cutout
+        try:
+            return alpha_matting_cutout(image, mask, foreground_threshold,
+                                        background_threshold, erode_size)
+        except ValueError:
+            pass
+    empty = Image.new("RGBA", image.size, 0)
+    return Image.composite(image.convert("RGBA"), empty, mask)
+
+
+def _to_pil(image):
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    # rembg.remove honours EXIF orientation, so do the same for loaded files
+    return ImageOps.exif_transpose(image)
+
+
+def _u2net_input(image, size=(320, 320), mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225)):
+    """rembg's U2-Net preprocessing for one image, shape (1, 3, 320, 320)"""
+    im = np.array(image.convert("RGB").resize(size, Image.Resampling.LANCZOS))
+    im = im / max(np.max(im), 1e-6)
+
+    tmp = np.zeros((im.shape[0], im.shape[1], 3))
+    tmp[:, :, 0] = (im[:, :, 0] - mean[0]) / std[0]
+    tmp[:, :, 1] = (im[:, :, 1] - mean[1]) / std[1]
+    tmp[:, :, 2] = (im[:, :, 2] - mean[2]) / std[2]
+
+    return np.expand_dims(tmp.transpose((2, 0, 1)), 0).astype(np.float32)
@@ -0,0 +1,198 @@
+"""
+Threshold + gradient background removal kernel
+Integer-only version of the dark/light colour test with edge preservation
+shared by the converters and the one-off asset scripts; takes single frames
+(H, W, C) or batches (N, H, W, C) and reuses its buffers between calls
+"""
+
+import math
+import threading
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+_local = threading.local()
+
+
+class BackgroundKernel:
+    """
+    Background masks for uint8 RGB(A) frames with buffers kept between calls
+
+    The gradient test matches the original float64 code pixel for pixel:
+        gray = (r + g + b) / 3
+        gradient = sqrt(dx(gray)^2 + dy(gray)^2) > tolerance
+    is evaluated as dx(s)^2 + dy(s)^2 > 9 * tolerance^2 on the int sum
+    s = r + g + b. Only pixels where the two sides are exactly equal (where
+    float rounding decides) are recomputed the original way.
+
+    Returned masks are views into the kernel's buffers and are overwritten
+    by the next call; copy them to keep them. Not thread-safe: use one
+    kernel per thread (default_kernel() does).
+    """
+
+    # name -> dtype of every per-pixel buffer
+    BUFFERS = {
+        '_sum': 'int16',      # r + g + b <= 765
+        '_dx': 'int32',       # squared differences <= 585225
+        '_dy': 'int32',
+        '_channel': 'uint8',
+        '_colour': 'bool',
+        '_test': 'bool',
+        '_flat': 'bool',
+    }
+
+    def __init__(self):
+        self._shape = None
+        self._capacity = 0
+        self._storage = {}
+        self._batch = None
+
+    def _buffers(self, shape):
+        """Views of `shape` over storage that only grows, so smaller regions allocate nothing"""
+        if shape == self._shape:
+            return
+        size = math.prod(shape)
+        if size > self._capacity:
+            self._storage = {name: np.empty(size, dtype=dtype) for name, dtype in self.BUFFERS.items()}
+            self._capacity = size
+        for name, storage in self._storage.items():
+            setattr(self, name, storage[:size].reshape(shape))
+        self._shape = shape
+
+    def colour_mask(self, data, dark_threshold=None, light_threshold=None):
+        """
+        Pixels whose R, G and B are all below dark_threshold or all above
+        light_threshold (either may be None)
+        """
+        self._buffers(data.shape[:-1])
+        colour, test, channel = self._colour, self._test, self._channel
+        colour.fill(False)
+        if dark_threshold is not None:
+            # All three below the threshold <=> their maximum is
+            np.maximum(data[..., 0], data[..., 1], out=channel)
+            np.maximum(channel, data[..., 2], out=channel)
+            np.less(channel, dark_threshold, out=test)
+            colour |= test
+        if light_threshold is not None:
+            np.minimum(data[..., 0], data[..., 1], out=channel)
+            np.minimum(channel, data[..., 2], out=channel)
+            np.greater(channel, light_threshold, out=test)
+            colour |= test
+        return colour
+
+    def flat_mask(self, data, tolerance):
+        """Pixels whose gray-level gradient is at most `tolerance` (not an edge)"""
+        self._buffers(data.shape[:-1])
+        total, dx, dy, flat = self._sum, self._dx, self._dy, self._flat
+        np.add(data[..., 0], data[..., 1], out=total, dtype=np.int16)
+        np.add(total, data[..., 2], out=total, dtype=np.int16)
+
+        # np.diff(..., prepend=first) -> the first column/row has no gradient
+        dx[..., 0] = 0
+        np.subtract(total[..., 1:], total[..., :-1], out=dx[..., 1:], dtype=np.int32)
+        np.multiply(dx, dx, out=dx)
+        dy[..., 0, :] = 0
+        np.subtract(total[..., 1:, :], total[..., :-1, :], out=dy[..., 1:, :], dtype=np.int32)
+        np.multiply(dy, dy, out=dy)
+        dx += dy
+
+        # Integer squared magnitudes: edge when > 9 t^2. `low..high` are the
+        # integers indistinguishable from 9 t^2 after float rounding
+        limit = 9.0 * tolerance * tolerance
+        margin = 1e-9 * max(1.0, limit)
+        low, high = math.ceil(limit - margin), math.floor(limit + margin)
+        np.less_equal(dx, high if high >= low else math.floor(limit), out=flat)
+        if high >= low:
+            self._resolve_ties(data, dx, low, high, tolerance, flat)
+        return flat
+
+    def _resolve_ties(self, data, squared, low, high, tolerance, flat):
+        """Recompute the original float64 test where it is exactly at the threshold"""
+        ties = np.nonzero((squared >= low) & (squared <= high))
+        if not ties[0].size:
+            return
+        *lead, ys, xs = ties
+        left = (*lead, ys, np.maximum(xs - 1, 0))
+        up = (*lead, np.maximum(ys - 1, 0), xs)
+
+        def gray(index):
+            return (data[..., 0][index].astype(float) + data[..., 1][index].astype(float)
+                    + data[..., 2][index].astype(float)) / 3
+
+        center = gray(ties)
+        gradient_x = np.abs(center - gray(left))
+        gradient_y = np.abs(center - gray(up))
+        flat[ties] = ~(np.sqrt(gradient_x**2 + gradient_y**2) > tolerance)
+
+    def removal_mask(self, data, dark_threshold=None, light_threshold=None, edge_tolerance=None):
+        """Background pixels: colour_mask, minus edges when edge_tolerance is set"""
+        if data.ndim == 4:
+            # Frame by frame: one frame's temporaries stay in cache, a batch's do not
+            if self._batch is None or self._batch.shape != data.shape[:-1]:
+                self._batch = np.empty(data.shape[:-1], dtype=bool)
+            for frame, out in zip(data, self._batch):
+                np.copyto(out, self.removal_mask(frame, dark_threshold, light_threshold, edge_tolerance))
+            return self._batch
+        colour = self.colour_mask(data, dark_threshold, light_threshold)
+        if edge_tolerance is not None:
+            colour &= self.flat_mask(data, edge_tolerance)
+        return colour
+
+    def update_region(self, source, target, rect, dark_threshold=None, light_threshold=None,
+                      edge_tolerance=None):
+        """
+        Redo remove_background for the pixels of `source` inside rect
+
+        `target` holds the result for an earlier frame that equals `source`
+        outside rect; afterwards it holds the result for `source`, exactly as
+        if the whole frame had been processed.
+
+        Args:
+            source: RGBA uint8 array (H, W, 4), not modified
+            target: RGBA uint8 array (H, W, 4) updated in place
+            rect: (x0, y0, x1, y1) of the changed pixels
+        """
+        height, width = source.shape[:2]
+        x0, y0, x1, y1 = rect
+        # A pixel's gradient depends on its left and upper neighbours, so the
+        # result also changes one pixel right of and below the rect, and the
+        # window needs one row/column of context above and to the left
+        x1, y1 = min(x1 + 1, width), min(y1 + 1, height)
+        context_x, context_y = min(x0, 1), min(y0, 1)
+        removal = self.removal_mask(source[y0 - context_y:y1, x0 - context_x:x1],
+                                    dark_threshold, light_threshold, edge_tolerance)
+        region = target[y0:y1, x0:x1]
+        np.copyto(region, source[y0:y1, x0:x1])
+        np.copyto(region[..., 3], 0, where=removal[context_y:, context_x:])
+
+    def remove_background(self, data, dark_threshold=None, light_threshold=None, edge_tolerance=None):
+        """
+        Make background pixels transparent in place
+
+        Args:
+            data: RGBA uint8 array, (H, W, 4) or a batch (N, H, W, 4)
+            dark_threshold: Remove pixels with R, G and B all below this
+            light_threshold: Remove pixels with R, G and B all above this
+            edge_tolerance: Keep pixels whose gray gradient exceeds this
+                            (anti-aliased edges of the content)
+
+        Returns:
+            The removal mask (a reused buffer)
+        """
+        removal = self.removal_mask(data, dark_threshold, light_threshold, edge_tolerance)
+        np.copyto(data[..., 3], 0, where=removal)
+        return removal
+
+
+def default_kernel():
+    """This thread's shared kernel, so repeated frames reuse the same buffers"""
+    kernel = getattr(_local, 'kernel', None)
+    if kernel is None:
+        kernel = _local.kernel = BackgroundKernel()
+    return kernel
+
+
+def remove_background(data, dark_threshold=None, light_threshold=None, edge_tolerance=None):
+    """BackgroundKernel.remove_background on this thread's default kernel"""
+    return default_kernel().remove_background(data, dark_threshold, light_threshold, edge_tolerance)
@@ -0,0 +1,284 @@
+"""
+On-disk conversion cache for the Lottie converters
+Two levels: finished output files keyed by input content plus every parameter,
+and processed RGBA frames keyed by frame content plus background/resize settings
+(plus the decoded-frame stores of frame_store, keyed by input content alone)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent / ".cache"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Decoded clips are raw RGB (a 10 s 1080p clip is ~1.9 GB), so they get their own limit
+DEFAULT_MAX_DECODED_BYTES = 8 * 1024 * 1024 * 1024
+LEVELS = ('output', 'frame', 'decoded')
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """blake2b hex digest of a file's contents"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_fingerprint(directory=None):
+    """
+    Digest of the converter sources
+
+    Part of every key, so editing any script invalidates old entries
+    instead of serving results the new code would not produce.
+    """
+    directory = Path(directory or Path(__file__).resolve().parent)
+    digest = hashlib.blake2b(digest_size=20)
+    for path in sorted(directory.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def open_cache(cache):
+    """
+    Normalize the converters' cache argument
+
+    Args:
+        cache: None/False (off), True (default location), a directory path,
+               or a ConversionCache to share between conversions
+
+    Returns:
+        ConversionCache or None
+    """
+    if cache is None or cache is False:
+        return None
+    if isinstance(cache, ConversionCache):
+        return cache
+    if cache is True:
+        return ConversionCache()
+    return ConversionCache(cache)
+
+
+class ConversionCache:
+    """
+    Content-addressed cache for whole conversions and processed frames
+
+    An output hit copies the previous result and skips the conversion.
+    On a miss, the frame level still saves background removal and resizing
+    for every frame that was seen before with the same settings. Changing
+    only encoder settings (quality, container, delta, size budget) then
+    re-runs just the encode.
+
+    Entries are plain files under root/<level>/. When the output and frame
+    levels grow past max_bytes, or the decoded frame stores past
+    max_decoded_bytes, the least recently used entries are deleted; a hit
+    refreshes an entry's mtime. Stores written or read since this cache was
+    opened are never evicted by it, so a run keeps the store it just decoded.
+
+    Usage:
+        cache = ConversionCache(max_bytes=512 * 1024 * 1024)
+        convert_mp4_to_lottie("a.mp4", "a.json", cache=cache)
+        cache.print_report()
+    """
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES,
+                 max_decoded_bytes=DEFAULT_MAX_DECODED_BYTES):
+        self.root = Path(root or DEFAULT_ROOT)
+        self.max_bytes = max_bytes
+        self.max_decoded_bytes = max_decoded_bytes
+        # A little early, for file systems with coarse timestamps
+        self.opened_at = time.time() - 2
+        self.fingerprint = code_fingerprint()
+        self.hits = {level: 0 for level in LEVELS}
+        self.misses = {level: 0 for level in LEVELS}
+        self.evicted = 0
+
+    def output_key(self, input_path, params):
+        """Key of a finished conversion: input bytes + all parameters"""
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return self._key('output', file_digest(input_path), payload)
+
+    def frame_key(self, pixels, params):
+        """
+        Key of one processed frame
+
+        Args:
+            pixels: Source frame as an ndarray, before any processing
+            params: Tuple of everything processing depends on
+                    (background method, max size, ...)
+        """
+        pixels = np.ascontiguousarray(pixels)
+        return self._key('frame', str(pixels.shape), str(pixels.dtype), repr(params),
+                         pixels.data)
+
+    def decoded_path(self, input_path):
+        """
+        Path of the frame_store file for a video
+
+        Keyed by the video's bytes only: decoding does not depend on the
+        converter code, so editing a script keeps the stores valid.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(b'decoded\0')
+        digest.update(file_digest(input_path).encode())
+        return self._path('decoded', digest.hexdigest())
+
+    def get_output(self, key, output_path):
+        """Copy a cached output to output_path; returns True on a hit"""
+        path = self._path('output', key)
+        if not path.exists():
+            self.misses['output'] += 1
+            return False
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, output_path)
+        os.utime(path)
+        self.hits['output'] += 1
+        return True
+
+    def put_output(self, key, output_path):
+        def copy(f):
+            with open(output_path, 'rb') as source:
+                shutil.copyfileobj(source, f)
+        self._store('output', key, copy)
+
+    def get_frame(self, key):
+        """
+        Cached processed frame, or None
+
+        Hits and misses are counted here; frames looked up in worker
+        processes are counted with count() in the parent instead.
+        """
+        frame = self.load_frame(key)
+        self.count('frame', frame is not None)
+        return frame
+
+    def load_frame(self, key):
+        path = self._path('frame', key)
+        try:
+            pixels = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        return Image.fromarray(pixels)
+
+    def put_frame(self, key, frame):
+        pixels = np.asarray(frame)
+        self._store('frame', key, lambda f: np.save(f, pixels, allow_pickle=False))
+
+    def count(self, level, hit):
+        if hit:
+            self.hits[level] += 1
+        else:
+            self.misses[level] += 1
+
+    def entries(self, levels=LEVELS):
+        """(mtime, size, path) of every entry of the given levels, oldest first"""
+        found = []
+        for level in levels:
+            directory = self.root / level
+            if not directory.is_dir():
+                continue
+            for path in directory.glob("*/*"):
+                if path.suffix == '.tmp':
+                    continue
+                stat = path.stat()
+                found.append((stat.st_mtime, stat.st_size, path))
+        found.sort()
+        return found
+
+    def evict(self):
+        """
+        Delete least recently used entries until the output and frame levels
+        fit max_bytes and the decoded level fits max_decoded_bytes
+
+        Returns:
+            Bytes left in the cache
+        """
+        total = self._evict(self.entries(('output', 'frame')), self.max_bytes)
+        stores = self.entries(('decoded',))
+        # Stores used by this run were touched after the cache was opened
+        older = [entry for entry in stores if entry[0] < self.opened_at]
+        in_use = sum(size for mtime, size, _ in stores if mtime >= self.opened_at)
+        return total + in_use + self._evict(older, max(0, self.max_decoded_bytes - in_use))
+
+    def _evict(self, entries, max_bytes):
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evicted += 1
+        return total
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def print_report(self):
+        parts = []
+        for level in LEVELS:
+            lookups = self.hits[level] + self.misses[level]
+            if lookups:
+                parts.append(f"{level} {self.hits[level]}/{lookups} hits "
+                             f"({self.hits[level] / lookups:.0%})")
+        if not parts:
+            return
+        message = "Cache: " + ", ".join(parts)
+        if self.evicted:
+            message += f", {self.evicted} old entries evicted"
+        print(message)
+
+    def _key(self, level, *parts):
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(self.fingerprint.encode())
+        digest.update(level.encode())
+        for part in parts:
+            digest.update(b'\0')
+            digest.update(part.encode() if isinstance(part, str) else part)
+        return digest.hexdigest()
+
+    def _path(self, level, key):
+        suffix = {'frame': '.npy', 'decoded': '.frames'}.get(level, '.bin')
+        return self.root / level / key[:2] / (key + suffix)
+
+    def _store(self, level, key, write):
+        # Write to a temporary name first so concurrent workers and
+        # interrupted runs never leave a half-written entry behind
+        path = self._path(level, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, 'wb') as f:
+                write(f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️ Could not write cache entry {path.name}: {e}")
+            if tmp.exists():
+                tmp.unlink()
+
+
+if __name__ == "__main__":
+    cache = ConversionCache(sys.argv[2] if len(sys.argv) > 2 else None)
+    if len(sys.argv) > 1 and sys.argv[1] == "clear":
+        cache.clear()
+        print(f"Cleared {cache.root}")
+    else:
+        entries = cache.entries()
+        for level in LEVELS:
+            sizes = [size for _, size, path in entries if path.parent.parent.name == level]
+            print(f"{level:<8}{len(sizes):>7} entries{sum(sizes) / 1024 / 1024:>10.1f} MB")
+        print(f"Location: {cache.root}")
+        print("Usage: python conversion_cache.py [stats|clear] [cache_dir]")
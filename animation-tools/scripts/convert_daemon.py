@@ -0,0 +1,451 @@
+"""
+Warm conversion daemon and its client
+Keeps OpenCV, numpy, Pillow and the rembg session loaded in one long-lived
+process and runs MP4/GIF/image conversions sent over a local socket,
+streaming each job's progress back to the client
+
+Usage:
+    python convert_daemon.py serve [--jobs 2] [--preload-model u2net]
+    python convert_daemon.py convert input/dance.mp4 output/dance.json -p max_size=256 -p bg_method=ai
+    python convert_daemon.py status
+    python convert_daemon.py stop
+"""
+
+import argparse
+import inspect
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+CONVERTERS = {'.mp4': 'mp4', '.gif': 'gif', '.png': 'image', '.jpg': 'image',
+              '.jpeg': 'image', '.webp': 'image'}
+
+# The profiler is process-global, so concurrent jobs cannot each have one
+UNSUPPORTED_OPTIONS = ('profile',)
+
+
+class _ThreadStdout:
+    """
+    sys.stdout replacement that sends each job thread's prints to that job
+
+    contextlib.redirect_stdout swaps the stream for the whole process, which
+    would mix the output of concurrent jobs; this routes by thread instead.
+    Threads without a sink (the server itself) write to the real stdout.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def set_sink(self, sink):
+        self._local.sink = sink
+
+    def write(self, text):
+        sink = getattr(self._local, 'sink', None)
+        if sink is None:
+            return self.stream.write(text)
+        sink(text)
+        return len(text)
+
+    def flush(self):
+        if getattr(self._local, 'sink', None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class _LineSender:
+    """Buffers printed text and sends it to the client one line at a time"""
+
+    def __init__(self, send):
+        self.send = send
+        self.buffer = ''
+
+    def __call__(self, text):
+        self.buffer += text
+        while '\n' in self.buffer:
+            line, self.buffer = self.buffer.split('\n', 1)
+            self.send({'event': 'log', 'line': line})
+
+    def close(self):
+        if self.buffer:
+            self.send({'event': 'log', 'line': self.buffer})
+            self.buffer = ''
+
+
+def warm_up(model_name=None):
+    """
+    Load everything a conversion needs so the first job starts immediately
+
+    Args:
+        model_name: rembg model to load (None = skip; also skipped when rembg
+                    is not installed)
+
+    Returns:
+        Seconds spent
+    """
+    start = time.perf_counter()
+    import cv2  # noqa: F401 (codecs load on import)
+    import bg_engine
+    import gif_to_lottie  # noqa: F401
+    import mp4_to_lottie
+    from PIL import Image
+
+    mp4_to_lottie.np.zeros(1)
+    Image.init()
+    if model_name and bg_engine.is_available():
+        # Same key as convert_mp4_to_lottie's defaults, so bg_method='ai' jobs reuse it
+        bg_engine.get_engine(model_name).session
+        print(f"✓ rembg model loaded: {model_name}")
+    return time.perf_counter() - start
+
+
+def convert_image(image_path, output_path=None, remove_bg=True, bg_method='simple', max_size=512):
+    """
+    Remove the background of a still image and save it as a PNG
+
+    Args:
+        image_path: Path to a PNG/JPEG/WebP image
+        output_path: Output PNG (default: <name>_nobg.png next to the input)
+        remove_bg: Whether to remove background
+        bg_method: 'simple', 'ai' or 'none'
+        max_size: Maximum dimension
+
+    Returns:
+        Path to the created PNG
+    """
+    import bg_engine
+    import mp4_to_lottie
+    from PIL import Image
+
+    if output_path is None:
+        output_path = str(Path(image_path).parent / f"{Path(image_path).stem}_nobg.png")
+
+    print(f"Input: {image_path}")
+    print(f"Output: {output_path}")
+    image = Image.open(image_path).convert('RGBA')
+    if remove_bg and bg_method == 'ai' and bg_engine.is_available():
+        image = bg_engine.get_engine().remove_background([image])[0]
+    elif remove_bg and bg_method != 'none':
+        image = mp4_to_lottie.remove_background_simple(image)
+    image = mp4_to_lottie.optimize_frame(image, max_size)
+    image.save(output_path, 'PNG')
+    print(f"✅ Saved {image.size[0]}x{image.size[1]} PNG")
+    return output_path
+
+
+def _converter(kind):
+    if kind == 'mp4':
+        from mp4_to_lottie import convert_mp4_to_lottie
+        return convert_mp4_to_lottie
+    if kind == 'gif':
+        from gif_to_lottie import convert_gif_to_lottie
+        return convert_gif_to_lottie
+    return convert_image
+
+
+def split_options(kind, options):
+    """
+    Keyword arguments the converter for `kind` accepts, and the rest
+
+    Jobs use convert_mp4_to_lottie's parameters; GIF and image jobs take the
+    subset that applies to them (bg_method='none' still turns removal off).
+
+    Raises:
+        ValueError: for options no converter knows, or that the daemon cannot run
+    """
+    from mp4_to_lottie import convert_mp4_to_lottie
+
+    known = set(inspect.signature(convert_mp4_to_lottie).parameters) - {'mp4_path', 'output_path'}
+    unknown = sorted(set(options) - known)
+    if unknown:
+        raise ValueError(f"Unknown option(s): {', '.join(unknown)}")
+    unsupported = sorted(set(options) & set(UNSUPPORTED_OPTIONS))
+    if unsupported:
+        raise ValueError(f"Not supported by the daemon (run the converter directly): {', '.join(unsupported)}")
+
+    options = dict(options)
+    if kind == 'gif' and options.get('bg_method') == 'none':
+        options['remove_bg'] = False
+    accepted = set(inspect.signature(_converter(kind)).parameters)
+    return ({key: value for key, value in options.items() if key in accepted},
+            sorted(key for key in options if key not in accepted))
+
+
+class ConversionDaemon(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """
+    Threaded server running up to `jobs` conversions at once
+
+    Every connection carries one JSON request line and receives JSON event
+    lines back: queued/started/log events, then done or error. Stopping
+    waits for running jobs to finish (job threads are joined on close).
+    """
+
+    daemon_threads = False
+    block_on_close = True
+    allow_reuse_address = True
+
+    def __init__(self, address, jobs=2):
+        super().__init__(address, _RequestHandler)
+        self.jobs = jobs
+        self.slots = threading.BoundedSemaphore(jobs)
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.stats = {'done': 0, 'failed': 0, 'running': 0, 'queued': 0}
+
+    def count(self, key, delta=1):
+        with self.lock:
+            self.stats[key] += delta
+
+    def status(self):
+        import bg_engine
+        with self.lock:
+            stats = dict(self.stats)
+        return dict(stats, pid=os.getpid(), jobs=self.jobs,
+                    uptime=round(time.time() - self.started, 1),
+                    models=sorted({key[0] for key in bg_engine._engines}))
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class UnixConversionDaemon(ConversionDaemon):
+        """ConversionDaemon on a Unix domain socket"""
+
+        address_family = socket.AF_UNIX
+
+        def server_bind(self):
+            if os.path.exists(self.server_address):
+                os.unlink(self.server_address)
+            socketserver.TCPServer.server_bind(self)
+
+        def server_close(self):
+            super().server_close()
+            if os.path.exists(self.server_address):
+                os.unlink(self.server_address)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def send(self, message):
+        try:
+            self.wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+            self.wfile.flush()
+        except OSError:
+            pass  # client went away; the job still finishes
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode('utf-8'))
+        except ValueError:
+            self.send({'event': 'error', 'message': "Request must be one JSON line"})
+            return
+
+        command = request.get('command')
+        if command == 'status':
+            self.send(dict(self.server.status(), event='status'))
+        elif command == 'stop':
+            self.send({'event': 'stopping', 'running': self.server.status()['running']})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        elif command == 'convert':
+            self.convert(request)
+        else:
+            self.send({'event': 'error', 'message': f"Unknown command: {command}"})
+
+    def convert(self, request):
+        input_path = request.get('input')
+        kind = CONVERTERS.get(Path(input_path or '').suffix.lower())
+        if kind is None:
+            self.send({'event': 'error', 'message': f"Unsupported input: {input_path}"})
+            return
+        if not os.path.exists(input_path):
+            self.send({'event': 'error', 'message': f"Input not found: {input_path}"})
+            return
+        try:
+            options, ignored = split_options(kind, request.get('options', {}))
+        except ValueError as e:
+            self.send({'event': 'error', 'message': str(e)})
+            return
+
+        server = self.server
+        if not server.slots.acquire(blocking=False):
+            server.count('queued')
+            self.send({'event': 'queued'})
+            server.slots.acquire()
+            server.count('queued', -1)
+        server.count('running')
+        try:
+            self.send({'event': 'started', 'kind': kind, 'ignored': ignored})
+            self.run_job(kind, input_path, request.get('output'), options)
+        finally:
+            server.count('running', -1)
+            server.slots.release()
+
+    def run_job(self, kind, input_path, output_path, options):
+        lines = _LineSender(self.send)
+        sys.stdout.set_sink(lines)
+        start = time.perf_counter()
+        try:
+            if output_path:
+                Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            result = _converter(kind)(input_path, output_path, **options)
+        except Exception:
+            lines.close()
+            self.server.count('failed')
+            self.send({'event': 'error', 'message': traceback.format_exc()})
+            return
+        finally:
+            sys.stdout.set_sink(None)
+        lines.close()
+        if result is None:
+            self.server.count('failed')
+            self.send({'event': 'error', 'message': "No frames extracted"})
+            return
+        self.server.count('done')
+        self.send({'event': 'done', 'output': str(result),
+                   'seconds': round(time.perf_counter() - start, 3)})
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, jobs=2, model_name='u2net'):
+    """Warm up, then serve conversion requests until a stop command or Ctrl+C"""
+    if socket_path:
+        server = UnixConversionDaemon(socket_path, jobs)
+        where = socket_path
+    else:
+        server = ConversionDaemon((host, port), jobs)
+        where = f"{host}:{port}"
+
+    print("=" * 60)
+    print("LOTTIE CONVERSION DAEMON")
+    print("=" * 60)
+    print(f"Warm-up took {warm_up(model_name):.2f}s")
+    sys.stdout = _ThreadStdout(sys.stdout)
+    print(f"Listening on {where} ({jobs} concurrent job(s), pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.stdout = sys.stdout.stream
+    print("Daemon stopped")
+
+
+def request(message, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, timeout=None):
+    """
+    Send one request to the daemon
+
+    Returns:
+        Iterator over the daemon's reply events
+
+    Raises:
+        ConnectionError: if no daemon is listening
+    """
+    if socket_path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = socket_path
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address = (host, port)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        sock.close()
+        raise ConnectionError(f"No conversion daemon at {address}") from e
+    return _events(sock, message)
+
+
+def _events(sock, message):
+    with sock, sock.makefile('rwb') as stream:
+        stream.write((json.dumps(message) + '\n').encode('utf-8'))
+        stream.flush()
+        for line in stream:
+            yield json.loads(line.decode('utf-8'))
+
+
+def _parse_param(text):
+    """KEY=VALUE with VALUE parsed as JSON when possible (256, true, null, "ai")"""
+    key, sep, value = text.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected KEY=VALUE, got {text}")
+    try:
+        return key.replace('-', '_'), json.loads(value)
+    except ValueError:
+        return key.replace('-', '_'), value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm Lottie conversion daemon and client")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--socket', default=None, help="Unix socket path instead of host/port")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="Start the daemon")
+    serve_parser.add_argument('--jobs', type=int, default=2, help="Concurrent conversions")
+    serve_parser.add_argument('--preload-model', default='u2net',
+                              help="rembg model to load at startup ('none' to skip)")
+
+    convert_parser = commands.add_parser('convert', help="Convert a file on the running daemon")
+    convert_parser.add_argument('input')
+    convert_parser.add_argument('output', nargs='?', default=None)
+    convert_parser.add_argument('-p', '--param', type=_parse_param, action='append', default=[],
+                                metavar='KEY=VALUE',
+                                help="convert_mp4_to_lottie parameter, e.g. -p max_size=256 -p bg_method=ai")
+    convert_parser.add_argument('--quiet', action='store_true', help="Only print the result")
+
+    commands.add_parser('status', help="Show the daemon's job counters")
+    commands.add_parser('stop', help="Stop the daemon")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        model_name = None if args.preload_model == 'none' else args.preload_model
+        serve(args.host, args.port, args.socket, args.jobs, model_name)
+        return 0
+
+    if args.command == 'convert':
+        message = {'command': 'convert', 'input': os.path.abspath(args.input),
+                   'output': os.path.abspath(args.output) if args.output else None,
+                   'options': dict(args.param)}
+    else:
+        message = {'command': args.command}
+
+    try:
+        events = request(message, args.host, args.port, args.socket)
+    except ConnectionError as e:
+        print(f"❌ {e}")
+        print("   Start it with: python convert_daemon.py serve")
+        return 2
+
+    for event in events:
+        kind = event['event']
+        if kind == 'log' and not args.quiet:
+            print(event['line'])
+        elif kind == 'queued' and not args.quiet:
+            print("⏳ Queued: all job slots are busy")
+        elif kind == 'started' and event['ignored']:
+            print(f"ℹ️ Ignored for {event['kind']} input: {', '.join(event['ignored'])}")
+        elif kind == 'done':
+            print(f"✅ {event['output']} ({event['seconds']:.2f}s)")
+        elif kind == 'status':
+            print(f"Daemon pid {event['pid']}, up {event['uptime']:.0f}s: "
+                  f"{event['running']} running, {event['queued']} queued, "
+                  f"{event['done']} done, {event['failed']} failed "
+                  f"(max {event['jobs']} at once; models: {', '.join(event['models']) or 'none'})")
+        elif kind == 'stopping':
+            print(f"Daemon stopping after {event['running']} running job(s) finish")
+        elif kind == 'error':
+            print(f"❌ {event['message']}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
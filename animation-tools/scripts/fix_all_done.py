@@ -5,6 +5,8 @@ from pathlib import Path
 from PIL import Image
 import numpy as np
 
+from bg_kernel import BackgroundKernel
+
 def remove_black_background(input_path, output_path):
     """
     Remove black background while preserving ALL character details
@@ -16,32 +18,22 @@ def remove_black_background(input_path, output_path):
     img = Image.open(input_path).convert('RGBA')
     data = np.array(img)
     
-    r, g, b, a = data[:,:,0], data[:,:,1], data[:,:,2], data[:,:,3]
-    
     # Detect pure black or very dark pixels (likely background)
     # Be conservative - only remove very dark pixels
     dark_threshold = 15  # Only very dark pixels
+    kernel = BackgroundKernel()
     
-    # Create mask for dark pixels
-    dark_mask = (r < dark_threshold) & (g < dark_threshold) & (b < dark_threshold)
-    
-    # Calculate edge detection to preserve anti-aliasing
-    gray = (r.astype(float) + g.astype(float) + b.astype(float)) / 3
-    gradient_x = np.abs(np.diff(gray, axis=1, prepend=gray[:,0:1]))
-    gradient_y = np.abs(np.diff(gray, axis=0, prepend=gray[0:1,:]))
-    gradient = np.sqrt(gradient_x**2 + gradient_y**2)
-    
-    # Don't remove pixels near edges (preserve anti-aliasing)
-    edge_mask = gradient > 5
+    # Edge detection to preserve anti-aliasing (gradient > 5)
+    edge_mask = ~kernel.flat_mask(data, 5)
     
     # Only remove dark pixels that are NOT near edges
-    removal_mask = dark_mask & ~edge_mask
+    removal_mask = kernel.colour_mask(data, dark_threshold=dark_threshold) & ~edge_mask
     
     # Set alpha to 0 for background pixels
     data[removal_mask, 3] = 0
     
     # Also reduce alpha slightly for semi-dark edge pixels (smooth transition)
-    semi_dark_mask = (r < dark_threshold * 2) & (g < dark_threshold * 2) & (b < dark_threshold * 2) & edge_mask
+    semi_dark_mask = kernel.colour_mask(data, dark_threshold=dark_threshold * 2) & edge_mask
     data[semi_dark_mask, 3] = (data[semi_dark_mask, 3] * 0.3).astype(np.uint8)
     
     # Save result
@@ -5,6 +5,8 @@ from pathlib import Path
 from PIL import Image
 import numpy as np
 
+from bg_kernel import BackgroundKernel
+
 def remove_background_smart(input_path, output_path):
     """
     Remove light background while preserving ALL character details
@@ -16,33 +18,23 @@ def remove_background_smart(input_path, output_path):
     img = Image.open(input_path).convert('RGBA')
     data = np.array(img)
     
-    r, g, b, a = data[:,:,0], data[:,:,1], data[:,:,2], data[:,:,3]
-    
     # Detect very light pixels (likely background)
     # Champion image has light/white background
     light_threshold = 240  # Only very light pixels
+    kernel = BackgroundKernel()
     
-    # Create mask for light pixels (background)
-    light_mask = (r > light_threshold) & (g > light_threshold) & (b > light_threshold)
-    
-    # Calculate edge detection to preserve anti-aliasing
-    gray = (r.astype(float) + g.astype(float) + b.astype(float)) / 3
-    gradient_x = np.abs(np.diff(gray, axis=1, prepend=gray[:,0:1]))
-    gradient_y = np.abs(np.diff(gray, axis=0, prepend=gray[0:1,:]))
-    gradient = np.sqrt(gradient_x**2 + gradient_y**2)
-    
-    # Don't remove pixels near edges (preserve anti-aliasing)
-    edge_mask = gradient > 5
+    # Edge detection to preserve anti-aliasing (gradient > 5)
+    edge_mask = ~kernel.flat_mask(data, 5)
     
     # Only remove light pixels that are NOT near edges
-    removal_mask = light_mask & ~edge_mask
+    removal_mask = kernel.colour_mask(data, light_threshold=light_threshold) & ~edge_mask
     
     # Set alpha to 0 for background pixels
     data[removal_mask, 3] = 0
     
     # Also reduce alpha slightly for semi-light edge pixels (smooth transition)
     semi_light_threshold = 220
-    semi_light_mask = (r > semi_light_threshold) & (g > semi_light_threshold) & (b > semi_light_threshold) & edge_mask
+    semi_light_mask = kernel.colour_mask(data, light_threshold=semi_light_threshold) & edge_mask
     data[semi_light_mask, 3] = (data[semi_light_mask, 3] * 0.5).astype(np.uint8)
     
     # Save result
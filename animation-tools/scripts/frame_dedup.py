@@ -0,0 +1,183 @@
+"""
+Duplicate detection and content-addressed asset deduplication
+DuplicateDetector spots near-duplicate source frames from tiny luma thumbnails;
+AssetDeduplicator hashes processed frames (exact + perceptual) so repeated
+frames reuse an existing asset instead of being encoded and embedded again
+"""
+
+import hashlib
+from collections import deque
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+THUMBNAIL_SIZE = 32
+LUMA_THUMBNAIL_SIZE = 64
+
+# Luma thumbnails average away pixel noise and pure colour changes, so the same
+# two frames score about 0.76x what mp4_to_lottie.calculate_frame_difference
+# (full-resolution RGB) gives them (least-squares fit over atrajit-dancing.mp4 frame pairs).
+# Thresholds are given on that function's scale and converted with this factor.
+LUMA_DIFFERENCE_SCALE = 0.76
+
+
+def luma_thumbnail(frame, size=LUMA_THUMBNAIL_SIZE):
+    """
+    Downsampled 8-bit luma of a frame for duplicate checks
+
+    Box-reduces by an integer factor so the longest side is about `size`;
+    both steps run in Pillow's C code on uint8 data.
+
+    Args:
+        frame: PIL Image or RGB uint8 ndarray
+
+    Returns:
+        uint8 ndarray (h, w)
+    """
+    if isinstance(frame, np.ndarray):
+        frame = Image.fromarray(frame)
+    factor = max(1, max(frame.size) // size)
+    gray = frame.convert('L')
+    if factor > 1:
+        gray = gray.reduce(factor)
+    return np.asarray(gray)
+
+
+class DuplicateDetector:
+    """
+    Near-duplicate detection against a window of recently kept frames
+
+    Each frame is reduced once to a luma thumbnail (see luma_thumbnail) and
+    compared by mean absolute difference (0-1) with the thumbnails of the last
+    `window` kept frames, newest first. Replaces the full-resolution float64
+    comparison of calculate_frame_difference; `threshold` keeps that
+    function's scale (see LUMA_DIFFERENCE_SCALE), so existing
+    duplicate_threshold values drop about the same frames.
+
+    Usage:
+        detector = DuplicateDetector(0.02, window=4)
+        thumb = luma_thumbnail(rgb)
+        entry = detector.match(thumb)
+        if entry is None:
+            detector.add(thumb, processed_frame)
+    """
+
+    def __init__(self, threshold, window=1):
+        self.threshold = threshold
+        self.luma_threshold = threshold * LUMA_DIFFERENCE_SCALE
+        self.recent = deque(maxlen=max(1, window))
+
+    def difference(self, thumb_a, thumb_b):
+        """Mean absolute luma difference between two thumbnails (0-1)"""
+        if thumb_a.shape != thumb_b.shape:
+            return 1.0
+        return np.abs(thumb_a.astype(np.int16) - thumb_b).mean() / 255.0
+
+    def match(self, thumb):
+        """
+        Find a recent kept frame this thumbnail duplicates
+
+        Returns:
+            The matching entry (thumb, payload), or None
+        """
+        for entry in reversed(self.recent):
+            if self.difference(thumb, entry[0]) < self.luma_threshold:
+                return entry
+        return None
+
+    def is_latest(self, entry):
+        return bool(self.recent) and self.recent[-1] is entry
+
+    def add(self, thumb, payload=None):
+        """Remember a kept frame (payload is returned with matches)"""
+        self.recent.append((thumb, payload))
+
+    def touch(self, entry):
+        """Make a matched older entry the most recent one again"""
+        for i, item in enumerate(self.recent):
+            if item is entry:
+                del self.recent[i]
+                break
+        self.recent.append(entry)
+
+
+def exact_hash(frame):
+    """Digest of the frame's mode, size and pixel bytes"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{frame.mode}:{frame.size[0]}x{frame.size[1]}".encode())
+    digest.update(frame.tobytes())
+    return digest.hexdigest()
+
+
+def thumbnail(frame, size=THUMBNAIL_SIZE):
+    """
+    Small premultiplied-alpha RGBA thumbnail as a uint8 array
+
+    Premultiplying makes fully transparent pixels compare equal whatever
+    colour they carry, which matters after background removal.
+    """
+    small = frame.convert('RGBA').convert('RGBa').resize((size, size), Image.Resampling.BOX)
+    return np.asarray(small, dtype=np.uint8)
+
+
+def difference_hash(thumb):
+    """64-bit dHash of a thumbnail's luma (9x8 horizontal gradient signs)"""
+    rgb = thumb[:, :, :3].astype(np.uint16)
+    luma = ((rgb[:, :, 0] * 77 + rgb[:, :, 1] * 150 + rgb[:, :, 2] * 29) >> 8).astype(np.uint8)
+    small = np.asarray(Image.fromarray(luma).resize((9, 8), Image.Resampling.BOX), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+class AssetDeduplicator:
+    """
+    Map processed frames to asset ids by content
+
+    Exact repeats are found by hash. With perceptual=True, frames whose
+    dHash matches an earlier asset are also reused when their thumbnails
+    differ by less than perceptual_threshold (mean abs diff, 0-1).
+    """
+
+    def __init__(self, perceptual=True, perceptual_threshold=0.004):
+        self.perceptual = perceptual
+        self.perceptual_threshold = perceptual_threshold
+        self.by_exact = {}
+        self.by_dhash = {}
+        self.exact_hits = 0
+        self.perceptual_hits = 0
+
+    def lookup(self, frame):
+        """
+        Find an existing asset for this frame
+
+        Returns:
+            (asset_id or None, key) where key must be passed to remember()
+            if the frame becomes a new asset
+        """
+        exact = exact_hash(frame)
+        if exact in self.by_exact:
+            self.exact_hits += 1
+            return self.by_exact[exact], (exact, None, None)
+
+        if not self.perceptual:
+            return None, (exact, None, None)
+
+        thumb = thumbnail(frame)
+        dhash = difference_hash(thumb)
+        for asset_id, other in self.by_dhash.get((frame.size, dhash), ()):
+            diff = np.abs(thumb.astype(np.int16) - other.astype(np.int16)).mean() / 255.0
+            if diff < self.perceptual_threshold:
+                self.perceptual_hits += 1
+                self.by_exact[exact] = asset_id
+                return asset_id, (exact, None, None)
+
+        return None, (exact, dhash, thumb)
+
+    def remember(self, key, asset_id, size):
+        """Register a newly created asset under its hashes"""
+        exact, dhash, thumb = key
+        self.by_exact[exact] = asset_id
+        if dhash is not None:
+            self.by_dhash.setdefault((size, dhash), []).append((asset_id, thumb))
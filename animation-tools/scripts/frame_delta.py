@@ -0,0 +1,165 @@
+"""
+Delta encoding for image-sequence animations
+Keeps full keyframes only at scene changes or fixed intervals; frames in
+between become a small patch covering just the region that changed
+"""
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+# JSON a cut-out patch adds on top of its image: one keyframe of the
+# keyframe layer's subtract mask (lottie_writer.subtract_mask)
+CUT_MASK_BYTES = 140
+
+
+def changed_pixels(key, frame, tolerance):
+    """
+    Boolean map of pixels that differ between two RGBA arrays
+
+    A pixel counts as changed when any channel differs by more than
+    `tolerance`; pixels that are fully transparent in both are equal
+    whatever colour they carry.
+    """
+    diff = np.abs(key.astype(np.int16) - frame.astype(np.int16)).max(axis=2)
+    both_clear = (key[:, :, 3] == 0) & (frame[:, :, 3] == 0)
+    return (diff > tolerance) & ~both_clear
+
+
+def bounding_box(mask):
+    """(x, y, width, height) of the True pixels of a 2-D mask, or None if there are none"""
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not rows.size:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1)
+
+
+class DeltaEncoder:
+    """
+    Decide per frame between a full keyframe and a changed-region patch
+
+    Frames are compared with the current keyframe (not the previous frame),
+    so a patch plus its keyframe always reproduces the frame on its own.
+    A new keyframe starts on the first frame, after keyframe_interval
+    frames, on a size change, or when the patch would cover more than
+    max_changed_area of the canvas (scene change / large motion). Given the
+    writer's encode function, a patch that does not encode to at most
+    max_patch_ratio of the full frame is stored as a keyframe instead: after
+    background removal the changed region is often most of the subject, and
+    a patch that saves only a few percent is not worth keeping the frame
+    out of asset deduplication.
+
+    Patches come in two forms:
+      - overlay (cut=False): only the changed pixels are kept, the rest is
+        transparent, so the keyframe shows through. Exact when every changed
+        pixel is fully opaque.
+      - cut-out (cut=True): the whole box, drawn into a hole the writer
+        masks out of the keyframe. Needed when the frame is (partly)
+        transparent where the keyframe was not, e.g. after background removal.
+
+    Usage:
+        delta = DeltaEncoder(keyframe_interval=30)
+        kind, image, rect, cut = delta.plan(frame, encode=frame_to_base64)
+    """
+
+    def __init__(self, keyframe_interval=30, max_changed_area=0.35, tolerance=6,
+                 max_patch_ratio=0.9):
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.max_changed_area = max_changed_area
+        self.max_patch_ratio = max_patch_ratio
+        self.tolerance = tolerance
+        self.keyframes = 0
+        self.patches = 0
+        self.holds = 0
+        self.rejected = 0
+        self.patch_area = 0
+        self.canvas_area = 0
+        self._key = None
+        self._since_key = 0
+        self._last_patch = None  # (rect, cut, pixels) of the previous frame's patch
+
+    def plan(self, frame, encode=None):
+        """
+        Classify the next frame of the animation
+
+        Args:
+            frame: PIL Image (frames must be passed in order)
+            encode: Optional function turning a PIL Image into its stored
+                    bytes/data URI; new patches are then only kept when they
+                    encode to at most max_patch_ratio of the full frame
+
+        Returns:
+            (kind, image, rect, cut) where kind is
+              'key'    - image is the full frame
+              'patch'  - image is the patch, rect its (x, y, w, h) on the canvas
+              'repeat' - same patch as the previous frame
+              'hold'   - frame matches the keyframe, nothing to draw over it
+        """
+        rgba = np.asarray(frame.convert('RGBA'))
+        if (self._key is None or rgba.shape != self._key.shape
+                or self._since_key >= self.keyframe_interval):
+            return self._keyframe(frame, rgba)
+
+        changed = changed_pixels(self._key, rgba, self.tolerance)
+        rect = bounding_box(changed)
+        if rect is None:
+            self._since_key += 1
+            self._last_patch = None
+            self.holds += 1
+            return 'hold', None, None, False
+
+        x, y, width, height = rect
+        crop = rgba[y:y + height, x:x + width]
+        region = changed[y:y + height, x:x + width]
+        cut = bool((crop[:, :, 3][region] < 255).any())
+
+        # A cut-out patch carries its whole box, an overlay only the changed pixels
+        cost = width * height if cut else np.count_nonzero(region)
+        if cost > self.max_changed_area * changed.size:
+            return self._keyframe(frame, rgba)
+
+        self._since_key += 1
+        if not cut:
+            crop = crop.copy()
+            crop[~region] = 0
+
+        last = self._last_patch
+        if last is not None and last[0] == rect and last[1] == cut and np.array_equal(last[2], crop):
+            return 'repeat', None, rect, cut
+
+        patch = Image.fromarray(crop, 'RGBA')
+        if encode is not None and not self._patch_wins(patch, frame, cut, encode):
+            self.rejected += 1
+            return self._keyframe(frame, rgba)
+
+        self._last_patch = (rect, cut, crop)
+        self.patches += 1
+        self.patch_area += width * height
+        return 'patch', patch, rect, cut
+
+    def _patch_wins(self, patch, frame, cut, encode):
+        patch_bytes = len(encode(patch)) + (CUT_MASK_BYTES if cut else 0)
+        return patch_bytes <= self.max_patch_ratio * len(encode(frame))
+
+    def keyframe(self, frame):
+        """Make frame the keyframe without planning it, e.g. when it reuses an existing asset"""
+        self._keyframe(frame, np.asarray(frame.convert('RGBA')))
+
+    def _keyframe(self, frame, rgba):
+        self._key = rgba
+        self._since_key = 1
+        self._last_patch = None
+        self.keyframes += 1
+        self.canvas_area = rgba.shape[0] * rgba.shape[1]
+        return 'key', frame, None, False
+
+    def print_report(self):
+        if not self.keyframes:
+            return
+        average = self.patch_area / self.patches / self.canvas_area if self.patches else 0
+        print(f"Delta encoding: {self.keyframes} keyframes, {self.patches} patches "
+              f"(avg {average:.0%} of canvas), {self.holds} frames held on the keyframe")
+        if self.rejected:
+            print(f"   {self.rejected} patches saved too little over their full frame: stored as keyframes")
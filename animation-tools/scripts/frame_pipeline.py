@@ -0,0 +1,114 @@
+"""
+Parallel frame pipeline helpers
+Fans per-frame work out to process/thread pools and hands results back in input order
+Used by mp4_to_lottie for the workers=N mode
+"""
+
+import time
+from collections import deque
+
+
+class StageStats:
+    """
+    Timing for one pipeline stage
+
+    busy is the sum of the time every task spent in the stage (what a single
+    core would have needed), wall is the elapsed time the stage actually took.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.busy = 0.0
+        self.wall = 0.0
+        self.count = 0
+
+    def add(self, seconds):
+        self.busy += seconds
+        self.count += 1
+
+    @property
+    def speedup(self):
+        if self.wall <= 0:
+            return 1.0
+        return self.busy / self.wall
+
+
+def ordered_map(fn, items, workers, kind='process', window=None):
+    """
+    Apply fn to every item on a pool and yield results in input order
+
+    Items are submitted lazily so at most `window` tasks are in flight,
+    which keeps memory bounded for long clips.
+
+    Args:
+        fn: Picklable top-level function (for kind='process')
+        items: Iterable of arguments, one call per item
+        workers: Pool size
+        kind: 'process' or 'thread'
+        window: Maximum tasks in flight (default: 4 * workers)
+
+    Yields:
+        fn(item) for each item, in the order items were produced
+    """
+    # Imported here: concurrent.futures.process pulls in multiprocessing, which
+    # serial conversions never need
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if window is None:
+        window = workers * 4
+
+    executor_class = ProcessPoolExecutor if kind == 'process' else ThreadPoolExecutor
+
+    with executor_class(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def timed_call(fn, *args, clock=time.perf_counter, **kwargs):
+    """
+    Run fn and return (result, elapsed_seconds)
+
+    Pass clock=time.thread_time for thread-pool tasks so time spent waiting
+    for other threads is not counted as busy time.
+    """
+    start = clock()
+    result = fn(*args, **kwargs)
+    return result, clock() - start
+
+
+def share_wall_time(stages, wall):
+    """
+    Split the wall time of a pool between the stages that ran on it
+
+    Each stage gets a share proportional to its busy time, so every stage
+    on the same pool reports the pool's overall speedup.
+    """
+    busy = sum(stage.busy for stage in stages)
+    for stage in stages:
+        stage.wall = wall * stage.busy / busy if busy > 0 else 0.0
+
+
+def print_stage_report(stages, workers):
+    """
+    Print per-stage busy time, wall time and speedup
+
+    Args:
+        stages: List of StageStats
+        workers: Worker count the stages ran with
+    """
+    print("-" * 60)
+    print(f"Stage timings ({workers} worker(s)):")
+    print(f"  {'stage':<12}{'frames':>8}{'cpu s':>10}{'wall s':>10}{'speedup':>10}")
+    for stage in stages:
+        if stage.count == 0:
+            continue
+        print(
+            f"  {stage.name:<12}{stage.count:>8}{stage.busy:>10.2f}"
+            f"{stage.wall:>10.2f}{stage.speedup:>9.2f}x"
+        )
+    print("-" * 60)
@@ -0,0 +1,290 @@
+"""
+Frame samplers for video and GIF decoding
+Decide which source frames to keep before they are processed, so discarded
+frames only cost a cheap grab() (or a GIF dirty-rectangle compare) and never
+a retrieve(), BGR->RGB conversion or background removal
+"""
+
+import math
+import time
+
+import profiler
+from gif_reader import union
+
+
+class IntervalSampler:
+    """
+    Legacy sampler: keep every Nth frame by index
+
+    Matches the original extract loop exactly (including its fixed
+    per-frame duration), kept for reproducing older conversions.
+    """
+
+    def __init__(self, frame_interval, frame_duration_ms):
+        self.frame_interval = frame_interval
+        self.frame_duration_ms = frame_duration_ms
+
+    def accept(self, frame_idx, timestamp_ms):
+        """Return a slot number if the frame should be kept, else None"""
+        if frame_idx % self.frame_interval == 0:
+            return frame_idx // self.frame_interval
+        return None
+
+    def duration_ms(self, slot, next_slot):
+        return self.frame_duration_ms
+
+    def end_slot(self, end_ms):
+        return None
+
+
+class TimestampSampler:
+    """
+    Keep frames by presentation timestamp for an exact output frame rate
+
+    The output timeline is divided into slots of 1000 / fps ms. Each source
+    frame maps to the slot nearest its timestamp and the first frame landing
+    in a new slot is kept. A kept frame is held until the next kept frame's
+    slot, so variable-frame-rate sources and targets above the source rate
+    keep their real timing instead of speeding up.
+    """
+
+    def __init__(self, target_fps, skip_frames=1):
+        self.slot_ms = 1000.0 * skip_frames / target_fps
+        self.last_slot = -1
+
+    def slot_for(self, timestamp_ms):
+        return int(math.floor(timestamp_ms / self.slot_ms + 0.5))
+
+    def accept(self, frame_idx, timestamp_ms):
+        """Return a slot number if the frame should be kept, else None"""
+        slot = self.slot_for(timestamp_ms)
+        if slot > self.last_slot:
+            self.last_slot = slot
+            return slot
+        return None
+
+    def duration_ms(self, slot, next_slot):
+        """
+        Whole milliseconds from slot to next_slot
+
+        Both boundaries are rounded rather than the difference truncated, so
+        the durations of consecutive frames add up to the real clip length.
+        """
+        next_slot = max(next_slot, slot + 1)
+        return round(next_slot * self.slot_ms) - round(slot * self.slot_ms)
+
+    def end_slot(self, end_ms):
+        return self.slot_for(end_ms)
+
+
+class VideoClock:
+    """
+    Presentation timestamps of consecutive video frames
+
+    POS_MSEC is the timestamp of the frame just grabbed; some backends
+    report 0 or repeat values, so fall back to the nominal frame period.
+    """
+
+    def __init__(self, source_fps):
+        self.period_ms = 1000.0 / source_fps if source_fps > 0 else 0.0
+        self.frames = 0
+        self.timestamp_ms = -1.0
+
+    def advance(self, reported_ms):
+        """Timestamp of the next frame given what the backend reported for it"""
+        if self.frames == 0:
+            self.timestamp_ms = max(0.0, reported_ms)
+        elif reported_ms > self.timestamp_ms:
+            self.timestamp_ms = reported_ms
+        else:
+            self.timestamp_ms += self.period_ms
+        self.frames += 1
+        return self.timestamp_ms
+
+    @property
+    def end_ms(self):
+        """End of the last frame seen"""
+        return self.timestamp_ms + self.period_ms
+
+
+def last_duration_ms(sampler, slot, end_ms, only_frame=False):
+    """
+    Duration of the last kept frame, or None to drop it
+
+    A frame can round into the slot where the clip ends (the last frame of a
+    24 FPS clip sampled at 12 FPS): it would be shown for no real time, and
+    the frame before it already runs to the end, so it is dropped rather
+    than given a slot the source does not have.
+    """
+    end_slot = sampler.end_slot(end_ms)
+    if end_slot is None:
+        end_slot = slot + 1
+    elif end_slot <= slot and not only_frame:
+        return None
+    return sampler.duration_ms(slot, end_slot)
+
+
+def sample_video_frames(video, sampler, source_fps, decode_stats=None):
+    """
+    Decode only the frames a sampler keeps
+
+    Args:
+        video: Opened cv2.VideoCapture
+        sampler: IntervalSampler or TimestampSampler
+        source_fps: Container FPS, used when the backend reports no timestamps
+        decode_stats: Optional StageStats that receives decode time per kept frame
+
+    Yields:
+        (rgb ndarray, duration_ms) for each kept frame, in order
+    """
+    import cv2
+
+    clock = VideoClock(source_fps)
+    pending = None  # (rgb, slot) waiting for the next kept slot to know its duration
+    frame_idx = 0
+    grabbed = 0
+    decoded = 0
+
+    while True:
+        start = time.perf_counter()
+        with profiler.stage('grab'):
+            ok = video.grab()
+        if not ok:
+            break
+        grabbed += 1
+
+        timestamp_ms = clock.advance(video.get(cv2.CAP_PROP_POS_MSEC))
+        slot = sampler.accept(frame_idx, timestamp_ms)
+        frame_idx += 1
+        if slot is None:
+            continue
+
+        with profiler.stage('decode') as decode:
+            ret, cv_frame = video.retrieve()
+            if not ret:
+                break
+            rgb = cv2.cvtColor(cv_frame, cv2.COLOR_BGR2RGB)
+            decode.add_bytes(rgb.nbytes)
+        decoded += 1
+        if decode_stats is not None:
+            elapsed = time.perf_counter() - start
+            decode_stats.add(elapsed)
+            decode_stats.wall += elapsed
+
+        if pending is not None:
+            yield pending[0], sampler.duration_ms(pending[1], slot)
+        pending = (rgb, slot)
+
+    if pending is not None:
+        duration = last_duration_ms(sampler, pending[1], clock.end_ms, only_frame=decoded == 1)
+        if duration is not None:
+            yield pending[0], duration
+
+    print(f"Decoded {decoded} of {grabbed} frames (grab-skipped {grabbed - decoded})")
+
+
+def sample_store_frames(store, sampler, decode_stats=None, references=False):
+    """
+    sample_video_frames over a frame_store.FrameStore instead of a live decode
+
+    Kept frames are read-only views of the memory-mapped store, so nothing
+    is decoded or copied; the timestamps are the ones recorded while the
+    store was written, so the same frames are kept with the same durations.
+
+    Args:
+        store: Open FrameStore
+        sampler: IntervalSampler or TimestampSampler
+        decode_stats: Optional StageStats that receives read time per kept frame
+        references: Yield frame_store.StoredFrame references instead of
+                    arrays, for process pools (workers map the store themselves)
+
+    Yields:
+        (rgb ndarray or StoredFrame, duration_ms) for each kept frame, in order
+    """
+    pending = None  # (frame, slot) waiting for the next kept slot to know its duration
+    read = 0
+    for frame_idx, timestamp_ms in enumerate(store.timestamps_ms):
+        slot = sampler.accept(frame_idx, timestamp_ms)
+        if slot is None:
+            continue
+        read += 1
+
+        start = time.perf_counter()
+        with profiler.stage('decode'):
+            frame = store.reference(frame_idx) if references else store.frames[frame_idx]
+        if decode_stats is not None:
+            elapsed = time.perf_counter() - start
+            decode_stats.add(elapsed)
+            decode_stats.wall += elapsed
+
+        if pending is not None:
+            yield pending[0], sampler.duration_ms(pending[1], slot)
+        pending = (frame, slot)
+
+    if pending is not None:
+        duration = last_duration_ms(sampler, pending[1], store.end_ms, only_frame=read == 1)
+        if duration is not None:
+            yield pending[0], duration
+
+    print(f"Read {read} of {len(store)} stored frames (nothing decoded)")
+
+
+class GifTimelineResampler:
+    """
+    Resample a GIF's variable frame timing onto a fixed output frame rate
+
+    Output frames fall on ticks every 1000 / fps ms. The GIF frame visible at
+    a tick is kept; frames that are shown only between two ticks (10-20 ms
+    frames of a GIF resampled to 12-25 fps) can never be seen in the output
+    and are folded into the next kept frame, whose dirty rectangle then covers
+    their changes too. A kept frame identical to the one before is merged
+    into it, so a static hold becomes a single layer.
+
+    Each kept frame lasts from its first tick to the next kept frame's first
+    tick and the last one to the end of the GIF, so the durations are whole
+    milliseconds that add up to exactly the GIF's total duration.
+    """
+
+    def __init__(self, target_fps):
+        self.target_fps = target_fps
+        self.source_frames = 0
+        self.folded = 0
+        self.merged = 0
+
+    def tick_ms(self, tick):
+        return math.floor(tick * 1000 / self.target_fps)
+
+    def resample(self, frames):
+        """
+        Args:
+            frames: (canvas, dirty, duration_ms) tuples from gif_reader.iter_gif_frames
+
+        Yields:
+            (canvas, dirty, duration_ms) for each kept frame, in the same form;
+            the canvas is a copy that stays valid while the reader moves on
+        """
+        held = None  # (canvas, dirty, start_ms) waiting for the next kept frame to know its duration
+        changed = None  # union of the dirty rectangles since the held frame
+        elapsed_ms = 0
+        tick = 0
+
+        for canvas, dirty, duration in frames:
+            self.source_frames += 1
+            end_ms = elapsed_ms + duration
+            changed = union(changed, dirty)
+            if tick * 1000 >= end_ms * self.target_fps:
+                self.folded += 1  # gone before the next tick
+            elif changed is None:
+                self.merged += 1  # same pixels as the held frame: hold it longer
+            else:
+                start_ms = self.tick_ms(tick)
+                if held is not None:
+                    yield held[0], held[1], start_ms - held[2]
+                held = (canvas.copy(), changed, start_ms)
+                changed = None
+            # First tick at or after the end of this frame
+            tick = max(tick, math.ceil(end_ms * self.target_fps / 1000))
+            elapsed_ms = end_ms
+
+        if held is not None:
+            yield held[0], held[1], elapsed_ms - held[2]
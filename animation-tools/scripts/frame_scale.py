@@ -0,0 +1,67 @@
+"""
+Downscale-first frame preparation for mp4_to_lottie
+Shrinks decoded frames to the output size with area interpolation before
+background removal, instead of matting full-resolution frames and resizing last
+"""
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+
+def output_size(size, max_size):
+    """(width, height) optimize_frame gives a frame of `size`"""
+    if max(size) <= max_size:
+        return tuple(size)
+    ratio = max_size / max(size)
+    return int(size[0] * ratio), int(size[1] * ratio)
+
+
+class DownscaleFirst:
+    """
+    Resize on the decoded ndarray, then remove the background at output size
+
+    A 1080p frame converted at max_size=256 has ~30x more pixels than are
+    kept; area interpolation averages them down before any per-pixel work.
+    With edge_scale > 1 the background is removed at edge_scale x the output
+    size and the RGBA result is shrunk with LANCZOS on premultiplied alpha,
+    which turns hard mask edges into anti-aliased ones for a modest cost.
+
+    prepare() and finish() bracket the background removal; frames that are
+    already small enough pass through both unchanged.
+    """
+
+    def __init__(self, max_size, edge_scale=1):
+        self.max_size = max_size
+        self.edge_scale = max(1, int(edge_scale))
+        self._final = {}  # working size -> output size
+
+    def prepare(self, rgb):
+        """
+        Args:
+            rgb: Decoded (H, W, 3) uint8 frame
+
+        Returns:
+            PIL RGBA image at edge_scale x the output size (or the source
+            size, whichever is smaller)
+        """
+        import cv2
+
+        height, width = rgb.shape[:2]
+        target = output_size((width, height), self.max_size)
+        if target != (width, height):
+            work = target
+            if target[0] * self.edge_scale <= width and target[1] * self.edge_scale <= height:
+                work = (target[0] * self.edge_scale, target[1] * self.edge_scale)
+            rgb = cv2.resize(np.ascontiguousarray(rgb), work, interpolation=cv2.INTER_AREA)
+            self._final[work] = target
+        return Image.fromarray(rgb).convert('RGBA')
+
+    def finish(self, frame):
+        """Shrink a background-removed working frame to its output size"""
+        target = self._final.get(frame.size)
+        if target is None or target == frame.size:
+            return frame
+        # Pillow resizes RGBA on premultiplied alpha: removed pixels add no colour fringe
+        return frame.resize(target, Image.Resampling.LANCZOS)
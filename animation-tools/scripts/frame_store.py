@@ -0,0 +1,208 @@
+"""
+Memory-mapped store of decoded video frames
+Decodes a clip once into a flat uint8 file that later runs (and pool workers)
+map read-only instead of decoding the MP4 again, so frames never sit in RAM
+"""
+
+import json
+import math
+import os
+import struct
+import sys
+from pathlib import Path
+
+import conversion_cache
+from frame_sampler import VideoClock
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+MAGIC = b'LFSTORE1'
+FOOTER = struct.Struct('<Q8s')  # header length, magic
+
+_open_stores = {}  # path -> FrameStore, per process
+
+
+class FrameStore:
+    """
+    Read side of a frame store file
+
+    Layout: N * H * W * 3 RGB bytes starting at offset 0 (so they map as one
+    (N, H, W, 3) array), then a small JSON header with the shape, source fps
+    and every frame's presentation timestamp, then FOOTER. The header sits at
+    the end because the frame count is only known once decoding is done.
+
+    Attributes:
+        frames: (N, H, W, 3) read-only np.memmap; frames[i] is zero-copy
+        timestamps_ms: Presentation timestamp of every frame
+        source_fps: Container FPS of the source clip
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, 'rb') as f:
+            f.seek(-FOOTER.size, os.SEEK_END)
+            header_size, magic = FOOTER.unpack(f.read(FOOTER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a frame store: {self.path}")
+            f.seek(-FOOTER.size - header_size, os.SEEK_END)
+            header = json.loads(f.read(header_size))
+
+        self.shape = tuple(header['shape'])
+        self.timestamps_ms = header['timestamps_ms']
+        self.source_fps = header['source_fps']
+        self.frames = None
+        if self.shape[0]:
+            self.frames = np.memmap(self.path, dtype=np.uint8, mode='r', shape=self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def nbytes(self):
+        return math.prod(self.shape)
+
+    @property
+    def end_ms(self):
+        """End of the last frame, as sample_video_frames computes it"""
+        if not self.timestamps_ms:
+            return 0.0
+        return self.timestamps_ms[-1] + VideoClock(self.source_fps).period_ms
+
+    def reference(self, index):
+        """Picklable stand-in for frames[index], for process pools"""
+        return StoredFrame(self.path, index)
+
+    def close(self):
+        # Views of frames handed out earlier keep the mapping alive until they are gone
+        self.frames = None
+
+
+class StoredFrame:
+    """One frame of a store, passed to pool workers by path and index instead of by value"""
+
+    def __init__(self, path, index):
+        self.path = path
+        self.index = index
+
+    def load(self):
+        """The frame as a read-only view of this process's mapping of the store"""
+        store = _open_stores.get(self.path)
+        if store is None:
+            store = _open_stores[self.path] = FrameStore(self.path)
+        return store.frames[self.index]
+
+
+def resolve_frame(frame):
+    """Array of a frame that may be a StoredFrame reference"""
+    return frame.load() if isinstance(frame, StoredFrame) else frame
+
+
+def write_frame_store(video_path, store_path):
+    """
+    Decode every frame of a video into a frame store file
+
+    Frames are written as they are decoded, so memory use does not grow with
+    the clip. The file is written under a temporary name and renamed, so an
+    interrupted run never leaves a truncated store behind.
+
+    Args:
+        video_path: Path to the MP4 (anything cv2.VideoCapture opens)
+        store_path: Where to write the store
+
+    Returns:
+        Open FrameStore, or None if the video could not be opened
+    """
+    import cv2
+
+    video = cv2.VideoCapture(str(video_path))
+    if not video.isOpened():
+        print(f"Error: Could not open video file: {video_path}")
+        return None
+
+    source_fps = video.get(cv2.CAP_PROP_FPS)
+    clock = VideoClock(source_fps)
+    timestamps_ms = []
+    shape = None
+
+    store_path = Path(store_path)
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = store_path.with_name(f"{store_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            while video.grab():
+                timestamp_ms = clock.advance(video.get(cv2.CAP_PROP_POS_MSEC))
+                ret, cv_frame = video.retrieve()
+                if not ret:
+                    break
+                rgb = cv2.cvtColor(cv_frame, cv2.COLOR_BGR2RGB)
+                if shape is None:
+                    shape = rgb.shape
+                elif rgb.shape != shape:
+                    raise ValueError(f"Frame size changed mid-stream in {video_path}")
+                f.write(rgb.data)
+                timestamps_ms.append(timestamp_ms)
+
+            header = json.dumps({
+                'shape': [len(timestamps_ms), *(shape or (0, 0, 3))],
+                'source_fps': source_fps,
+                'timestamps_ms': timestamps_ms,
+            }).encode()
+            f.write(header)
+            f.write(FOOTER.pack(len(header), MAGIC))
+        os.replace(tmp, store_path)
+    finally:
+        video.release()
+        if tmp.exists():
+            tmp.unlink()
+
+    return FrameStore(store_path)
+
+
+def open_frame_store(video_path, cache=True):
+    """
+    The frame store of a video, decoding it first if this clip has none yet
+
+    Stores live in the conversion cache's 'decoded' level, keyed by the video's
+    contents. That level has its own size limit (max_decoded_bytes, 8 GB by
+    default; a decoded clip is width * height * 3 bytes per frame). Writing a
+    new store evicts the least recently used older ones, never this one.
+
+    Args:
+        video_path: Path to the MP4
+        cache: True (default cache dir), a directory, or a ConversionCache
+
+    Returns:
+        Open FrameStore, or None if the video could not be decoded
+    """
+    cache = conversion_cache.open_cache(cache)
+    path = cache.decoded_path(video_path)
+    if path.exists():
+        try:
+            store = FrameStore(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable frame store {path.name}: {e}")
+        else:
+            os.utime(path)
+            cache.count('decoded', True)
+            print(f"Reading {len(store)} decoded frames from {path}")
+            return store
+
+    cache.count('decoded', False)
+    print(f"Decoding {video_path} once into {path}")
+    store = write_frame_store(video_path, path)
+    if store is not None:
+        print(f"Stored {len(store)} frames ({store.nbytes / 1024 / 1024:.1f} MB)")
+        cache.evict()
+    return store
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python frame_store.py <video> [cache_dir]")
+        sys.exit(1)
+    store = open_frame_store(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else True)
+    if store is None:
+        sys.exit(1)
+    _, height, width, _ = store.shape
+    print(f"{len(store)} frames, {width}x{height}, {store.source_fps:.2f} FPS")
@@ -4,14 +4,27 @@ Converts GIF files to optimized Lottie animations with transparent background
 Preserves original timing and visual data
 """
 
-import numpy as np
-from PIL import Image
-import json
 import base64
 import io
-import os
+import sys
 from pathlib import Path
 
+import lottie_writer
+import bg_kernel
+from gif_reader import iter_gif_frames
+from frame_sampler import GifTimelineResampler
+from frame_delta import DeltaEncoder
+from rate_control import WebPRateController
+from frame_dedup import AssetDeduplicator
+from memory_stats import peak_rss_bytes, format_bytes
+from lottie_cost import enforce_budgets
+import conversion_cache
+import profiler
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
 
 def remove_background(frame, threshold=200, edge_tolerance=10):
     """
@@ -33,26 +46,9 @@ def remove_background(frame, threshold=200, edge_tolerance=10):
         alpha = np.ones((data.shape[0], data.shape[1]), dtype=np.uint8) * 255
         data = np.dstack([data, alpha])
     
-    r, g, b, a = data[:,:,0], data[:,:,1], data[:,:,2], data[:,:,3]
-    
-    # Method 1: Remove white/light background
-    white_mask = (r > threshold) & (g > threshold) & (b > threshold)
-    
-    # Method 2: Edge-preserving detection (preserve anti-aliased edges)
-    # Calculate gradient to detect edges
-    gray = (r.astype(float) + g.astype(float) + b.astype(float)) / 3
-    gradient_x = np.abs(np.diff(gray, axis=1, prepend=gray[:,0:1]))
-    gradient_y = np.abs(np.diff(gray, axis=0, prepend=gray[0:1,:]))
-    gradient = np.sqrt(gradient_x**2 + gradient_y**2)
-    
-    # Don't remove pixels near edges (they might be anti-aliased)
-    edge_mask = gradient > edge_tolerance
-    
-    # Combine masks: remove white pixels that are not near edges
-    removal_mask = white_mask & ~edge_mask
-    
-    # Set alpha to 0 for background pixels
-    data[removal_mask, 3] = 0
+    # Remove white/light background, but not pixels near edges (they might
+    # be anti-aliased)
+    bg_kernel.remove_background(data, light_threshold=threshold, edge_tolerance=edge_tolerance)
     
     return Image.fromarray(data, 'RGBA')
 
@@ -91,70 +87,135 @@ def frame_to_base64(frame, format='PNG'):
     """
     buffer = io.BytesIO()
     
-    if format.upper() == 'WEBP':
-        # WebP provides better compression
-        frame.save(buffer, format='WEBP', quality=90, method=6)
-        mime_type = 'image/webp'
-    else:
-        # PNG for lossless quality
-        frame.save(buffer, format='PNG', optimize=True)
-        mime_type = 'image/png'
-    
-    buffer.seek(0)
-    img_str = base64.b64encode(buffer.read()).decode()
+    with profiler.stage(format.lower()) as encode:
+        if format.upper() == 'WEBP':
+            # WebP provides better compression
+            frame.save(buffer, format='WEBP', quality=90, method=6)
+            mime_type = 'image/webp'
+        else:
+            # PNG for lossless quality
+            frame.save(buffer, format='PNG', optimize=True)
+            mime_type = 'image/png'
+        encode.add_bytes(buffer.tell())
+    
+    with profiler.stage('base64') as encode:
+        buffer.seek(0)
+        img_str = base64.b64encode(buffer.read()).decode()
+        encode.add_bytes(len(img_str))
     
     return f"data:{mime_type};base64,{img_str}"
 
 
-def extract_frames_from_gif(gif_path, remove_bg=True, max_size=512):
+def iter_frames_from_gif(gif_path, remove_bg=True, max_size=512, frame_cache=None,
+                         target_fps=None):
     """
-    Extract all frames from GIF with optional background removal
+    Extract frames from GIF one at a time with optional background removal
+    
+    Frames are composited by gif_reader, which reports the rectangle each
+    frame changed: background removal only reprocesses that rectangle, and
+    a frame identical to the previous one reuses its result outright.
     
     Args:
         gif_path: Path to GIF file
         remove_bg: Whether to remove background
         max_size: Maximum dimension for optimization
-    
-    Returns:
-        List of (frame, duration_ms) tuples
+        frame_cache: Optional ConversionCache; processed frames are looked up
+                     by their pixels before background removal and resizing
+        target_fps: Resample the GIF timing to this frame rate: frames shown
+                    between two output frames are dropped before processing
+                    and identical consecutive frames become one held frame
+    
+    Yields:
+        (frame, duration_ms) tuples
     """
     print(f"Loading GIF: {gif_path}")
     
-    gif = Image.open(gif_path)
-    frames = []
-    
-    try:
-        frame_count = 0
-        while True:
-            # Get current frame
-            frame = gif.copy().convert('RGBA')
-            
-            # Get frame duration (in milliseconds)
-            duration = gif.info.get('duration', 100)  # Default 100ms
-            
+    kernel = bg_kernel.default_kernel()
+    processed = None  # background-removed canvas, kept in step with the reader's canvas
+    frame = None
+    frame_count = 0
+    unchanged = 0
+    dirty_pixels = 0
+    
+    source = iter_gif_frames(gif_path)
+    resampler = None
+    if target_fps:
+        resampler = GifTimelineResampler(target_fps)
+        source = resampler.resample(source)
+    
+    for canvas, dirty, duration in source:
+        frame_count += 1
+        if dirty is None and frame is not None:
+            # Same pixels as the previous frame: same processed frame
+            unchanged += 1
+            yield frame, duration
+            continue
+        dirty_pixels += (dirty[2] - dirty[0]) * (dirty[3] - dirty[1])
+        
+        cached = None
+        if frame_cache is not None:
+            with profiler.stage('cache'):
+                cache_key = frame_cache.frame_key(canvas, ('gif', remove_bg, max_size))
+                cached = frame_cache.get_frame(cache_key)
+        
+        if cached is not None:
+            frame = cached
+            processed = None
+        else:
             # Remove background if requested
             if remove_bg:
-                print(f"Processing frame {frame_count + 1} (removing background)...")
-                frame = remove_background(frame)
+                print(f"Processing frame {frame_count} (removing background)...")
+                with profiler.stage('background'):
+                    if processed is None or processed.shape != canvas.shape:
+                        processed = canvas.copy()
+                        dirty = (0, 0, canvas.shape[1], canvas.shape[0])
+                    # remove_background()'s defaults, on the changed pixels only
+                    kernel.update_region(canvas, processed, dirty, light_threshold=200, edge_tolerance=10)
+                    frame = Image.fromarray(processed.copy(), 'RGBA')
+            else:
+                frame = Image.fromarray(canvas.copy(), 'RGBA')
             
             # Optimize frame
-            frame = optimize_frame(frame, max_size)
+            with profiler.stage('resize'):
+                frame = optimize_frame(frame, max_size)
             
-            frames.append((frame, duration))
-            frame_count += 1
-            
-            # Move to next frame
-            gif.seek(gif.tell() + 1)
-            
-    except EOFError:
-        pass  # End of frames
+            if frame_cache is not None:
+                with profiler.stage('cache', frames=0):
+                    frame_cache.put_frame(cache_key, frame)
+        
+        yield frame, duration
+    
+    if frame_count:
+        area = dirty_pixels / (frame_count * canvas.shape[0] * canvas.shape[1])
+        print(f"Extracted {frame_count} frames ({unchanged} unchanged, {area:.0%} of pixels changed)")
+    else:
+        print("Extracted 0 frames")
+    if resampler is not None:
+        print(f"Resampled {resampler.source_frames} GIF frames to {frame_count} at {target_fps} fps "
+              f"({resampler.folded} folded, {resampler.merged} merged into held frames)")
+
+
+def extract_frames_from_gif(gif_path, remove_bg=True, max_size=512, frame_cache=None,
+                            target_fps=None):
+    """
+    Extract all frames from GIF with optional background removal
     
-    print(f"Extracted {len(frames)} frames")
+    Args:
+        gif_path: Path to GIF file
+        remove_bg: Whether to remove background
+        max_size: Maximum dimension for optimization
+        frame_cache: Optional ConversionCache for processed frames
+        target_fps: Optional output frame rate to resample the GIF timing to
     
-    return frames
+    Returns:
+        List of (frame, duration_ms) tuples
+    """
+    return list(iter_frames_from_gif(gif_path, remove_bg=remove_bg, max_size=max_size,
+                                     frame_cache=frame_cache, target_fps=target_fps))
 
 
-def create_lottie_animation(frames, output_path, fps=None, loop=True):
+def create_lottie_animation(frames, output_path, fps=None, loop=True, dedup=True,
+                            container='json', delta=False, target_kb=None):
     """
     Create Lottie JSON animation from frames
     
@@ -163,107 +224,40 @@ def create_lottie_animation(frames, output_path, fps=None, loop=True):
         output_path: Path to save Lottie JSON
         fps: Frames per second (if None, uses GIF timing)
         loop: Whether animation should loop
+        dedup: Reuse assets for repeated frames and merge consecutive repeats
+        container: 'json' (inline images) or 'dotlottie' (.lottie zip with
+                   separate WebP files)
+        delta: Store full keyframes only at scene changes / every 30 frames
+               and just the changed region of the frames in between
+        target_kb: Size budget for the whole file; WebP quality is then chosen
+                   per frame to fit it instead of the fixed default
     
     Returns:
         Path to created Lottie file
     """
-    print("Creating Lottie animation...")
-    
-    if not frames:
-        raise ValueError("No frames to process")
-    
-    # Get dimensions from first frame
-    width, height = frames[0][0].size
-    
-    # Calculate timing
-    total_duration_ms = sum(duration for _, duration in frames)
-    
-    # Use provided FPS or calculate from GIF timing
-    if fps is None:
-        fps = int(1000 * len(frames) / total_duration_ms)
-        fps = max(10, min(fps, 60))  # Clamp between 10-60 fps
-    
-    print(f"Animation specs: {len(frames)} frames, {fps} fps, {total_duration_ms}ms duration")
-    
-    # Convert frames to base64
-    print("Encoding frames...")
-    assets = []
-    layers = []
-    
-    for i, (frame, duration) in enumerate(frames):
-        # Create asset
-        asset_id = f"image_{i}"
-        base64_data = frame_to_base64(frame, format='WEBP')
-        
-        assets.append({
-            "id": asset_id,
-            "w": width,
-            "h": height,
-            "u": "",
-            "p": base64_data,
-            "e": 0
-        })
-        
-        # Calculate frame timing
-        start_frame = sum(frames[j][1] * fps / 1000 for j in range(i))
-        end_frame = start_frame + (duration * fps / 1000)
-        
-        # Create layer for this frame
-        layers.append({
-            "ddd": 0,
-            "ind": i,
-            "ty": 2,  # Image layer
-            "nm": f"Frame {i}",
-            "refId": asset_id,
-            "sr": 1,
-            "ks": {
-                "o": {
-                    "a": 1,
-                    "k": [
-                        {"t": start_frame, "s": [100], "e": [100]},
-                        {"t": end_frame, "s": [100], "e": [0]}
-                    ]
-                },
-                "r": {"a": 0, "k": 0},
-                "p": {"a": 0, "k": [width/2, height/2, 0]},
-                "a": {"a": 0, "k": [width/2, height/2, 0]},
-                "s": {"a": 0, "k": [100, 100, 100]}
-            },
-            "ao": 0,
-            "ip": start_frame,
-            "op": end_frame,
-            "st": 0,
-            "bm": 0
-        })
-    
-    # Create Lottie JSON structure
-    lottie_data = {
-        "v": "5.7.4",  # Lottie version
-        "fr": fps,
-        "ip": 0,
-        "op": total_duration_ms * fps / 1000,
-        "w": width,
-        "h": height,
-        "nm": "GIF Animation",
-        "ddd": 0,
-        "assets": assets,
-        "layers": layers,
-        "markers": []
-    }
-    
-    # Save to file
-    print(f"Saving Lottie animation to: {output_path}")
-    with open(output_path, 'w') as f:
-        json.dump(lottie_data, f, separators=(',', ':'))
-    
-    # Get file size
-    file_size = os.path.getsize(output_path)
-    print(f"✓ Lottie animation created: {file_size / 1024:.2f} KB")
-    
-    return output_path
+    return lottie_writer.create_lottie_animation(
+        frames, output_path, encode=_encode_frame, fps=fps, name="GIF Animation",
+        dedup=AssetDeduplicator() if dedup else None, container=container,
+        delta=DeltaEncoder() if delta else None,
+        rate_control=_rate_control(target_kb, container)
+    )
+
+
+def _encode_frame(frame):
+    return frame_to_base64(frame, format='WEBP')
 
 
-def convert_gif_to_lottie(gif_path, output_path=None, remove_bg=True, max_size=512, fps=None):
+def _rate_control(target_kb, container):
+    if not target_kb:
+        return None
+    return WebPRateController(target_kb * 1024, max_quality=90, workers=1,
+                              base64_assets=(container != 'dotlottie'))
+
+
+def convert_gif_to_lottie(gif_path, output_path=None, remove_bg=True, max_size=512, fps=None,
+                          streaming=False, dedup=True, container='json', delta=False,
+                          target_kb=None, cache=None, profile=None, target_fps=None,
+                          budgets=None):
     """
     Main function to convert GIF to Lottie animation
     
@@ -273,6 +267,30 @@ def convert_gif_to_lottie(gif_path, output_path=None, remove_bg=True, max_size=5
         remove_bg: Whether to remove background
         max_size: Maximum dimension for optimization
         fps: Frames per second (if None, uses GIF timing)
+        streaming: Process and write one frame at a time so peak memory
+                   stays flat as the GIF gets longer
+        dedup: Reuse the asset of repeated frames and merge consecutive
+               repeats into one longer-held layer
+        container: 'json' (inline images) or 'dotlottie' (.lottie zip with
+                   separate WebP files, smaller and faster to load)
+        delta: Delta-encode frames: keyframes plus small changed-region
+               patches, much smaller for mostly static clips
+        target_kb: Make the output at most this many KB by searching WebP
+                   quality/method per frame (disables streaming)
+        cache: Reuse earlier work: True (default cache dir), a directory, or a
+               ConversionCache. An identical earlier conversion is copied;
+               otherwise processed frames are reused and only encoding re-runs
+        profile: True or a profiler.Profiler to time every stage (decode,
+                 background, resize, webp, base64, write) and write
+                 <output>.profile.json (plus a Chrome trace if enabled)
+        target_fps: Resample the GIF onto this frame rate (also the animation
+                    fps unless fps is given): sub-frame-duration frames are
+                    folded away and identical consecutive frames are merged
+                    into one held layer; the total duration stays exact
+        budgets: Check the finished animation's load cost (JSON/base64 bytes,
+                 decoded bitmap memory, active layers, animated properties):
+                 True for lottie_cost.DEFAULT_BUDGETS or a dict overriding some
+                 of them. Raises lottie_cost.BudgetExceeded when over budget
     
     Returns:
         Path to created Lottie file
@@ -281,6 +299,8 @@ def convert_gif_to_lottie(gif_path, output_path=None, remove_bg=True, max_size=5
     if output_path is None:
         gif_name = Path(gif_path).stem
         output_path = str(Path(gif_path).parent / f"{gif_name}_lottie.json")
+    if container == 'dotlottie':
+        output_path = lottie_writer.dotlottie_path(output_path)
     
     print("=" * 60)
     print("GIF TO LOTTIE CONVERTER")
@@ -289,13 +309,81 @@ def convert_gif_to_lottie(gif_path, output_path=None, remove_bg=True, max_size=5
     print(f"Output: {output_path}")
     print(f"Background removal: {'YES' if remove_bg else 'NO'}")
     print(f"Max size: {max_size}px")
+    print(f"Resample: {f'{target_fps} fps' if target_fps else 'NO (GIF timing)'}")
+    print(f"Streaming: {'YES' if streaming else 'NO'}")
+    print(f"Asset deduplication: {'YES' if dedup else 'NO'}")
+    print(f"Container: {container}")
+    print(f"Delta encoding: {'YES' if delta else 'NO'}")
+    print(f"Size budget: {f'{target_kb} KB' if target_kb else 'NO'}")
+    print(f"Cache: {'YES' if cache else 'NO'}")
+    print(f"Load budgets: {'YES' if budgets else 'NO'}")
+    print(f"Profile: {'YES' if profile else 'NO'}")
     print("=" * 60)
     
-    # Extract frames
-    frames = extract_frames_from_gif(gif_path, remove_bg=remove_bg, max_size=max_size)
+    settings = {
+        'converter': 'gif', 'remove_bg': remove_bg, 'max_size': max_size, 'fps': fps,
+        'streaming': streaming, 'dedup': dedup, 'container': container, 'delta': delta,
+        'target_kb': target_kb, 'target_fps': target_fps,
+        'animation_id': Path(output_path).stem if container == 'dotlottie' else None
+    }
+    
+    cache = conversion_cache.open_cache(cache)
+    if cache is not None:
+        output_key = cache.output_key(gif_path, settings)
+        if cache.get_output(output_key, output_path):
+            print("✓ Identical conversion found in cache: output copied")
+            cache.print_report()
+            if budgets:
+                enforce_budgets(output_path, budgets)
+            return output_path
+    
+    profile = profiler.start(profile, input=str(gif_path), output=str(output_path),
+                             settings=settings)
+    result = None
+    try:
+        if target_fps and fps is None:
+            fps = target_fps
+        
+        if target_kb and streaming:
+            print("ℹ️ A size budget needs every frame up front: streaming disabled")
+            streaming = False
+        
+        if streaming:
+            frames = iter_frames_from_gif(gif_path, remove_bg=remove_bg, max_size=max_size,
+                                          frame_cache=cache, target_fps=target_fps)
+            result = lottie_writer.write_lottie_streaming(
+                frames, output_path, encode=_encode_frame,
+                fps=fps, name="GIF Animation",
+                dedup=AssetDeduplicator() if dedup else None, container=container,
+                delta=DeltaEncoder() if delta else None
+            )
+            if result is None:
+                raise ValueError("No frames to process")
+        else:
+            # Extract frames
+            frames = extract_frames_from_gif(gif_path, remove_bg=remove_bg, max_size=max_size,
+                                             frame_cache=cache, target_fps=target_fps)
+            if profile is not None:
+                profile.snapshot('frames extracted')
+            
+            # Create Lottie animation
+            result = create_lottie_animation(frames, output_path, fps=fps, dedup=dedup,
+                                             container=container, delta=delta, target_kb=target_kb)
+        
+        if cache is not None:
+            cache.put_output(output_key, result)
+            cache.evict()
+            cache.print_report()
+        
+        if profile is not None:
+            profile.snapshot('animation written')
+    finally:
+        profiler.finish(profile, result or output_path)
     
-    # Create Lottie animation
-    result = create_lottie_animation(frames, output_path, fps=fps)
+    print(f"Peak memory (RSS): {format_bytes(peak_rss_bytes())}")
+    
+    if budgets:
+        enforce_budgets(result, budgets)
     
     print("=" * 60)
     print("✓ CONVERSION COMPLETE!")
@@ -310,6 +398,10 @@ if __name__ == "__main__":
     gif_path = script_dir / "gifassests" / "laughing.gif"
     output_path = script_dir / "animations" / "laughing_lottie.json"
     
+    if len(sys.argv) > 1:
+        gif_path = Path(sys.argv[1])
+        output_path = Path(sys.argv[2]) if len(sys.argv) > 2 else gif_path.with_name(f"{gif_path.stem}_lottie.json")
+    
     # Ensure output directory exists
     output_path.parent.mkdir(exist_ok=True)
     
@@ -319,6 +411,7 @@ if __name__ == "__main__":
         print("  python gif_to_lottie.py")
         print("  or")
         print("  python gif_to_lottie.py <gif_path> <output_path>")
+        sys.exit(1)
     else:
         # Convert with background removal
         convert_gif_to_lottie(
@@ -0,0 +1,51 @@
+"""
+Capability probing and lazy imports
+Optional backends are detected through the import system's finders without
+running them, and heavy modules load on first use instead of at startup
+"""
+
+import importlib.util
+import sys
+
+
+def is_installed(name):
+    """True if a module can be imported, without importing it"""
+    # find_spec() reads sys.modules[name].__spec__, which would force a lazy module to load
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_import(name):
+    """
+    Module object that is only executed on first attribute access
+
+    `np = lazy_import('numpy')` costs a finder lookup at import time; numpy
+    itself loads the first time np.something is used, so code paths that
+    never touch it (usage text, capability checks) start instantly.
+
+    Raises:
+        ImportError: if the module is not installed (checked up front, so a
+                     missing dependency still fails at import time)
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+
+    # `from PIL import Image` elsewhere must find the same module object
+    parent, _, child = name.rpartition('.')
+    if parent and parent in sys.modules:
+        setattr(sys.modules[parent], child, module)
+    return module
@@ -0,0 +1,351 @@
+"""
+Device load-cost estimator and linter for Lottie files
+Measures what a phone pays to load an animation (JSON and base64 bytes, decoded
+bitmap memory, layers active at once, animated properties) and checks it against budgets
+"""
+
+import argparse
+import base64
+import io
+import json
+import statistics
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+from lazy_imports import lazy_import
+from memory_stats import format_bytes
+
+Image = lazy_import('PIL.Image')
+
+DEFAULT_ASSETS_DIR = Path(__file__).resolve().parents[2] / "app" / "src" / "main" / "assets"
+
+# Upper limits per metric; None disables a check. Set so that only outliers fail:
+# every vector animation in app/src/main/assets passes, a 33-frame 700px image
+# sequence (63 MB of bitmaps) does not. Timings depend on the machine: opt in.
+DEFAULT_BUDGETS = {
+    'json_bytes': 2 * 1024 * 1024,
+    'base64_bytes': 1536 * 1024,
+    'assets': 150,
+    'bitmap_bytes': 32 * 1024 * 1024,
+    'active_layers': 100,
+    'animated_properties': 40,
+    'parse_ms': None,
+    'decode_ms': None,
+}
+
+METRIC_LABELS = {
+    'json_bytes': "JSON size",
+    'base64_bytes': "Base64 images",
+    'assets': "Assets",
+    'bitmap_bytes': "Decoded bitmaps",
+    'active_layers': "Layers active at once",
+    'animated_properties': "Animated properties (busiest layer)",
+    'parse_ms': "JSON parse",
+    'decode_ms': "Image decode",
+}
+
+SIZE_UNITS = {'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+class BudgetExceeded(ValueError):
+    """Raised by enforce_budgets when an animation is over one or more budgets"""
+
+    def __init__(self, path, violations):
+        self.path = path
+        self.violations = violations
+        super().__init__(f"{Path(path).name} is over budget: " + "; ".join(violations))
+
+
+def read_animation(path):
+    """
+    Raw animation JSON and its images from a Lottie JSON or dotLottie file
+
+    Returns:
+        (json bytes, {asset path: image bytes} for dotLottie archives)
+    """
+    path = Path(path)
+    if not zipfile.is_zipfile(path):
+        return path.read_bytes(), {}
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        animation = next(name for name in names if name.startswith("animations/") and name.endswith(".json"))
+        images = {name[len("images/"):]: archive.read(name)
+                  for name in names if name.startswith("images/") and not name.endswith("/")}
+        return archive.read(animation), images
+
+
+def image_bytes(asset, images):
+    """Encoded bytes of an image asset (inline data: URI or dotLottie file), or None"""
+    path = asset.get('p')
+    if not isinstance(path, str):
+        return None
+    if path.startswith('data:'):
+        return base64.b64decode(path.partition(',')[2])
+    return images.get(path)
+
+
+def _is_image(asset):
+    return 'layers' not in asset and isinstance(asset.get('p'), str)
+
+
+def _layer_times(layers, assets, offset=0, depth=0):
+    """Start times of every layer, nested precomps shifted by their layer's start time"""
+    for layer in layers:
+        yield layer.get('ip', 0) + offset
+        nested = assets.get(layer.get('refId'), {}).get('layers')
+        if nested and depth < 16:
+            yield from _layer_times(nested, assets, offset + layer.get('st', 0), depth + 1)
+
+
+def _active_layers(layers, assets, t, depth=0):
+    """Layers visible at frame t, counting the active layers inside precomps too"""
+    count = 0
+    for layer in layers:
+        if layer.get('hd') or not layer.get('ip', 0) <= t < layer.get('op', 0):
+            continue
+        count += 1
+        nested = assets.get(layer.get('refId'), {}).get('layers')
+        if nested and depth < 16:
+            count += _active_layers(nested, assets, t - layer.get('st', 0), depth + 1)
+    return count
+
+
+def count_animated(node):
+    """Animated properties ({"a": 1}) in a layer, not counting precomp contents"""
+    if isinstance(node, dict):
+        return (node.get('a') == 1) + sum(count_animated(value) for value in node.values())
+    if isinstance(node, list):
+        return sum(count_animated(value) for value in node)
+    return 0
+
+
+def analyze(doc, raw_size, images=None):
+    """
+    Static load-cost metrics of a parsed Lottie document
+
+    Args:
+        doc: Parsed Lottie JSON
+        raw_size: Size of the JSON in bytes
+        images: {asset path: bytes} for dotLottie archives
+
+    Returns:
+        Dict of metrics (json_bytes, base64_bytes, assets, bitmap_bytes,
+        active_layers, animated_properties, animated_properties_total, layers)
+    """
+    images = images or {}
+    assets = {asset.get('id'): asset for asset in doc.get('assets', [])}
+    base64_bytes = 0
+    bitmap_bytes = 0
+    image_count = 0
+    for asset in assets.values():
+        if not _is_image(asset):
+            continue
+        image_count += 1
+        if asset['p'].startswith('data:'):
+            base64_bytes += len(asset['p']) - asset['p'].index(',') - 1
+        width, height = asset.get('w', 0), asset.get('h', 0)
+        if not (width and height):
+            data = image_bytes(asset, images)
+            if data:
+                width, height = Image.open(io.BytesIO(data)).size
+        bitmap_bytes += width * height * 4
+
+    all_layers = list(doc.get('layers', []))
+    for asset in assets.values():
+        all_layers.extend(asset.get('layers', []))
+    animated = [count_animated({key: value for key, value in layer.items() if key != 'layers'})
+                for layer in all_layers]
+
+    times = set(_layer_times(doc.get('layers', []), assets))
+    return {
+        'json_bytes': raw_size,
+        'base64_bytes': base64_bytes,
+        'assets': image_count,
+        'bitmap_bytes': bitmap_bytes,
+        'active_layers': max((_active_layers(doc.get('layers', []), assets, t) for t in times), default=0),
+        'animated_properties': max(animated, default=0),
+        'animated_properties_total': sum(animated),
+        'layers': len(all_layers),
+    }
+
+
+def measure_load(raw, images=None, repeats=5):
+    """
+    Local parse and decode timings, a proxy for the on-device load cost
+
+    Args:
+        raw: Animation JSON bytes
+        images: {asset path: bytes} for dotLottie archives
+        repeats: Parse runs; the median is reported
+
+    Returns:
+        {'parse_ms': median json.loads time, 'decode_ms': time to decode every image asset}
+    """
+    parse_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        doc = json.loads(raw)
+        parse_times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for asset in doc.get('assets', []):
+        if _is_image(asset):
+            data = image_bytes(asset, images or {})
+            if data:
+                Image.open(io.BytesIO(data)).load()
+    decode = time.perf_counter() - start
+    return {'parse_ms': statistics.median(parse_times) * 1000, 'decode_ms': decode * 1000}
+
+
+def estimate_load_cost(path, timing=True):
+    """
+    Metrics of a Lottie JSON or dotLottie file (see analyze and measure_load)
+
+    Args:
+        path: Animation file
+        timing: Also benchmark JSON parse and image decode
+    """
+    raw, images = read_animation(path)
+    cost = analyze(json.loads(raw), len(raw), images)
+    if timing:
+        cost.update(measure_load(raw, images))
+    return cost
+
+
+def resolve_budgets(budgets=True):
+    """
+    Budgets to check: True for DEFAULT_BUDGETS, a dict to override some of
+    them (None disables a check), or None/False for no budgets
+    """
+    if not budgets:
+        return {}
+    resolved = dict(DEFAULT_BUDGETS)
+    if budgets is not True:
+        unknown = set(budgets) - set(DEFAULT_BUDGETS)
+        if unknown:
+            raise ValueError(f"Unknown budget(s): {', '.join(sorted(unknown))}")
+        resolved.update(budgets)
+    return {key: limit for key, limit in resolved.items() if limit is not None}
+
+
+def check_budgets(cost, budgets):
+    """Human-readable violations of resolved budgets (empty when within all of them)"""
+    violations = []
+    for key, limit in budgets.items():
+        value = cost.get(key)
+        if value is not None and value > limit:
+            violations.append(f"{METRIC_LABELS[key]} {_format(key, value)} > {_format(key, limit)}")
+    return violations
+
+
+def _format(key, value):
+    if key.endswith('_bytes'):
+        return format_bytes(value)
+    if key.endswith('_ms'):
+        return f"{value:.1f} ms"
+    return str(value)
+
+
+def print_cost(path, cost, violations=()):
+    """One report block per file: every metric, then the budgets it breaks"""
+    status = "❌" if violations else "✓"
+    print(f"{status} {Path(path).name}")
+    for key, label in METRIC_LABELS.items():
+        if key in cost:
+            extra = ""
+            if key == 'animated_properties':
+                extra = f" ({cost['animated_properties_total']} in {cost['layers']} layers)"
+            print(f"   {label + ':':<38}{_format(key, cost[key])}{extra}")
+    for violation in violations:
+        print(f"   ❌ over budget: {violation}")
+
+
+def enforce_budgets(path, budgets=True, timing=False):
+    """
+    Measure a converted animation and raise BudgetExceeded if it is over budget
+
+    Called by the converters with their `budgets` option so oversized
+    animations fail at conversion time. The file is left in place for inspection.
+
+    Returns:
+        The cost metrics
+    """
+    resolved = resolve_budgets(budgets)
+    timing = timing or 'parse_ms' in resolved or 'decode_ms' in resolved
+    cost = estimate_load_cost(path, timing=timing)
+    violations = check_budgets(cost, resolved)
+    print_cost(path, cost, violations)
+    if violations:
+        raise BudgetExceeded(path, violations)
+    return cost
+
+
+def parse_budget(text):
+    """KEY=VALUE budget from the command line; sizes may use KB/MB/GB, 'none' disables"""
+    key, sep, value = text.partition('=')
+    if not sep or key not in DEFAULT_BUDGETS:
+        raise argparse.ArgumentTypeError(
+            f"Expected KEY=VALUE with KEY one of {', '.join(DEFAULT_BUDGETS)}, got {text}")
+    value = value.strip()
+    if value.lower() == 'none':
+        return key, None
+    scale = 1
+    for unit, size in SIZE_UNITS.items():
+        if value.upper().endswith(unit):
+            value, scale = value[:-len(unit)], size
+            break
+    try:
+        number = float(value) * scale
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Not a number: {text}")
+    return key, int(number) if not key.endswith('_ms') else number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate the load cost of Lottie files and check budgets")
+    parser.add_argument('paths', nargs='*', default=[str(DEFAULT_ASSETS_DIR)],
+                        help="Lottie JSON/.lottie files or directories, searched recursively (default: app/src/main/assets)")
+    parser.add_argument('--budget', action='append', type=parse_budget, default=[],
+                        metavar='KEY=VALUE',
+                        help="Override a budget, e.g. json_bytes=500KB, parse_ms=20, active_layers=none")
+    parser.add_argument('--budget-file', help="JSON object of budgets (same keys, values in bytes/ms)")
+    parser.add_argument('--no-timing', action='store_true', help="Skip the parse/decode benchmark")
+    parser.add_argument('--json', action='store_true', help="Print the metrics as JSON instead")
+    args = parser.parse_args(argv)
+
+    budgets = {}
+    if args.budget_file:
+        budgets.update(json.loads(Path(args.budget_file).read_text()))
+    budgets.update(dict(args.budget))
+    resolved = resolve_budgets(budgets or True)
+
+    files = []
+    for name in args.paths:
+        path = Path(name)
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob('*') if p.suffix.lower() in ('.json', '.lottie')))
+        else:
+            files.append(path)
+
+    results = {}
+    failed = 0
+    for path in files:
+        cost = estimate_load_cost(path, timing=not args.no_timing)
+        violations = check_budgets(cost, resolved)
+        failed += bool(violations)
+        results[str(path)] = dict(cost, violations=violations)
+        if not args.json:
+            print_cost(path, cost, violations)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print("=" * 60)
+        print(f"{len(files) - failed}/{len(files)} within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,449 @@
+"""
+Post-hoc optimizer for existing Lottie files
+Re-encodes embedded images, merges duplicates, drops unused assets and redundant
+keyframes, rounds timing and writes compact JSON; a whole directory runs in parallel
+"""
+
+import argparse
+import base64
+import contextlib
+import io
+import json
+import math
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from frame_dedup import exact_hash
+from frame_pipeline import ordered_map
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+ANIMATION_TOOLS_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_ASSETS_DIR = ANIMATION_TOOLS_DIR.parent / "app" / "src" / "main" / "assets"
+DEFAULT_OUTPUT_DIR = ANIMATION_TOOLS_DIR / "output" / "optimized"
+
+LAYER_TIME_KEYS = ('ip', 'op', 'st')
+MARKER_TIME_KEYS = ('tm', 'dr')
+
+
+def image_fidelity(reference, candidate):
+    """
+    PSNR in dB between two RGBA arrays
+
+    Colour is compared premultiplied by alpha, so pixels that are invisible in
+    both images never count; alpha itself is compared as a fourth channel.
+    """
+    reference = reference.astype(np.float32)
+    candidate = candidate.astype(np.float32)
+    error = np.empty(reference.shape, dtype=np.float32)
+    np.subtract(reference[..., :3] * (reference[..., 3:] / 255),
+                candidate[..., :3] * (candidate[..., 3:] / 255), out=error[..., :3])
+    np.subtract(reference[..., 3], candidate[..., 3], out=error[..., 3])
+    mse = float(np.mean(error * error))
+    return math.inf if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+
+
+def _encode_webp(image, quality, method):
+    buffer = io.BytesIO()
+    image.save(buffer, format='WEBP', quality=quality, method=method)
+    return buffer.getvalue()
+
+
+def reencode_image(image, original_bytes, min_psnr=42.0, min_quality=30, max_quality=95, method=4):
+    """
+    Smallest lossy WebP of an image that stays within min_psnr of it
+
+    Binary-searches the lowest quality whose decoded result is at least
+    min_psnr dB from the image as it is stored now (so an already lossy asset
+    is only re-compressed as far as that stays invisible).
+
+    Args:
+        image: Decoded PIL image (RGB or RGBA)
+        original_bytes: Size of the stored image, the size to beat
+
+    Returns:
+        (webp bytes, quality, psnr) or None if nothing beats the original
+    """
+    reference = np.asarray(image.convert('RGBA'))
+    best = None
+    low, high = min_quality, max_quality
+    while low <= high:
+        quality = (low + high) // 2
+        data = _encode_webp(image, quality, method)
+        decoded = np.asarray(Image.open(io.BytesIO(data)).convert('RGBA'))
+        psnr = image_fidelity(reference, decoded)
+        if psnr >= min_psnr:
+            best = (data, quality, psnr)
+            high = quality - 1
+        else:
+            low = quality + 1
+    if best is None or len(best[0]) >= original_bytes:
+        return None
+    return best
+
+
+def decode_data_uri(data_uri):
+    """(mime type, bytes) of a base64 data: URI, or None for anything else"""
+    if not isinstance(data_uri, str) or not data_uri.startswith('data:'):
+        return None
+    header, _, payload = data_uri.partition(',')
+    if not header.endswith(';base64'):
+        return None
+    return header[5:-7], base64.b64decode(payload)
+
+
+def referenced_assets(doc):
+    """Ids of the assets reachable from the root layers, through nested precomps"""
+    assets = {asset.get('id'): asset for asset in doc.get('assets', [])}
+    used = set()
+    pending = [doc.get('layers', [])]
+    while pending:
+        for layer in pending.pop():
+            ref = layer.get('refId')
+            if ref is None or ref in used:
+                continue
+            used.add(ref)
+            nested = assets.get(ref, {}).get('layers')
+            if nested:
+                pending.append(nested)
+    return used
+
+
+def _all_layers(doc):
+    yield from doc.get('layers', [])
+    for asset in doc.get('assets', []):
+        yield from asset.get('layers', [])
+
+
+def _moves(tangent):
+    """True for a spatial tangent (to/ti) that bends the path between two keyframes"""
+    return isinstance(tangent, list) and any(value for value in tangent if isinstance(value, (int, float)))
+
+
+def simplify_keyframes(prop):
+    """
+    Remove keyframes that do not change an animated property's value
+
+    A keyframe in the middle of a run where the value stays the same (hold or
+    equal start/end values without spatial tangents) is dropped and the run is
+    held by the keyframe before it. A property that never changes becomes a
+    static value. Works with both keyframe layouts (with and without "e").
+
+    Args:
+        prop: Animated property dict ({"a": 1, "k": [keyframes]}), changed in place
+
+    Returns:
+        (keyframes removed, True if the property became static)
+    """
+    keyframes = prop['k']
+    count = len(keyframes)
+    if count < 2 or any('s' not in keyframe for keyframe in keyframes[:-1]):
+        return 0, False
+
+    def constant(i):
+        keyframe = keyframes[i]
+        if keyframe.get('h') == 1:
+            return True
+        if _moves(keyframe.get('to')) or _moves(keyframe.get('ti')):
+            return False
+        end = keyframe['e'] if 'e' in keyframe else keyframes[i + 1].get('s')
+        return end == keyframe['s']
+
+    flat = [constant(i) for i in range(count - 1)]
+    first = keyframes[0]['s']
+    if all(flat) and all(keyframe.get('s', first) == first for keyframe in keyframes):
+        prop['a'] = 0
+        prop['k'] = first[0] if isinstance(first, list) and len(first) == 1 else first
+        return count, True
+
+    kept = [keyframes[0]]
+    kept_flat = flat[0]
+    for i in range(1, count - 1):
+        keyframe = keyframes[i]
+        previous = kept[-1]
+        if kept_flat and flat[i] and keyframe['s'] == previous['s']:
+            if keyframe.get('h') == 1 and previous.get('h') != 1 and 'e' not in previous:
+                # The next value may differ: keep holding instead of easing towards it
+                previous['h'] = 1
+            continue
+        kept.append(keyframe)
+        kept_flat = flat[i]
+    kept.append(keyframes[-1])
+    prop['k'] = kept
+    return count - len(kept), False
+
+
+def _simplify_all(node, stats):
+    if isinstance(node, dict):
+        keyframes = node.get('k')
+        if (node.get('a') == 1 and 'x' not in node and isinstance(keyframes, list) and keyframes
+                and all(isinstance(keyframe, dict) and 't' in keyframe for keyframe in keyframes)):
+            removed, static = simplify_keyframes(node)
+            stats['keyframes'] += removed
+            stats['static'] += static
+        for value in node.values():
+            _simplify_all(value, stats)
+    elif isinstance(node, list):
+        for value in node:
+            _simplify_all(value, stats)
+
+
+def _round_time(value, digits):
+    if isinstance(value, float):
+        return round(value, digits)
+    return value
+
+
+def round_timing(doc, digits=3):
+    """Round in/out points, start times, keyframe times and markers to `digits` decimals"""
+    def visit(node):
+        if isinstance(node, dict):
+            if 'ty' in node or node is doc:
+                for key in LAYER_TIME_KEYS:
+                    if key in node:
+                        node[key] = _round_time(node[key], digits)
+            if node.get('a') == 1 and isinstance(node.get('k'), list):
+                for keyframe in node['k']:
+                    if isinstance(keyframe, dict) and 't' in keyframe:
+                        keyframe['t'] = _round_time(keyframe['t'], digits)
+            for value in node.values():
+                visit(value)
+        elif isinstance(node, list):
+            for value in node:
+                visit(value)
+
+    visit(doc)
+    for marker in doc.get('markers', []):
+        for key in MARKER_TIME_KEYS:
+            if key in marker:
+                marker[key] = _round_time(marker[key], digits)
+
+
+def compact_numbers(node, precision=None):
+    """
+    Whole-number floats as ints (128.0 -> 128) and, with precision set, every
+    other float rounded to that many decimals
+    """
+    if isinstance(node, dict):
+        return {key: compact_numbers(value, precision) for key, value in node.items()}
+    if isinstance(node, list):
+        return [compact_numbers(value, precision) for value in node]
+    if isinstance(node, float) and math.isfinite(node):
+        if precision is not None:
+            node = round(node, precision)
+        if node.is_integer():
+            return int(node)
+    return node
+
+
+def optimize_lottie(doc, min_psnr=42.0, min_quality=30, max_quality=95, time_precision=3,
+                    precision=None):
+    """
+    Optimize a parsed Lottie document in place
+
+    Args:
+        doc: Parsed Lottie JSON
+        min_psnr: Quality floor for re-encoded images, in dB against the
+                  stored image (None = never re-encode)
+        min_quality, max_quality: WebP quality range searched per image
+        time_precision: Decimals kept on timing values
+        precision: Decimals kept on every other float (None = unchanged)
+
+    Returns:
+        (optimized doc, list of per-asset (id, old bytes, new bytes, action),
+         {'keyframes': removed, 'static': properties made static})
+    """
+    assets = doc.get('assets', [])
+    used = referenced_assets(doc)
+    report = []
+    kept_assets = []
+    by_pixels = {}  # exact pixel hash -> asset id
+    renamed = {}  # duplicate asset id -> id of the asset it repeats
+
+    for asset in assets:
+        asset_id = asset.get('id')
+        old_bytes = len(asset.get('p', '')) if isinstance(asset.get('p'), str) else 0
+        if asset_id not in used:
+            report.append((asset_id, old_bytes, 0, 'unused, dropped'))
+            continue
+        embedded = decode_data_uri(asset.get('p'))
+        if embedded is None:
+            kept_assets.append(asset)
+            continue
+
+        mime_type, data = embedded
+        image = Image.open(io.BytesIO(data))
+        if getattr(image, 'n_frames', 1) > 1:
+            kept_assets.append(asset)
+            report.append((asset_id, old_bytes, old_bytes, 'animated image, kept'))
+            continue
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info
+                              else 'RGB')
+
+        key = exact_hash(image)
+        if key in by_pixels:
+            renamed[asset_id] = by_pixels[key]
+            report.append((asset_id, old_bytes, 0, f'duplicate of {by_pixels[key]}'))
+            continue
+        by_pixels[key] = asset_id
+        kept_assets.append(asset)
+
+        result = None
+        if min_psnr is not None:
+            result = reencode_image(image, len(data), min_psnr, min_quality, max_quality)
+        if result is None:
+            report.append((asset_id, old_bytes, old_bytes, f'{mime_type}, kept'))
+            continue
+        webp, quality, psnr = result
+        asset['p'] = "data:image/webp;base64," + base64.b64encode(webp).decode()
+        asset['e'] = 1
+        report.append((asset_id, old_bytes, len(asset['p']), f'webp q{quality} ({psnr:.1f} dB)'))
+
+    if 'assets' in doc:
+        doc['assets'] = kept_assets
+    if renamed:
+        for layer in _all_layers(doc):
+            if layer.get('refId') in renamed:
+                layer['refId'] = renamed[layer['refId']]
+
+    stats = {'keyframes': 0, 'static': 0}
+    _simplify_all(doc.get('layers', []), stats)
+    for asset in kept_assets:
+        _simplify_all(asset.get('layers', []), stats)
+
+    round_timing(doc, time_precision)
+    return compact_numbers(doc, precision), report, stats
+
+
+def optimize_file(input_path, output_path, quiet=False, **settings):
+    """
+    Optimize one Lottie JSON file and print what changed
+
+    The optimized document is only written if it is smaller; otherwise the
+    original is copied unchanged.
+
+    Args:
+        input_path: Lottie JSON to read
+        output_path: Where to write the result (may equal input_path)
+        quiet: Skip the per-asset lines
+        **settings: optimize_lottie options
+
+    Returns:
+        (original bytes, written bytes)
+    """
+    input_path, output_path = Path(input_path), Path(output_path)
+    raw = input_path.read_bytes()
+    start = time.perf_counter()
+    doc, report, stats = optimize_lottie(json.loads(raw), **settings)
+    optimized = json.dumps(doc, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if len(optimized) < len(raw):
+        output_path.write_bytes(optimized)
+    elif output_path.resolve() != input_path.resolve():
+        shutil.copyfile(input_path, output_path)
+    written = min(len(optimized), len(raw))
+
+    print(f"📦 {input_path.name}: {len(raw) / 1024:.1f} KB -> {written / 1024:.1f} KB "
+          f"({(written - len(raw)) / len(raw):+.0%}) in {time.perf_counter() - start:.1f}s")
+    if not quiet:
+        for asset_id, old_bytes, new_bytes, action in report:
+            print(f"   {str(asset_id):<16}{old_bytes / 1024:>9.1f} KB ->{new_bytes / 1024:>9.1f} KB  {action}")
+    image_saving = sum(old - new for _, old, new, _ in report)
+    print(f"   images/assets: -{image_saving / 1024:.1f} KB, structure and numbers: "
+          f"-{(len(raw) - len(optimized) - image_saving) / 1024:.1f} KB "
+          f"({stats['keyframes']} keyframes dropped, {stats['static']} properties made static)")
+    if len(optimized) >= len(raw):
+        print("   no smaller: original kept")
+    return len(raw), written
+
+
+def _optimize_task(task):
+    """Worker: optimize one file with its output captured; returns (sizes or None, log, error)"""
+    input_path, output_path, quiet, settings = task
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            sizes = optimize_file(input_path, output_path, quiet=quiet, **settings)
+        return sizes, log.getvalue(), None
+    except Exception as e:
+        return None, log.getvalue(), f"{type(e).__name__}: {e}"
+
+
+def optimize_directory(input_dir, output_dir, workers=None, quiet=False, **settings):
+    """
+    Optimize every Lottie JSON file under a directory on a process pool
+
+    Subdirectories are included and mirrored in output_dir. Files are handed
+    out largest first, so the long ones start early.
+
+    Returns:
+        List of (path, original bytes, written bytes or None, error or None)
+    """
+    input_dir = Path(input_dir)
+    paths = sorted(input_dir.rglob("*.json"), key=lambda path: path.stat().st_size, reverse=True)
+    workers = workers or os.cpu_count() or 1
+    tasks = [(path, Path(output_dir) / path.relative_to(input_dir), quiet, settings) for path in paths]
+
+    print(f"Optimizing {len(paths)} Lottie files in {input_dir} ({workers} workers)")
+    start = time.perf_counter()
+    results = []
+    for path, (sizes, log, error) in zip(paths, ordered_map(_optimize_task, tasks, workers)):
+        print(log, end='')
+        if error is not None:
+            print(f"❌ {path.name}: {error}")
+            results.append((path, path.stat().st_size, None, error))
+        else:
+            results.append((path, sizes[0], sizes[1], None))
+
+    before = sum(size for _, size, written, _ in results if written is not None)
+    after = sum(written for _, _, written, _ in results if written is not None)
+    print("=" * 60)
+    if before:
+        print(f"Total: {before / 1024 / 1024:.2f} MB -> {after / 1024 / 1024:.2f} MB "
+              f"({(after - before) / before:+.0%}) in {time.perf_counter() - start:.1f}s")
+    print(f"Output: {output_dir}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shrink existing Lottie JSON files")
+    parser.add_argument('source', nargs='?', default=str(DEFAULT_ASSETS_DIR),
+                        help="Lottie file or directory (default: app/src/main/assets)")
+    parser.add_argument('--output', default=None,
+                        help="Output file or directory (default: animation-tools/output/optimized)")
+    parser.add_argument('--in-place', action='store_true',
+                        help="Overwrite the inputs (only files that got smaller change)")
+    parser.add_argument('--workers', type=int, default=None, help="Parallel files (default: all cores)")
+    parser.add_argument('--min-psnr', type=float, default=42.0,
+                        help="Quality floor for re-encoded images in dB (default: 42)")
+    parser.add_argument('--no-reencode', action='store_true', help="Keep every image as it is")
+    parser.add_argument('--time-precision', type=int, default=3, help="Decimals kept on timing values")
+    parser.add_argument('--precision', type=int, default=None,
+                        help="Decimals kept on all other floats (default: unchanged)")
+    parser.add_argument('--quiet', action='store_true', help="Only print one line per file")
+    args = parser.parse_args(argv)
+
+    settings = {'min_psnr': None if args.no_reencode else args.min_psnr,
+                'time_precision': args.time_precision, 'precision': args.precision}
+    source = Path(args.source)
+    if source.is_dir():
+        output = source if args.in_place else Path(args.output or DEFAULT_OUTPUT_DIR)
+        results = optimize_directory(source, output, workers=args.workers, quiet=args.quiet, **settings)
+        return 1 if any(error for *_, error in results) else 0
+
+    if not source.exists():
+        print(f"Error: not found: {source}")
+        return 1
+    output = source if args.in_place else Path(args.output or DEFAULT_OUTPUT_DIR / source.name)
+    optimize_file(source, output, quiet=args.quiet, **settings)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,777 @@
+"""
+Shared Lottie writer for the animation tools
+Builds image assets, image layers and the frame timeline used by every converter
+(mp4_to_lottie, gif_to_lottie, create_sharingan_from_image) and writes
+image-sequence animations one frame at a time so converters never hold every
+encoded asset in memory at once. Output is either plain Lottie JSON with
+inline data: URIs or a dotLottie (.lottie) zip with the images as separate files
+"""
+
+import base64
+import hashlib
+import io
+import json
+import math
+import os
+import shutil
+import time
+import zipfile
+
+from frame_pipeline import StageStats, ordered_map, timed_call
+import profiler
+
+
+class StreamingLottieWriter:
+    """
+    Write an image-sequence Lottie animation frame by frame
+
+    Each asset is serialized to a spool file next to the output as soon as it
+    is added; only the layer list (asset id + duration) stays in memory.
+    close() assembles the final file, which is byte-identical to json.dump of
+    the equivalent in-memory dict.
+
+    Layers may reference any earlier asset, and extend_layer() lengthens the
+    last layer instead of adding a new one, so repeated frames cost neither
+    a second asset nor a second layer.
+
+    For delta encoding (frame_delta.DeltaEncoder) a layer can also be a patch
+    placed at rect=(x, y, w, h) over the last full-canvas layer, which then
+    stays visible until the next full one. A layer with asset id None shows
+    that keyframe alone.
+
+    Usage:
+        with StreamingLottieWriter("out.json", fps=20, name="MP4 Animation") as writer:
+            for frame, duration in frames:
+                writer.add_frame(frame_to_base64(frame), frame.size, duration)
+    """
+
+    def __init__(self, output_path, fps=None, name="Animation", version="5.7.4"):
+        self.output_path = str(output_path)
+        self.fps = fps
+        self.name = name
+        self.version = version
+        self.width = None
+        self.height = None
+        self.layers = []  # [asset_id, duration_ms, rect, cut]
+        self.asset_count = 0
+        self.frame_count = 0
+        self.bytes_written = 0
+        self._spool_path = self.output_path + ".assets.part"
+        self._spool = open(self._spool_path, 'w')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    @property
+    def durations(self):
+        return [layer[1] for layer in self.layers]
+
+    def add_asset(self, data_uri, size):
+        """
+        Write one image asset
+
+        Args:
+            data_uri: Encoded image as a data: URI
+            size: (width, height) of the image
+
+        Returns:
+            The new asset id
+        """
+        if self.width is None:
+            self.width, self.height = size
+
+        asset_id = f"image_{self.asset_count}"
+        if self.asset_count:
+            self._spool.write(',')
+        self._spool.write(json.dumps(
+            image_asset(asset_id, size[0], size[1], data_uri), separators=(',', ':')
+        ))
+        self.asset_count += 1
+        return asset_id
+
+    def add_layer(self, asset_id, duration_ms, rect=None, cut=False):
+        """
+        Show an existing asset for duration_ms after the previous layer
+
+        Args:
+            rect: (x, y, w, h) to place a delta patch over the last keyframe
+                  (None = full-canvas layer, which starts a new keyframe)
+            cut: Mask the patch's rect out of the keyframe underneath
+        """
+        self.layers.append([asset_id, duration_ms, rect, cut])
+        self.frame_count += 1
+
+    def repeat_layer(self, asset_id, duration_ms, rect=None, cut=False):
+        """Show an existing asset again, extending the last layer if it shows the same"""
+        last = self.layers[-1] if self.layers else None
+        if last is not None and last[2] == rect and (last[0] == asset_id or
+                                                     (asset_id is None and rect is None)):
+            self.extend_layer(duration_ms)
+        else:
+            self.add_layer(asset_id, duration_ms, rect, cut)
+
+    def extend_layer(self, duration_ms):
+        """Hold the last layer for another duration_ms"""
+        self.layers[-1][1] += duration_ms
+        self.frame_count += 1
+
+    def add_frame(self, data_uri, size, duration_ms, rect=None, cut=False):
+        """
+        Append one frame as a new asset and layer
+
+        Args:
+            data_uri: Encoded image as a data: URI
+            size: (width, height) of the frame
+            duration_ms: How long the frame is shown
+            rect, cut: Delta patch placement (see add_layer)
+        """
+        self.add_layer(self.add_asset(data_uri, size), duration_ms, rect, cut)
+
+    def close(self):
+        """
+        Assemble the final Lottie file
+
+        Returns:
+            Path to the created Lottie file
+        """
+        self._spool.close()
+
+        if not self.layers:
+            os.remove(self._spool_path)
+            raise ValueError("No frames to process")
+
+        durations = self.durations
+        fps = self.fps
+        if fps is None:
+            fps = default_fps(durations, self.frame_count)
+
+        self.fps = fps
+
+        with open(self.output_path, 'w') as f:
+            self._write_document(f)
+
+        os.remove(self._spool_path)
+        self.bytes_written = os.path.getsize(self.output_path)
+        return self.output_path
+
+    def _write_document(self, f):
+        """Write the animation JSON (header, spooled assets, layers) to a text file"""
+        ranges, total_frames = build_timeline(self.durations, self.fps)
+        header = lottie_document(self.width, self.height, self.fps, total_frames, self.name,
+                                 version=self.version)
+        del header["assets"], header["layers"], header["markers"]
+
+        f.write(json.dumps(header, separators=(',', ':'))[:-1])
+        f.write(',"assets":[')
+        with open(self._spool_path, 'r') as spool:
+            shutil.copyfileobj(spool, f)
+        f.write('],"layers":[')
+
+        for i, layer in enumerate(self._layer_dicts(ranges)):
+            if i:
+                f.write(',')
+            f.write(json.dumps(layer, separators=(',', ':')))
+        f.write('],"markers":[]}')
+
+    def _layer_dicts(self, ranges):
+        """
+        Lottie layers in drawing order
+
+        Each keyframe is followed by the patches drawn over it; the patches
+        are emitted first because earlier layers render on top.
+        """
+        index = 0
+        segment = []
+        for i, layer in enumerate(self.layers + [None]):
+            if segment and (layer is None or (layer[2] is None and layer[0] is not None)):
+                for j in segment[1:]:
+                    asset_id, _, rect, _ = self.layers[j]
+                    if asset_id is None:
+                        continue
+                    x, y, width, height = rect
+                    start_frame, end_frame = ranges[j]
+                    yield image_layer(index, asset_id, start_frame, end_frame, width, height,
+                                      position=(x + width / 2, y + height / 2))
+                    index += 1
+
+                key = segment[0]
+                start_frame, end_frame = ranges[key][0], ranges[segment[-1]][1]
+                layer_dict = image_layer(index, self.layers[key][0], start_frame, end_frame,
+                                         self.width, self.height)
+                cuts = [(ranges[j][0], self.layers[j][2] if self.layers[j][3] else None)
+                        for j in segment]
+                if any(rect for _, rect in cuts):
+                    layer_dict["hasMask"] = True
+                    layer_dict["masksProperties"] = [subtract_mask(cuts)]
+                yield layer_dict
+                index += 1
+                segment = []
+            segment.append(i)
+
+    def abort(self):
+        """Discard the partial output"""
+        self._spool.close()
+        if os.path.exists(self._spool_path):
+            os.remove(self._spool_path)
+
+
+class DotLottieWriter(StreamingLottieWriter):
+    """
+    StreamingLottieWriter that produces a dotLottie (.lottie) archive
+
+    Each image goes into the zip as a binary file under images/ (stored, not
+    recompressed) and the animation JSON only references it by name, so it
+    stays small and players can parse it before decoding any image. Images
+    with identical bytes are stored once even when they belong to different
+    assets.
+    """
+
+    def __init__(self, output_path, fps=None, name="Animation", version="5.7.4",
+                 animation_id=None):
+        super().__init__(output_path, fps=fps, name=name, version=version)
+        if animation_id is None:
+            animation_id = os.path.splitext(os.path.basename(self.output_path))[0]
+        self.animation_id = animation_id
+        self.image_count = 0
+        self._images = {}  # content digest -> file name
+        self._zip = zipfile.ZipFile(self.output_path, 'w', zipfile.ZIP_DEFLATED)
+
+    def add_asset(self, data_uri, size):
+        if self.width is None:
+            self.width, self.height = size
+
+        file_name, data = store_image(self._zip, self._images, data_uri)
+        if data is not None:
+            self.image_count += 1
+        asset_id = f"image_{self.asset_count}"
+        if self.asset_count:
+            self._spool.write(',')
+        self._spool.write(json.dumps(
+            image_asset(asset_id, size[0], size[1], file_name, folder="/images/"),
+            separators=(',', ':')
+        ))
+        self.asset_count += 1
+        return asset_id
+
+    def close(self):
+        self._spool.close()
+
+        if not self.layers:
+            self.abort()
+            raise ValueError("No frames to process")
+
+        if self.fps is None:
+            self.fps = default_fps(self.durations, self.frame_count)
+
+        with self._zip.open(f"animations/{self.animation_id}.json", 'w') as raw:
+            with io.TextIOWrapper(raw, encoding='utf-8') as f:
+                self._write_document(f)
+        self._zip.writestr("manifest.json", json.dumps(dotlottie_manifest(self.animation_id)))
+        self._zip.close()
+
+        os.remove(self._spool_path)
+        self.bytes_written = os.path.getsize(self.output_path)
+        return self.output_path
+
+    def abort(self):
+        super().abort()
+        self._zip.close()
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+
+def write_lottie_streaming(frames, output_path, encode, fps=None, name="Animation",
+                           workers=1, stage_stats=None, dedup=None, container='json',
+                           delta=None, rate_control=None):
+    """
+    Stream frames through encode straight into a Lottie file
+
+    Only a handful of frames (the encode window) are alive at any time, so
+    peak memory does not grow with clip length.
+
+    Args:
+        frames: Iterable of (PIL Image, duration_ms), e.g. a frame generator
+        output_path: Path to save Lottie JSON
+        encode: Function turning a PIL Image into a data: URI
+        fps: Frames per second (if None, calculated from durations)
+        name: Animation name stored in the file
+        workers: Thread pool size for encoding (1 = serial)
+        stage_stats: Optional list that receives StageStats for the encode stage
+        dedup: Optional frame_dedup.AssetDeduplicator. Repeated frames then
+               reuse the existing asset (and are never encoded again), and
+               consecutive repeats merge into one longer-held layer.
+        container: 'json' (inline data: URIs) or 'dotlottie' (.lottie zip with
+                   separate image files; the output suffix becomes .lottie)
+        delta: Optional frame_delta.DeltaEncoder. Frames between keyframes are
+               then stored as small patches over the keyframe when they
+               encode smaller than the full frame and the frame does not
+               repeat an earlier asset (dedup then applies to patches too).
+        rate_control: Optional rate_control.WebPRateController. Replaces
+                      encode and sizes every image to fit its byte budget;
+                      needs all frames up front, so memory is no longer flat.
+
+    Returns:
+        Path to created Lottie file, or None if there were no frames
+    """
+    if container == 'dotlottie':
+        output_path = dotlottie_path(output_path)
+
+    print("Encoding frames (this may take a while)...")
+
+    encode_stats = StageStats('encode')
+    encode_start = time.perf_counter()
+    new_assets = [0]
+
+    def new_asset_id():
+        asset_id = f"image_{new_assets[0]}"
+        new_assets[0] += 1
+        return asset_id
+
+    def lookup(frame):
+        with profiler.stage('asset_dedup'):
+            return dedup.lookup(frame)
+
+    def store(image, duration, rect=None, cut=False, found=None):
+        # Full frames and delta patches alike reuse an identical earlier asset
+        if dedup is None:
+            return image, duration, new_asset_id(), rect, cut
+        asset_id, key = found or lookup(image)
+        if asset_id is not None:
+            return None, duration, asset_id, rect, cut
+        asset_id = new_asset_id()
+        dedup.remember(key, asset_id, image.size)
+        return image, duration, asset_id, rect, cut
+
+    pre_encoded = {}  # id(image) -> (image, data URI, seconds) encoded while planning
+
+    def plan_delta(frame):
+        # Patch-vs-keyframe sizing encodes both images; the caller keeps the stored one
+        encodes = {}
+
+        def encode_once(image):
+            if id(image) not in encodes:
+                encodes[id(image)] = (image,) + timed_call(encode, image, clock=time.thread_time)
+            return encodes[id(image)][1]
+
+        with profiler.stage('delta'):
+            kind, image, rect, cut = delta.plan(frame, encode=encode_once)
+        return kind, image, rect, cut, encodes
+
+    def planned():
+        # Runs in order on this thread, so asset ids can be assigned before
+        # the (possibly parallel) encode finishes
+        patch_id = None
+        for frame, duration in frames:
+            if delta is None:
+                yield store(frame, duration)
+                continue
+            found = lookup(frame) if dedup is not None else None
+            if found and found[0] is not None:
+                # Reusing an existing asset is free, cheaper than any patch
+                delta.keyframe(frame)
+                yield store(frame, duration, found=found)
+                continue
+            kind, image, rect, cut, encodes = plan_delta(frame)
+            if kind == 'key':
+                item = store(frame, duration, found=found)
+            elif kind == 'patch':
+                item = store(image, duration, rect, cut)
+                patch_id = item[2]
+            elif kind == 'repeat':
+                item = None, duration, patch_id, rect, cut
+            else:  # 'hold': the keyframe alone
+                item = None, duration, None, None, False
+            if item[0] is not None and id(item[0]) in encodes:
+                pre_encoded[id(item[0])] = encodes[id(item[0])]
+            yield item
+
+    def encode_task(item):
+        frame, duration, asset_id, rect, cut = item
+        if frame is None:
+            return None, None, duration, asset_id, rect, cut, None
+        entry = pre_encoded.pop(id(frame), None)
+        if entry is not None:
+            return entry[1], frame.size, duration, asset_id, rect, cut, entry[2]
+        data_uri, seconds = timed_call(encode, frame, clock=time.thread_time)
+        return data_uri, frame.size, duration, asset_id, rect, cut, seconds
+
+    items = planned()
+    if rate_control is not None:
+        items = list(items)
+        pre_encoded.clear()  # re-encoded at the controller's quality
+        new_frames = [item[0] for item in items if item[0] is not None]
+        if new_frames:
+            with profiler.stage('rate_control', frames=len(new_frames)):
+                rate_control.prepare(new_frames, estimate_fixed_bytes(items, new_frames[0].size,
+                                                                      name, container))
+        encode = rate_control.encode
+
+    if workers > 1:
+        encoded = ordered_map(encode_task, items, workers, kind='thread')
+    else:
+        encoded = (encode_task(item) for item in items)
+
+    writer_class = DotLottieWriter if container == 'dotlottie' else StreamingLottieWriter
+    writer = writer_class(output_path, fps=fps, name=name)
+    try:
+        for data_uri, size, duration, asset_id, rect, cut, seconds in encoded:
+            if data_uri is None:
+                # Repeat of an existing asset (or a keyframe held with nothing over it)
+                writer.repeat_layer(asset_id, duration, rect, cut)
+                continue
+            if writer.asset_count % 10 == 0:
+                print(f"Encoding frame {writer.frame_count + 1}...")
+            encode_stats.add(seconds)
+            with profiler.stage('write'):
+                writer.add_frame(data_uri, size, duration, rect, cut)
+    except BaseException:
+        writer.abort()
+        raise
+
+    encode_stats.wall = time.perf_counter() - encode_start
+    if stage_stats is not None:
+        stage_stats.append(encode_stats)
+
+    if not writer.layers:
+        writer.abort()
+        return None
+
+    print(f"Saving Lottie animation to: {output_path}")
+    with profiler.stage('write', frames=0) as write:
+        writer.close()
+        write.add_bytes(os.path.getsize(output_path))
+    print(f"Animation specs: {writer.frame_count} frames, {writer.fps} FPS, "
+          f"{sum(writer.durations)}ms duration")
+    if dedup is not None:
+        print(f"Deduplication: {writer.asset_count} assets, {len(writer.layers)} layers "
+              f"({dedup.exact_hits} exact + {dedup.perceptual_hits} perceptual repeats)")
+    if delta is not None:
+        delta.print_report()
+    if rate_control is not None:
+        rate_control.print_report()
+    if container == 'dotlottie':
+        print(f"dotLottie: {writer.image_count} image files for {writer.asset_count} assets")
+    print(f"✓ Lottie animation created: {writer.bytes_written / 1024:.2f} KB")
+    return writer.output_path
+
+
+def ms_to_frame(ms, fps):
+    """Nearest whole frame number for a time in milliseconds"""
+    return int(math.floor(ms * fps / 1000 + 0.5))
+
+
+def default_fps(durations_ms, frame_count=None):
+    """
+    Frame rate implied by a list of frame durations, clamped to 10-60 fps
+
+    frame_count is the number of source frames when some were merged into
+    longer layers, so merging does not change the inferred rate.
+    """
+    total_duration_ms = sum(durations_ms)
+    if frame_count is None:
+        frame_count = len(durations_ms)
+    fps = int(1000 * frame_count / total_duration_ms)
+    return max(10, min(fps, 60))
+
+
+def build_timeline(durations_ms, fps):
+    """
+    Integer frame range for every entry of a duration list
+
+    Uses a running prefix sum of the durations (O(n)) and rounds each
+    cumulative time to a whole frame, so consecutive layers share their
+    boundary exactly and no gaps or overlaps open up from rounding.
+
+    Every entry with a positive duration lasts at least one frame. When
+    rounding would give an entry none (e.g. 33 ms frames at 30 fps drift
+    below the frame grid), it ends one frame after it starts and the
+    following entries absorb the difference from the running total. The
+    total stays within half a frame of the real duration unless entries
+    shorter than a frame force it longer.
+
+    Args:
+        durations_ms: Frame durations in milliseconds
+        fps: Animation frame rate
+
+    Returns:
+        ([(start_frame, end_frame), ...], total_frames)
+    """
+    ranges = []
+    elapsed_ms = 0
+    start_frame = 0
+    for duration in durations_ms:
+        elapsed_ms += duration
+        end_frame = ms_to_frame(elapsed_ms, fps)
+        if duration > 0 and end_frame <= start_frame:
+            # Carry the rounding remainder forward instead of dropping the frame
+            end_frame = start_frame + 1
+        ranges.append((start_frame, end_frame))
+        start_frame = end_frame
+    return ranges, start_frame
+
+
+def image_asset(asset_id, width, height, data_uri, folder=""):
+    """
+    Image asset entry
+
+    data_uri is an inline data: URI, or a file name inside `folder` for
+    assets stored next to the animation (dotLottie).
+    """
+    return {
+        "id": asset_id,
+        "w": width,
+        "h": height,
+        "u": folder,
+        "p": data_uri,
+        "e": 0
+    }
+
+
+def image_layer(index, asset_id, start_frame, end_frame, width, height, position=None):
+    """
+    Image layer that shows asset_id between start_frame and end_frame
+
+    The image is centred on `position` (default: its own centre, i.e. placed
+    at the canvas origin).
+    """
+    if position is None:
+        position = (width/2, height/2)
+    return {
+        "ddd": 0,
+        "ind": index,
+        "ty": 2,  # Image layer
+        "nm": f"Frame {index}",
+        "refId": asset_id,
+        "sr": 1,
+        "ks": {
+            "o": {
+                "a": 1,
+                "k": [
+                    {"t": start_frame, "s": [100], "e": [100]},
+                    {"t": end_frame, "s": [100], "e": [0]}
+                ]
+            },
+            "r": {"a": 0, "k": 0},
+            "p": {"a": 0, "k": [position[0], position[1], 0]},
+            "a": {"a": 0, "k": [width/2, height/2, 0]},
+            "s": {"a": 0, "k": [100, 100, 100]}
+        },
+        "ao": 0,
+        "ip": start_frame,
+        "op": end_frame,
+        "st": 0,
+        "bm": 0
+    }
+
+
+def estimate_fixed_bytes(items, size, name, container='json'):
+    """
+    Upper bound on the non-image bytes of an animation (header, asset entries, layers)
+
+    Args:
+        items: Planned (frame, duration, asset_id, rect, cut) entries, one per layer
+        size: (width, height) of the canvas
+    """
+    width, height = size
+    compact = (',', ':')
+    total = len(json.dumps(lottie_document(width, height, 60, 10 ** 6, name), separators=compact))
+    for frame, _, asset_id, rect, cut in items:
+        if frame is not None:
+            total += len(json.dumps(image_asset(asset_id, width, height, ""), separators=compact)) + 1
+        layer = image_layer(len(items), asset_id, 10 ** 6, 10 ** 6, width, height)
+        total += len(json.dumps(layer, separators=compact)) + 1
+        if cut:
+            total += len(json.dumps(subtract_mask([(10 ** 6, rect)]), separators=compact))
+    if container == 'dotlottie':
+        # Zip headers per image file plus the manifest
+        total += sum(100 for item in items if item[0] is not None) + 400
+    return total
+
+
+def rect_path(x, y, width, height):
+    """Closed rectangular Lottie shape path"""
+    return {
+        "i": [[0, 0], [0, 0], [0, 0], [0, 0]],
+        "o": [[0, 0], [0, 0], [0, 0], [0, 0]],
+        "v": [[x, y], [x + width, y], [x + width, y + height], [x, y + height]],
+        "c": True
+    }
+
+
+def subtract_mask(cuts):
+    """
+    Layer mask that hides a different rectangle at different times
+
+    Args:
+        cuts: [(frame, (x, y, w, h) or None), ...] in time order; each rect
+              is held until the next entry (None = hide nothing)
+    """
+    return {
+        "inv": False,
+        "mode": "s",
+        "pt": {
+            "a": 1,
+            "k": [{"t": frame, "s": [rect_path(*(rect or (0, 0, 0, 0)))], "h": 1}
+                  for frame, rect in cuts]
+        },
+        "o": {"a": 0, "k": 100},
+        "x": {"a": 0, "k": 0},
+        "nm": "Delta cut-out"
+    }
+
+
+def lottie_document(width, height, fps, total_frames, name, assets=None, layers=None,
+                    version="5.7.4"):
+    """Top-level Lottie JSON structure"""
+    return {
+        "v": version,
+        "fr": fps,
+        "ip": 0,
+        "op": total_frames,
+        "w": width,
+        "h": height,
+        "nm": name,
+        "ddd": 0,
+        "assets": assets or [],
+        "layers": layers or [],
+        "markers": []
+    }
+
+
+def save_lottie(lottie_data, output_path):
+    """
+    Write a Lottie dict as compact JSON
+
+    Returns:
+        Size of the written file in bytes
+    """
+    with open(output_path, 'w') as f:
+        json.dump(lottie_data, f, separators=(',', ':'))
+    return os.path.getsize(output_path)
+
+
+IMAGE_EXTENSIONS = {'image/webp': 'webp', 'image/png': 'png', 'image/jpeg': 'jpg'}
+
+
+def split_data_uri(data_uri):
+    """
+    Decode a base64 data: URI
+
+    Returns:
+        (mime_type, bytes)
+    """
+    header, _, payload = data_uri.partition(',')
+    mime_type = header[len('data:'):].split(';')[0]
+    return mime_type, base64.b64decode(payload)
+
+
+def dotlottie_path(output_path):
+    """Output path with its suffix replaced by .lottie"""
+    root, ext = os.path.splitext(str(output_path))
+    return output_path if ext == '.lottie' else root + '.lottie'
+
+
+def dotlottie_manifest(animation_id):
+    """manifest.json of a single-animation dotLottie archive"""
+    return {
+        "version": "1",
+        "generator": "HabitTracker animation-tools",
+        "author": "",
+        "revision": 1,
+        "animations": [{"id": animation_id, "speed": 1, "loop": True, "autoplay": True}],
+        "activeAnimationId": animation_id
+    }
+
+
+def store_image(archive, stored, data_uri):
+    """
+    Put the image of a data: URI into a dotLottie archive once
+
+    Args:
+        archive: Open zipfile.ZipFile
+        stored: Dict of content digest -> file name, updated in place
+        data_uri: Encoded image as a data: URI
+
+    Returns:
+        (file name under images/, bytes written or None if already stored)
+    """
+    mime_type, data = split_data_uri(data_uri)
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    if digest in stored:
+        return stored[digest], None
+
+    file_name = f"img_{len(stored)}.{IMAGE_EXTENSIONS.get(mime_type, 'png')}"
+    archive.writestr(f"images/{file_name}", data, compress_type=zipfile.ZIP_STORED)
+    stored[digest] = file_name
+    return file_name, data
+
+
+def save_dotlottie(lottie_data, output_path, animation_id=None):
+    """
+    Write a Lottie dict as a dotLottie archive
+
+    Inline data: URI assets are moved into images/ (identical images stored
+    once); the dict itself is not modified.
+
+    Returns:
+        Size of the written file in bytes
+    """
+    output_path = dotlottie_path(output_path)
+    if animation_id is None:
+        animation_id = os.path.splitext(os.path.basename(output_path))[0]
+
+    document = dict(lottie_data)
+    document["assets"] = []
+    stored = {}
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for asset in lottie_data.get("assets", []):
+            path = asset.get("p")
+            if isinstance(path, str) and path.startswith("data:"):
+                file_name, _ = store_image(archive, stored, path)
+                asset = dict(asset, u="/images/", p=file_name, e=0)
+            document["assets"].append(asset)
+
+        archive.writestr(f"animations/{animation_id}.json",
+                         json.dumps(document, separators=(',', ':')))
+        archive.writestr("manifest.json", json.dumps(dotlottie_manifest(animation_id)))
+    return os.path.getsize(output_path)
+
+
+def create_lottie_animation(frames, output_path, encode, fps=None, name="Animation",
+                            workers=1, stage_stats=None, dedup=None, container='json',
+                            delta=None, rate_control=None):
+    """
+    Create Lottie JSON animation from frames
+
+    Args:
+        frames: List of (frame, duration_ms) tuples
+        output_path: Path to save Lottie JSON
+        encode: Function turning a PIL Image into a data: URI
+        fps: Frames per second (if None, calculated from durations)
+        name: Animation name stored in the file
+        workers: Thread pool size for encoding (1 = serial)
+        stage_stats: Optional list that receives StageStats for the encode stage
+        dedup: Optional frame_dedup.AssetDeduplicator (see write_lottie_streaming)
+        container: 'json' or 'dotlottie' (see write_lottie_streaming)
+        delta: Optional frame_delta.DeltaEncoder (see write_lottie_streaming)
+        rate_control: Optional rate_control.WebPRateController (see write_lottie_streaming)
+
+    Returns:
+        Path to created Lottie file
+    """
+    print("Creating Lottie animation...")
+
+    if not frames:
+        raise ValueError("No frames to process")
+
+    return write_lottie_streaming(frames, output_path, encode, fps=fps, name=name,
+                                  workers=workers, stage_stats=stage_stats, dedup=dedup,
+                                  container=container, delta=delta,
+                                  rate_control=rate_control)
@@ -0,0 +1,174 @@
+"""
+Temporal mask propagation for AI background removal
+Runs the matting model only on keyframes and carries each keyframe's mask to
+the frames after it with dense optical flow
+"""
+
+from functools import lru_cache
+
+from bg_engine import cutout
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+FLOW_SIZE = 256
+
+
+def small_gray(frame, size=FLOW_SIZE):
+    """
+    Downscaled 8-bit luma of a frame for flow estimation
+
+    Returns:
+        uint8 ndarray whose longest side is at most `size`
+    """
+    import cv2
+
+    gray = np.asarray(frame.convert('L'))
+    scale = min(1.0, size / max(gray.shape))
+    if scale < 1.0:
+        new_size = (max(1, round(gray.shape[1] * scale)), max(1, round(gray.shape[0] * scale)))
+        gray = cv2.resize(gray, new_size, interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def estimate_flow(key_gray, gray):
+    """
+    Backward flow from a frame to its keyframe
+
+    For every pixel of `gray` the flow points at the matching position in
+    `key_gray`, which is what remap needs to pull keyframe data forward.
+    """
+    import cv2
+
+    return cv2.calcOpticalFlowFarneback(gray, key_gray, None, 0.5, 3, 15, 3, 5, 1.2, 0)
+
+
+def warp(image, flow):
+    """
+    Resample a keyframe image (mask or gray) along a backward flow field
+
+    The flow may be computed at a lower resolution than the image; it is
+    scaled up to the image size first.
+    """
+    import cv2
+
+    height, width = image.shape[:2]
+    flow_h, flow_w = flow.shape[:2]
+    if (flow_h, flow_w) != (height, width):
+        flow = cv2.resize(flow, (width, height), interpolation=cv2.INTER_LINEAR)
+        flow[:, :, 0] *= width / flow_w
+        flow[:, :, 1] *= height / flow_h
+
+    grid_x, grid_y = _pixel_grid(height, width)
+    return cv2.remap(image, grid_x + flow[:, :, 0], grid_y + flow[:, :, 1],
+                     cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+@lru_cache(maxsize=4)
+def _pixel_grid(height, width):
+    return np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+
+
+def mask_iou(mask_a, mask_b, threshold=128):
+    """Intersection over union of two masks binarized at `threshold` (1.0 if both empty)"""
+    a = np.asarray(mask_a) >= threshold
+    b = np.asarray(mask_b) >= threshold
+    union = np.count_nonzero(a | b)
+    if union == 0:
+        return 1.0
+    return np.count_nonzero(a & b) / union
+
+
+class MaskPropagator:
+    """
+    AI background removal that only runs the model on keyframes
+
+    A frame becomes a keyframe when it is the first one, when
+    keyframe_interval frames have passed since the last keyframe, or when
+    warping the keyframe onto it leaves a mean luma residual above
+    scene_threshold (0-1), i.e. on fast motion or a scene change. Other
+    frames get the keyframe mask warped by optical flow.
+
+    Whenever a new keyframe is matted, the mask propagation would have given
+    it is compared with the model's mask (IoU). That is the worst case,
+    furthest from the previous keyframe, so the mean agreement is a direct
+    measure for tuning keyframe_interval.
+
+    Usage:
+        propagator = MaskPropagator(bg_engine.get_engine(), keyframe_interval=6)
+        cutouts = propagator.remove_background(frames)
+        propagator.print_report()
+    """
+
+    def __init__(self, engine, keyframe_interval=6, scene_threshold=0.06):
+        self.engine = engine
+        self.batch_size = engine.batch_size
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.scene_threshold = scene_threshold
+        self.frames = 0
+        self.keyframes = 0
+        self.agreement = []
+        self._key_gray = None
+        self._key_mask = None
+        self._since_key = 0
+
+    def mask_for(self, frame):
+        """
+        Foreground mask for the next frame of the clip
+
+        Args:
+            frame: PIL Image (frames must be passed in clip order)
+
+        Returns:
+            PIL 'L' mask the size of the frame
+        """
+        self.frames += 1
+        gray = small_gray(frame)
+        predicted = None
+
+        if self._key_gray is not None and self._key_gray.shape == gray.shape:
+            flow = estimate_flow(self._key_gray, gray)
+            predicted = warp(self._key_mask, flow)
+            if self._since_key < self.keyframe_interval:
+                residual = np.abs(warp(self._key_gray, flow).astype(np.int16) - gray).mean() / 255.0
+                if residual <= self.scene_threshold:
+                    self._since_key += 1
+                    return Image.fromarray(predicted)
+
+        mask = self.engine.predict_masks([frame])[0]
+        if predicted is not None:
+            self.agreement.append(mask_iou(predicted, mask))
+
+        self.keyframes += 1
+        self._key_gray = gray
+        self._key_mask = np.asarray(mask)
+        self._since_key = 1
+        return mask
+
+    def remove_background(self, frames):
+        """
+        Cut out the foreground of consecutive frames
+
+        Args:
+            frames: List of PIL Images, in clip order
+
+        Returns:
+            List of RGBA PIL Images
+        """
+        return [cutout(frame, self.mask_for(frame)) for frame in frames]
+
+    @property
+    def mean_agreement(self):
+        if not self.agreement:
+            return None
+        return sum(self.agreement) / len(self.agreement)
+
+    def print_report(self):
+        if not self.frames:
+            return
+        print(f"Mask propagation: model ran on {self.keyframes} of {self.frames} frames "
+              f"({self.frames / self.keyframes:.1f}x fewer calls)")
+        if self.agreement:
+            print(f"Mask agreement at keyframes: mean IoU {self.mean_agreement:.3f} "
+                  f"(min {min(self.agreement):.3f}, {len(self.agreement)} checks)")
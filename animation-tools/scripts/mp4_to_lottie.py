@@ -4,24 +4,46 @@ Converts MP4 videos to optimized Lottie animations with background removal
 Features: Frame skipping, duplicate detection, smart compression, background removal
 """
 
-import numpy as np
-from PIL import Image
-import json
 import base64
 import io
 import os
 from pathlib import Path
 import sys
+import time
+from collections import deque
+
+from lazy_imports import is_installed, lazy_import
+from frame_pipeline import StageStats, ordered_map, timed_call, share_wall_time, print_stage_report
+from frame_sampler import IntervalSampler, TimestampSampler, sample_video_frames, sample_store_frames
+from frame_store import open_frame_store, resolve_frame
+from frame_scale import DownscaleFirst
+import lottie_writer
+from frame_delta import DeltaEncoder
+from rate_control import WebPRateController
+from frame_dedup import AssetDeduplicator, DuplicateDetector, luma_thumbnail
+from memory_stats import peak_rss_bytes, format_bytes
+from lottie_cost import enforce_budgets
+import bg_engine
+import bg_kernel
+from mask_propagation import MaskPropagator
+import conversion_cache
+import profiler
+
+# Loaded on first use, so `python mp4_to_lottie.py` and check_dependencies() start fast
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
 
 
 def check_dependencies():
-    """Check if required dependencies are installed"""
-    missing = []
+    """
+    Check if required dependencies are installed
     
-    try:
-        import cv2
-    except ImportError:
-        missing.append("opencv-python")
+    Only asks the import system whether each package can be found; nothing
+    is imported, so this stays instant even with rembg/onnxruntime installed.
+    """
+    missing = [package for module, package in (('cv2', 'opencv-python'), ('numpy', 'numpy'),
+                                               ('PIL', 'pillow'))
+               if not is_installed(module)]
     
     if missing:
         print("\n❌ Missing required dependencies!")
@@ -31,10 +53,9 @@ def check_dependencies():
         return False
     
     # Check for optional rembg (AI background removal)
-    try:
-        from rembg import remove
+    if bg_engine.is_available():
         print("✓ rembg available (AI background removal enabled)")
-    except ImportError:
+    else:
         print("ℹ️ rembg not available (AI background removal disabled)")
         print("   Install with: pip install rembg onnxruntime")
         print("   Note: This is optional. Simple background removal will be used.")
@@ -42,31 +63,42 @@ def check_dependencies():
     return True
 
 
-def remove_background_rembg(frame):
+def remove_background_rembg(frame, engine=None):
     """
     Remove background using rembg library (AI-powered)
     
     Args:
         frame: PIL Image in RGBA mode
+        engine: bg_engine.RembgEngine to use (default: the shared u2net engine)
     
     Returns:
         PIL Image with background removed
     """
+    return remove_background_rembg_batch([frame], engine)[0]
+
+
+def remove_background_rembg_batch(frames, engine=None):
+    """
+    Remove background from several frames in as few inference calls as possible
+    
+    The frames go to the model in memory; the engine's session is created
+    once per process and reused for every later call.
+    
+    Args:
+        frames: List of PIL Images in RGBA mode
+        engine: bg_engine.RembgEngine or mask_propagation.MaskPropagator
+                (default: the shared u2net engine)
+    
+    Returns:
+        List of PIL Images with background removed
+    """
     try:
-        from rembg import remove
-        # Convert PIL image to bytes
-        buffer = io.BytesIO()
-        frame.save(buffer, format='PNG')
-        buffer.seek(0)
-        
-        # Remove background
-        output = remove(buffer.read())
-        
-        # Convert back to PIL Image
-        return Image.open(io.BytesIO(output))
+        if engine is None:
+            engine = bg_engine.get_engine()
+        return engine.remove_background(frames)
     except Exception as e:
         print(f"Warning: Background removal failed: {e}")
-        return frame
+        return frames
 
 
 def remove_background_simple(frame, dark_threshold=30, white_threshold=200, edge_tolerance=10):
@@ -88,26 +120,10 @@ def remove_background_simple(frame, dark_threshold=30, white_threshold=200, edge
         alpha = np.ones((data.shape[0], data.shape[1]), dtype=np.uint8) * 255
         data = np.dstack([data, alpha])
     
-    r, g, b, a = data[:,:,0], data[:,:,1], data[:,:,2], data[:,:,3]
-    
-    # Remove BLACK/dark background (this video has black background!)
-    black_mask = (r < dark_threshold) & (g < dark_threshold) & (b < dark_threshold)
-    
-    # Also remove white/light background (just in case)
-    white_mask = (r > white_threshold) & (g > white_threshold) & (b > white_threshold)
-    
-    # Edge detection - preserve edges of the content
-    gray = (r.astype(float) + g.astype(float) + b.astype(float)) / 3
-    gradient_x = np.abs(np.diff(gray, axis=1, prepend=gray[:,0:1]))
-    gradient_y = np.abs(np.diff(gray, axis=0, prepend=gray[0:1,:]))
-    gradient = np.sqrt(gradient_x**2 + gradient_y**2)
-    
-    edge_mask = gradient > edge_tolerance
-    
-    # Remove background but keep edges/content
-    removal_mask = (black_mask | white_mask) & ~edge_mask
-    
-    data[removal_mask, 3] = 0
+    # Remove BLACK/dark background (this video has black background!) and
+    # white/light background (just in case), but keep edges/content
+    bg_kernel.remove_background(data, dark_threshold=dark_threshold, light_threshold=white_threshold,
+                                edge_tolerance=edge_tolerance)
     
     return Image.fromarray(data, 'RGBA')
 
@@ -167,30 +183,336 @@ def frame_to_base64(frame, format='WEBP', quality=85):
     """
     buffer = io.BytesIO()
     
-    if format.upper() == 'WEBP':
-        frame.save(buffer, format='WEBP', quality=quality, method=6)
-        mime_type = 'image/webp'
-    else:
-        frame.save(buffer, format='PNG', optimize=True)
-        mime_type = 'image/png'
+    with profiler.stage(format.lower()) as encode:
+        if format.upper() == 'WEBP':
+            frame.save(buffer, format='WEBP', quality=quality, method=6)
+            mime_type = 'image/webp'
+        else:
+            frame.save(buffer, format='PNG', optimize=True)
+            mime_type = 'image/png'
+        encode.add_bytes(buffer.tell())
     
-    buffer.seek(0)
-    img_str = base64.b64encode(buffer.read()).decode()
+    with profiler.stage('base64') as encode:
+        buffer.seek(0)
+        img_str = base64.b64encode(buffer.read()).decode()
+        encode.add_bytes(len(img_str))
     
     return f"data:{mime_type};base64,{img_str}"
 
 
-def extract_frames_from_mp4(
+def _process_frame_task(task):
+    """
+    Worker for the parallel pipeline: background removal + resize of one frame
+
+    Args:
+        task: (rgb ndarray or frame_store.StoredFrame, remove_bg, bg_method,
+              max_size, want_thumbnail, ai_threads, frame_cache, scaler) tuple;
+              scaler is a frame_scale.DownscaleFirst or None
+
+    Returns:
+        (processed frame, luma thumbnail or None, {stage: seconds},
+         cache hit: True/False, or None without a cache) tuple
+    """
+    rgb, remove_bg, bg_method, max_size, want_thumbnail, ai_threads, frame_cache, scaler = task
+    rgb = resolve_frame(rgb)
+    timings = {}
+
+    thumb = None
+    if want_thumbnail:
+        thumb, timings['dedup'] = timed_call(luma_thumbnail, rgb)
+
+    cache_key = None
+    if frame_cache is not None:
+        cache_key = frame_cache.frame_key(rgb, _frame_cache_params(remove_bg, bg_method, max_size, scaler))
+        cached = frame_cache.load_frame(cache_key)
+        if cached is not None:
+            return cached, thumb, timings, True
+
+    if scaler is not None:
+        pil_frame, timings['resize'] = timed_call(scaler.prepare, rgb)
+    else:
+        pil_frame = Image.fromarray(rgb).convert('RGBA')
+
+    if remove_bg and bg_method == 'ai':
+        # One engine (and ONNX session) per worker process, reused for every frame
+        engine = bg_engine.get_engine(intra_op_threads=ai_threads, batch_size=1)
+        pil_frame, timings['background'] = timed_call(remove_background_rembg, pil_frame, engine)
+    elif remove_bg and bg_method == 'simple':
+        pil_frame, timings['background'] = timed_call(remove_background_simple, pil_frame)
+
+    pil_frame, seconds = timed_call(_finish_frame, pil_frame, max_size, scaler)
+    timings['resize'] = timings.get('resize', 0.0) + seconds
+
+    if cache_key is not None:
+        frame_cache.put_frame(cache_key, pil_frame)
+        return pil_frame, thumb, timings, False
+    return pil_frame, thumb, timings, None
+
+
+def _finish_frame(frame, max_size, scaler=None):
+    """Final resize: a downscale-first working frame to its output size, then the max_size cap"""
+    if scaler is not None:
+        frame = scaler.finish(frame)
+    return optimize_frame(frame, max_size)
+
+
+def _frame_cache_params(remove_bg, bg_method, max_size, scaler=None):
+    """Everything a processed frame depends on besides its pixels"""
+    if scaler is not None:
+        return ('mp4', bg_method if remove_bg else 'none', max_size, 'resize_first', scaler.edge_scale)
+    return ('mp4', bg_method if remove_bg else 'none', max_size)
+
+
+def _resolve_duplicate(detector, thumb, frame_duration_ms, merge_duplicates, summary):
+    """
+    Check a frame against the duplicate detector
+
+    Kept frames are stored in the detector as one-item lists ("holders")
+    so a frame can be registered before its processing has finished.
+    
+    Returns:
+        None if the frame is new. Otherwise the list of items to yield in its
+        place: nothing (dropped), (None, duration) to hold the previous frame
+        longer, or (earlier frame's holder, duration) to show a repeated
+        earlier frame again, which the writer then maps to the existing asset.
+    """
+    entry = detector.match(thumb)
+    if entry is None:
+        return None
+    summary['duplicates'] += 1
+    if not merge_duplicates:
+        return []
+    if detector.is_latest(entry):
+        return [(None, frame_duration_ms)]
+    detector.touch(entry)
+    return [(entry[1], frame_duration_ms)]
+
+
+def _drain(pending):
+    """Resolve and empty a list of (holder or None, duration) items"""
+    released = [(holder[0] if holder is not None else None, duration)
+                for holder, duration in pending]
+    pending.clear()
+    return released
+
+
+def _iter_frames_parallel(sampled, remove_bg, max_size, duplicate_threshold,
+                          bg_method, workers, decode_stats, summary, merge_duplicates,
+                          duplicate_window, ai_threads=None, frame_cache=None, scaler=None):
+    """
+    Parallel version of the extract loop in iter_frames_from_mp4
+
+    Every sampled frame is processed speculatively on the pool; the duplicate
+    check then runs in order on the results, so the kept frames are identical
+    to the serial path.
+    """
+    stages = {name: StageStats(name) for name in ('background', 'resize', 'dedup')}
+    want_thumbnail = duplicate_threshold > 0
+    detector = DuplicateDetector(duplicate_threshold, duplicate_window)
+    durations = deque()
+
+    def tasks():
+        for rgb, frame_duration_ms in sampled:
+            durations.append(frame_duration_ms)
+            yield (rgb, remove_bg, bg_method, max_size, want_thumbnail, ai_threads, frame_cache,
+                   scaler)
+
+    kept = 0
+    profile = profiler.current()
+
+    pool_start = time.perf_counter()
+    for pil_frame, thumb, timings, cache_hit in ordered_map(_process_frame_task, tasks(), workers):
+        frame_duration_ms = durations.popleft()
+        for name, seconds in timings.items():
+            stages[name].add(seconds)
+            profile.record(name, seconds)
+        if cache_hit is not None:
+            frame_cache.count('frame', cache_hit)
+
+        if want_thumbnail:
+            start = time.perf_counter()
+            items = _resolve_duplicate(detector, thumb, frame_duration_ms, merge_duplicates, summary)
+            stages['dedup'].busy += time.perf_counter() - start
+            profile.record('dedup', time.perf_counter() - start, frames=0)
+            if items is not None:
+                yield from _drain(items)
+                continue
+            detector.add(thumb, [pil_frame])
+
+        if kept % 10 == 0:
+            print(f"Processed frame {kept + 1} ({workers} workers)...")
+
+        kept += 1
+        yield pil_frame, frame_duration_ms
+    pool_wall = time.perf_counter() - pool_start
+
+    share_wall_time(list(stages.values()), pool_wall)
+    summary['stages'] = [decode_stats] + list(stages.values())
+
+
+def _iter_frames_serial(sampled, remove_bg, max_size, duplicate_threshold, bg_method, summary,
+                        merge_duplicates, duplicate_window, engine=None, frame_cache=None,
+                        scaler=None):
+    """
+    Serial extract loop of iter_frames_from_mp4
+    
+    With AI background removal, new frames are collected into batches of
+    engine.batch_size and matted in one inference call; duplicates found in
+    the meantime wait behind them so the output order never changes.
+    Frames found in frame_cache skip processing but keep their place in line.
+    With a frame_scale.DownscaleFirst scaler, frames are shrunk before they
+    are batched, so the model and the simple kernel see output-sized frames.
+    """
+    kept = 0
+    detector = DuplicateDetector(duplicate_threshold, duplicate_window)
+    batch_size = engine.batch_size if engine is not None else 1
+    pending = []  # (holder or None, duration) in output order
+    batch = []  # (holder, PIL frame) waiting for background removal
+    cache_keys = []  # frame_cache key of each batch entry
+    cache_params = _frame_cache_params(remove_bg, bg_method, max_size, scaler)
+    
+    for rgb, frame_duration_ms in sampled:
+        # Check for duplicate frames before doing any work on this one
+        if duplicate_threshold > 0:
+            with profiler.stage('dedup'):
+                thumb = luma_thumbnail(rgb)
+                items = _resolve_duplicate(detector, thumb, frame_duration_ms, merge_duplicates, summary)
+            if items is not None:
+                pending.extend(items)
+                if not batch:
+                    yield from _drain(pending)
+                continue
+        
+        holder = [None]
+        pending.append((holder, frame_duration_ms))
+        if duplicate_threshold > 0:
+            detector.add(thumb, holder)
+        
+        # Reuse the processed frame from an earlier run
+        if frame_cache is not None:
+            with profiler.stage('cache'):
+                cache_key = frame_cache.frame_key(rgb, cache_params)
+                holder[0] = frame_cache.get_frame(cache_key)
+            if holder[0] is not None:
+                if not batch:
+                    yield from _drain(pending)
+                continue
+            cache_keys.append(cache_key)
+        
+        # Convert to PIL Image
+        if scaler is not None:
+            with profiler.stage('resize'):
+                pil_frame = scaler.prepare(rgb)
+        else:
+            pil_frame = Image.fromarray(rgb)
+            pil_frame = pil_frame.convert('RGBA')
+        
+        batch.append((holder, pil_frame))
+        
+        if len(batch) >= batch_size:
+            _process_batch(batch, remove_bg, bg_method, max_size, engine, kept, scaler)
+            kept += len(batch)
+            _store_batch(batch, cache_keys, frame_cache)
+            batch = []
+            yield from _drain(pending)
+    
+    if batch:
+        _process_batch(batch, remove_bg, bg_method, max_size, engine, kept, scaler)
+        _store_batch(batch, cache_keys, frame_cache)
+    yield from _drain(pending)
+
+
+def _store_batch(batch, cache_keys, frame_cache):
+    """Save a processed batch to the frame cache and empty cache_keys"""
+    if frame_cache is not None:
+        for (holder, _), cache_key in zip(batch, cache_keys):
+            with profiler.stage('cache', frames=0):
+                frame_cache.put_frame(cache_key, holder[0])
+    cache_keys.clear()
+
+
+def _process_batch(batch, remove_bg, bg_method, max_size, engine, kept, scaler=None):
+    """
+    Background removal + resize for a batch of new frames
+    
+    Args:
+        batch: List of (holder, PIL frame); each holder receives its processed frame
+        kept: Number of frames processed before this batch (for progress output)
+        scaler: frame_scale.DownscaleFirst that prepared the frames, or None
+    """
+    frames = [frame for _, frame in batch]
+    
+    # Remove background
+    if remove_bg and bg_method == 'ai':
+        if len(frames) > 1:
+            print(f"Processing frames {kept + 1}-{kept + len(frames)} (AI background removal)...")
+        else:
+            print(f"Processing frame {kept + 1} (AI background removal)...")
+        with profiler.stage('background', frames=len(frames)):
+            frames = remove_background_rembg_batch(frames, engine)
+    else:
+        for i, frame in enumerate(frames):
+            if (kept + i) % 10 == 0:  # Print every 10 frames
+                if remove_bg and bg_method == 'simple':
+                    print(f"Processing frame {kept + i + 1} (simple background removal)...")
+                else:
+                    print(f"Processing frame {kept + i + 1}...")
+            if remove_bg and bg_method == 'simple':
+                with profiler.stage('background'):
+                    frames[i] = remove_background_simple(frame)
+    
+    # Optimize frame
+    for (holder, _), frame in zip(batch, frames):
+        with profiler.stage('resize'):
+            holder[0] = _finish_frame(frame, max_size, scaler)
+
+
+def _hold_duplicates(frames):
+    """
+    Fold dropped duplicates into the frame before them
+    
+    The extract loops yield (None, duration) for a near-duplicate; its
+    duration is added to the previous kept frame so the animation keeps its
+    real length instead of speeding up.
+    """
+    pending = None
+    for frame, duration in frames:
+        if frame is None:
+            pending[1] += duration
+            continue
+        if pending is not None:
+            yield tuple(pending)
+        pending = [frame, duration]
+    if pending is not None:
+        yield tuple(pending)
+
+
+def iter_frames_from_mp4(
     mp4_path,
     remove_bg=True,
     max_size=512,
     target_fps=None,
     skip_frames=1,
     duplicate_threshold=0.02,
-    bg_method='simple'
+    bg_method='simple',
+    workers=1,
+    stage_stats=None,
+    sampler='timestamp',
+    merge_duplicates=True,
+    duplicate_window=4,
+    ai_batch_size=4,
+    ai_threads=None,
+    ai_keyframe_interval=1,
+    frame_cache=None,
+    frame_store=None,
+    resize_first=False,
+    edge_scale=1
 ):
     """
-    Extract frames from MP4 with advanced optimizations
+    Extract frames from MP4 with advanced optimizations, one at a time
+    
+    Generator version of extract_frames_from_mp4: each frame is decoded,
+    processed and handed on before the next one is read.
     
     Args:
         mp4_path: Path to MP4 file
@@ -200,28 +522,61 @@ def extract_frames_from_mp4(
         skip_frames: Skip every N frames (1 = use all, 2 = use every 2nd, etc.)
         duplicate_threshold: Threshold for detecting duplicate frames (0-1)
         bg_method: Background removal method ('simple', 'ai', or 'none')
-    
-    Returns:
-        List of (frame, duration_ms) tuples
+        workers: Process pool size for background removal and resizing (1 = serial)
+        stage_stats: Optional list that receives StageStats for each stage
+        sampler: 'timestamp' picks frames by presentation time for an exact
+                 target FPS (handles variable frame rate); 'interval' keeps
+                 every int(original_fps / target_fps)-th frame (legacy)
+        merge_duplicates: Add the duration of a dropped near-duplicate to the
+                          frame before it (False = drop it, shortening the clip)
+        duplicate_window: How many recent kept frames a new frame is compared
+                          with; a match with an older one repeats that frame
+        ai_batch_size: Frames per rembg inference call (serial AI path)
+        ai_threads: ONNX Runtime intra-op threads for rembg (None = runtime
+                    default, or cores / workers when workers > 1)
+        ai_keyframe_interval: Run the AI model on at most every Nth kept frame
+                              (sooner on fast motion) and propagate its mask to
+                              the frames in between with optical flow (1 = off)
+        frame_cache: Optional ConversionCache; processed frames are looked up
+                     by their pixels before background removal and resizing
+        frame_store: Read frames from a memory-mapped frame store instead of
+                     decoding: True (default cache dir), a directory, or a
+                     ConversionCache. The clip is decoded into it on first use
+        resize_first: Shrink each decoded frame to the output size (area
+                      interpolation) before background removal instead of after
+        edge_scale: With resize_first, remove the background at this multiple
+                    of the output size and shrink afterwards for smoother edges
+    
+    Yields:
+        (frame, duration_ms) tuples
     """
     try:
         import cv2
     except ImportError:
         print("Error: opencv-python not installed")
         print("Install with: pip install opencv-python")
-        return []
+        return
     
     print(f"Loading MP4: {mp4_path}")
     
-    video = cv2.VideoCapture(mp4_path)
-    
-    if not video.isOpened():
-        print(f"Error: Could not open video file: {mp4_path}")
-        return []
-    
-    # Get video properties
-    original_fps = video.get(cv2.CAP_PROP_FPS)
-    frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    video = None
+    store = None
+    if frame_store:
+        store = open_frame_store(mp4_path, frame_store)
+        if store is None:
+            return
+        original_fps = store.source_fps
+        frame_count = len(store)
+    else:
+        video = cv2.VideoCapture(mp4_path)
+        
+        if not video.isOpened():
+            print(f"Error: Could not open video file: {mp4_path}")
+            return
+        
+        # Get video properties
+        original_fps = video.get(cv2.CAP_PROP_FPS)
+        frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
     duration_sec = frame_count / original_fps
     
     print(f"Video info: {frame_count} frames, {original_fps:.2f} FPS, {duration_sec:.2f}s")
@@ -230,73 +585,139 @@ def extract_frames_from_mp4(
     if target_fps is None:
         target_fps = original_fps
     
-    # Calculate frame interval
-    frame_interval = max(1, int(original_fps / target_fps))
-    frame_interval *= skip_frames  # Apply additional skipping
+    if sampler == 'timestamp':
+        frame_sampler = TimestampSampler(target_fps, skip_frames)
+        print(f"Sampling frames by timestamp for exact {target_fps / skip_frames:g} FPS")
+    else:
+        # Calculate frame interval
+        frame_interval = max(1, int(original_fps / target_fps))
+        frame_interval *= skip_frames  # Apply additional skipping
+        frame_sampler = IntervalSampler(frame_interval, int(1000 / target_fps))
+        print(f"Extracting every {frame_interval} frame(s) for target {target_fps} FPS")
+    
+    decode_stats = StageStats('decode')
+    summary = {'duplicates': 0, 'stages': [decode_stats]}
+    kept = 0
+    
+    propagator = None
+    if remove_bg and bg_method == 'ai' and ai_keyframe_interval > 1:
+        if workers > 1:
+            print("Mask propagation needs frames in order: processing frames serially "
+                  f"({workers} workers still encode)")
+        propagator = MaskPropagator(
+            bg_engine.get_engine(intra_op_threads=ai_threads, batch_size=ai_batch_size),
+            keyframe_interval=ai_keyframe_interval
+        )
+        if frame_cache is not None:
+            # A propagated mask depends on the frames before it, not just this one
+            print("Frame cache is off with mask propagation")
+            frame_cache = None
     
-    print(f"Extracting every {frame_interval} frame(s) for target {target_fps} FPS")
+    scaler = DownscaleFirst(max_size, edge_scale) if resize_first else None
     
-    frames = []
-    frame_idx = 0
-    prev_frame = None
-    duplicates_skipped = 0
+    if store is not None:
+        # Pool workers map the store themselves: only (path, index) is pickled
+        sampled = sample_store_frames(store, frame_sampler, decode_stats,
+                                      references=workers > 1 and propagator is None)
+    else:
+        sampled = sample_video_frames(video, frame_sampler, original_fps, decode_stats)
     
-    while True:
-        ret, cv_frame = video.read()
-        if not ret:
-            break
-        
-        # Skip frames based on interval
-        if frame_idx % frame_interval != 0:
-            frame_idx += 1
-            continue
-        
-        # Convert BGR to RGB
-        cv_frame = cv2.cvtColor(cv_frame, cv2.COLOR_BGR2RGB)
-        
-        # Convert to PIL Image
-        pil_frame = Image.fromarray(cv_frame)
-        pil_frame = pil_frame.convert('RGBA')
-        
-        # Check for duplicate frames
-        if prev_frame is not None and duplicate_threshold > 0:
-            diff = calculate_frame_difference(prev_frame, pil_frame)
-            if diff < duplicate_threshold:
-                duplicates_skipped += 1
-                frame_idx += 1
-                continue
-        
-        # Remove background
-        if remove_bg:
-            if bg_method == 'ai':
-                print(f"Processing frame {len(frames) + 1} (AI background removal)...")
-                pil_frame = remove_background_rembg(pil_frame)
-            elif bg_method == 'simple':
-                if len(frames) % 10 == 0:  # Print every 10 frames
-                    print(f"Processing frame {len(frames) + 1} (simple background removal)...")
-                pil_frame = remove_background_simple(pil_frame)
+    try:
+        if workers > 1 and propagator is None:
+            if ai_threads is None:
+                # Keep workers x ONNX threads from oversubscribing the cores
+                ai_threads = max(1, (os.cpu_count() or 1) // workers)
+            frames = _iter_frames_parallel(
+                sampled, remove_bg, max_size, duplicate_threshold, bg_method,
+                workers, decode_stats, summary, merge_duplicates,
+                duplicate_window if merge_duplicates else 1, ai_threads, frame_cache, scaler
+            )
         else:
-            if len(frames) % 10 == 0:
-                print(f"Processing frame {len(frames) + 1}...")
-        
-        # Optimize frame
-        pil_frame = optimize_frame(pil_frame, max_size)
-        
-        # Calculate frame duration
-        frame_duration_ms = int(1000 / target_fps)
-        
-        frames.append((pil_frame, frame_duration_ms))
-        prev_frame = pil_frame.copy()
-        frame_idx += 1
+            engine = propagator
+            if engine is None and remove_bg and bg_method == 'ai':
+                engine = bg_engine.get_engine(intra_op_threads=ai_threads, batch_size=ai_batch_size)
+            frames = _iter_frames_serial(
+                sampled, remove_bg, max_size, duplicate_threshold, bg_method, summary,
+                merge_duplicates, duplicate_window if merge_duplicates else 1, engine,
+                frame_cache, scaler
+            )
+        if merge_duplicates:
+            frames = _hold_duplicates(frames)
+        for frame in frames:
+            kept += 1
+            yield frame
+    finally:
+        if store is not None:
+            store.close()
+        else:
+            video.release()
     
-    video.release()
+    if stage_stats is not None:
+        stage_stats.extend(summary['stages'])
     
-    print(f"Extracted {len(frames)} frames (skipped {duplicates_skipped} duplicates)")
+    if propagator is not None:
+        propagator.print_report()
     
-    return frames
+    if merge_duplicates:
+        print(f"Extracted {kept} frames ({summary['duplicates']} duplicates merged into held frames)")
+    else:
+        print(f"Extracted {kept} frames (skipped {summary['duplicates']} duplicates)")
 
 
-def create_lottie_animation(frames, output_path, fps=None):
+def extract_frames_from_mp4(
+    mp4_path,
+    remove_bg=True,
+    max_size=512,
+    target_fps=None,
+    skip_frames=1,
+    duplicate_threshold=0.02,
+    bg_method='simple',
+    workers=1,
+    stage_stats=None,
+    sampler='timestamp',
+    merge_duplicates=True,
+    duplicate_window=4,
+    ai_batch_size=4,
+    ai_threads=None,
+    ai_keyframe_interval=1,
+    frame_cache=None,
+    frame_store=None,
+    resize_first=False,
+    edge_scale=1
+):
+    """
+    Extract frames from MP4 with advanced optimizations
+    
+    Takes the same arguments as iter_frames_from_mp4.
+    
+    Returns:
+        List of (frame, duration_ms) tuples
+    """
+    return list(iter_frames_from_mp4(
+        mp4_path,
+        remove_bg=remove_bg,
+        max_size=max_size,
+        target_fps=target_fps,
+        skip_frames=skip_frames,
+        duplicate_threshold=duplicate_threshold,
+        bg_method=bg_method,
+        workers=workers,
+        stage_stats=stage_stats,
+        sampler=sampler,
+        merge_duplicates=merge_duplicates,
+        duplicate_window=duplicate_window,
+        ai_batch_size=ai_batch_size,
+        ai_threads=ai_threads,
+        ai_keyframe_interval=ai_keyframe_interval,
+        frame_cache=frame_cache,
+        frame_store=frame_store,
+        resize_first=resize_first,
+        edge_scale=edge_scale
+    ))
+
+
+def create_lottie_animation(frames, output_path, fps=None, workers=1, stage_stats=None,
+                            dedup=True, container='json', delta=False, target_kb=None):
     """
     Create Lottie JSON animation from frames
     
@@ -304,107 +725,37 @@ def create_lottie_animation(frames, output_path, fps=None):
         frames: List of (frame, duration_ms) tuples
         output_path: Path to save Lottie JSON
         fps: Frames per second (if None, calculated from durations)
+        workers: Thread pool size for WebP encoding (1 = serial)
+        stage_stats: Optional list that receives StageStats for the encode stage
+        dedup: Reuse assets for repeated frames and merge consecutive repeats
+        container: 'json' (inline images) or 'dotlottie' (.lottie zip with
+                   separate WebP files)
+        delta: Store full keyframes only at scene changes / every 30 frames
+               and just the changed region of the frames in between
+        target_kb: Size budget for the whole file; WebP quality is then chosen
+                   per frame to fit it instead of the fixed default
     
     Returns:
         Path to created Lottie file
     """
-    print("Creating Lottie animation...")
-    
-    if not frames:
-        raise ValueError("No frames to process")
-    
-    # Get dimensions from first frame
-    width, height = frames[0][0].size
-    
-    # Calculate timing
-    total_duration_ms = sum(duration for _, duration in frames)
-    
-    # Use provided FPS or calculate from frame durations
-    if fps is None:
-        fps = int(1000 * len(frames) / total_duration_ms)
-        fps = max(10, min(fps, 60))  # Clamp between 10-60 fps
-    
-    print(f"Animation specs: {len(frames)} frames, {fps} FPS, {total_duration_ms}ms duration")
-    
-    # Convert frames to base64
-    print("Encoding frames (this may take a while)...")
-    assets = []
-    layers = []
-    
-    for i, (frame, duration) in enumerate(frames):
-        if i % 10 == 0:
-            print(f"Encoding frame {i + 1}/{len(frames)}...")
-        
-        # Create asset
-        asset_id = f"image_{i}"
-        base64_data = frame_to_base64(frame, format='WEBP', quality=85)
-        
-        assets.append({
-            "id": asset_id,
-            "w": width,
-            "h": height,
-            "u": "",
-            "p": base64_data,
-            "e": 0
-        })
-        
-        # Calculate frame timing
-        start_frame = sum(frames[j][1] * fps / 1000 for j in range(i))
-        end_frame = start_frame + (duration * fps / 1000)
-        
-        # Create layer for this frame
-        layers.append({
-            "ddd": 0,
-            "ind": i,
-            "ty": 2,  # Image layer
-            "nm": f"Frame {i}",
-            "refId": asset_id,
-            "sr": 1,
-            "ks": {
-                "o": {
-                    "a": 1,
-                    "k": [
-                        {"t": start_frame, "s": [100], "e": [100]},
-                        {"t": end_frame, "s": [100], "e": [0]}
-                    ]
-                },
-                "r": {"a": 0, "k": 0},
-                "p": {"a": 0, "k": [width/2, height/2, 0]},
-                "a": {"a": 0, "k": [width/2, height/2, 0]},
-                "s": {"a": 0, "k": [100, 100, 100]}
-            },
-            "ao": 0,
-            "ip": start_frame,
-            "op": end_frame,
-            "st": 0,
-            "bm": 0
-        })
-    
-    # Create Lottie JSON structure
-    lottie_data = {
-        "v": "5.7.4",  # Lottie version
-        "fr": fps,
-        "ip": 0,
-        "op": total_duration_ms * fps / 1000,
-        "w": width,
-        "h": height,
-        "nm": "MP4 Animation",
-        "ddd": 0,
-        "assets": assets,
-        "layers": layers,
-        "markers": []
-    }
-    
-    # Save to file
-    print(f"Saving Lottie animation to: {output_path}")
-    with open(output_path, 'w') as f:
-        json.dump(lottie_data, f, separators=(',', ':'))
-    
-    # Get file size
-    file_size = os.path.getsize(output_path)
-    print(f"✓ Lottie animation created: {file_size / 1024:.2f} KB")
-    
-    return output_path
+    return lottie_writer.create_lottie_animation(
+        frames, output_path, encode=_encode_frame, fps=fps, name="MP4 Animation",
+        workers=workers, stage_stats=stage_stats,
+        dedup=AssetDeduplicator() if dedup else None, container=container,
+        delta=DeltaEncoder() if delta else None,
+        rate_control=_rate_control(target_kb, container, workers)
+    )
+
+
+def _encode_frame(frame):
+    return frame_to_base64(frame, format='WEBP', quality=85)
+
+
+def _rate_control(target_kb, container, workers=1):
+    if not target_kb:
+        return None
+    return WebPRateController(target_kb * 1024, max_quality=85, workers=workers,
+                              base64_assets=(container != 'dotlottie'))
 
 
 def convert_mp4_to_lottie(
@@ -415,7 +766,23 @@ def convert_mp4_to_lottie(
     target_fps=20,
     skip_frames=1,
     duplicate_threshold=0.02,
-    bg_method='simple'
+    bg_method='simple',
+    workers=1,
+    sampler='timestamp',
+    streaming=False,
+    dedup=True,
+    ai_batch_size=4,
+    ai_threads=None,
+    ai_keyframe_interval=1,
+    container='json',
+    delta=False,
+    target_kb=None,
+    cache=None,
+    profile=None,
+    frame_store=None,
+    resize_first=False,
+    edge_scale=1,
+    budgets=None
 ):
     """
     Main function to convert MP4 to Lottie animation
@@ -429,6 +796,46 @@ def convert_mp4_to_lottie(
         skip_frames: Skip every N frames (1 = use all, 2 = every 2nd, etc.)
         duplicate_threshold: Threshold for detecting duplicate frames (0-1)
         bg_method: Background removal method ('simple', 'ai', or 'none')
+        workers: Parallel workers for frame processing and encoding (1 = serial).
+                 Output is byte-identical to the serial path.
+        sampler: Frame selection ('timestamp' for exact target FPS, 'interval' for legacy)
+        streaming: Decode, process, encode and write one frame at a time so
+                   peak memory stays flat as the clip gets longer
+        dedup: Hold near-duplicate frames longer instead of dropping them, reuse
+               the asset of exact/perceptual repeats and merge consecutive
+               repeats into one layer (False = legacy drop behaviour)
+        ai_batch_size: Frames per rembg inference call when bg_method='ai'
+        ai_threads: ONNX Runtime intra-op threads for rembg (None = default)
+        ai_keyframe_interval: Run the AI model only on keyframes (at most N
+                              frames apart) and propagate masks in between;
+                              prints a mask-agreement score for tuning N
+        container: 'json' (inline images) or 'dotlottie' (.lottie zip with
+                   separate WebP files, smaller and faster to load)
+        delta: Delta-encode frames: keyframes plus small changed-region
+               patches, much smaller for mostly static clips
+        target_kb: Make the output at most this many KB by searching WebP
+                   quality/method per frame (disables streaming)
+        cache: Reuse earlier work: True (default cache dir), a directory, or a
+               ConversionCache. An identical earlier conversion is copied;
+               otherwise processed frames are reused and only encoding re-runs
+        profile: True or a profiler.Profiler to time every stage (decode, dedup,
+                 background, resize, webp, base64, write) and write
+                 <output>.profile.json (plus a Chrome trace if enabled)
+        frame_store: Decode the clip once into a memory-mapped frame store and
+                     read frames from it on this and later runs (True for the
+                     default cache dir, a directory, or a ConversionCache);
+                     speeds up re-runs with other settings, same output
+        resize_first: Downscale-first ordering: area-resize each decoded frame
+                      to the output size, then remove the background there
+                      (much faster for large sources; slightly different
+                      edges, see benchmarks/bench_resize_first.py)
+        edge_scale: With resize_first, remove the background at edge_scale x
+                    the output size and shrink the result (2 = anti-aliased
+                    mask edges for ~4x the background-removal pixels)
+        budgets: Check the finished animation's load cost (JSON/base64 bytes,
+                 decoded bitmap memory, active layers, animated properties):
+                 True for lottie_cost.DEFAULT_BUDGETS or a dict overriding some
+                 of them. Raises lottie_cost.BudgetExceeded when over budget
     
     Returns:
         Path to created Lottie file
@@ -437,6 +844,8 @@ def convert_mp4_to_lottie(
     if output_path is None:
         mp4_name = Path(mp4_path).stem
         output_path = str(Path(mp4_path).parent / f"{mp4_name}_lottie.json")
+    if container == 'dotlottie':
+        output_path = lottie_writer.dotlottie_path(output_path)
     
     print("=" * 60)
     print("MP4 TO LOTTIE CONVERTER")
@@ -444,29 +853,124 @@ def convert_mp4_to_lottie(
     print(f"Input: {mp4_path}")
     print(f"Output: {output_path}")
     print(f"Background removal: {bg_method.upper() if remove_bg else 'NO'}")
+    if remove_bg and bg_method == 'ai':
+        print(f"AI batch size: {ai_batch_size}, ONNX threads: {ai_threads or 'default'}")
+        if ai_keyframe_interval > 1:
+            print(f"AI keyframes: at most every {ai_keyframe_interval} frames (masks propagated)")
     print(f"Max size: {max_size}px")
+    if resize_first:
+        print(f"Pipeline order: resize first (background removed at {edge_scale}x output size)")
     print(f"Target FPS: {target_fps}")
     print(f"Skip frames: every {skip_frames} frame(s)")
     print(f"Duplicate detection: {'YES' if duplicate_threshold > 0 else 'NO'}")
+    print(f"Workers: {workers}")
+    print(f"Streaming: {'YES' if streaming else 'NO'}")
+    print(f"Asset deduplication: {'YES' if dedup else 'NO'}")
+    print(f"Container: {container}")
+    print(f"Delta encoding: {'YES' if delta else 'NO'}")
+    print(f"Size budget: {f'{target_kb} KB' if target_kb else 'NO'}")
+    print(f"Cache: {'YES' if cache else 'NO'}")
+    print(f"Frame store: {'YES' if frame_store else 'NO'}")
+    print(f"Load budgets: {'YES' if budgets else 'NO'}")
+    print(f"Profile: {'YES' if profile else 'NO'}")
     print("=" * 60)
     
-    # Extract frames
-    frames = extract_frames_from_mp4(
-        mp4_path,
-        remove_bg=remove_bg,
-        max_size=max_size,
-        target_fps=target_fps,
-        skip_frames=skip_frames,
-        duplicate_threshold=duplicate_threshold,
-        bg_method=bg_method if remove_bg else 'none'
-    )
+    # Everything that affects the output (workers and frame_store only change speed)
+    settings = {
+        'converter': 'mp4', 'remove_bg': remove_bg, 'max_size': max_size,
+        'target_fps': target_fps, 'skip_frames': skip_frames,
+        'duplicate_threshold': duplicate_threshold, 'bg_method': bg_method,
+        'sampler': sampler, 'streaming': streaming, 'dedup': dedup,
+        'ai_batch_size': ai_batch_size, 'ai_keyframe_interval': ai_keyframe_interval,
+        'container': container, 'delta': delta, 'target_kb': target_kb,
+        'resize_first': resize_first, 'edge_scale': edge_scale if resize_first else None,
+        'animation_id': Path(output_path).stem if container == 'dotlottie' else None
+    }
     
-    if not frames:
-        print("❌ No frames extracted. Conversion failed.")
-        return None
+    cache = conversion_cache.open_cache(cache)
+    if cache is not None:
+        output_key = cache.output_key(mp4_path, settings)
+        if cache.get_output(output_key, output_path):
+            print("✓ Identical conversion found in cache: output copied")
+            cache.print_report()
+            if budgets:
+                enforce_budgets(output_path, budgets)
+            return output_path
+    
+    profile = profiler.start(profile, input=str(mp4_path), output=str(output_path),
+                             workers=workers, settings=settings)
+    result = None
+    try:
+        stage_stats = []
+        
+        if target_kb and streaming:
+            print("ℹ️ A size budget needs every frame up front: streaming disabled")
+            streaming = False
+        
+        # Extract frames
+        extract = iter_frames_from_mp4 if streaming else extract_frames_from_mp4
+        frames = extract(
+            mp4_path,
+            remove_bg=remove_bg,
+            max_size=max_size,
+            target_fps=target_fps,
+            skip_frames=skip_frames,
+            duplicate_threshold=duplicate_threshold,
+            bg_method=bg_method if remove_bg else 'none',
+            workers=workers,
+            stage_stats=stage_stats,
+            sampler=sampler,
+            merge_duplicates=dedup,
+            ai_batch_size=ai_batch_size,
+            ai_threads=ai_threads,
+            ai_keyframe_interval=ai_keyframe_interval,
+            frame_cache=cache,
+            frame_store=frame_store,
+            resize_first=resize_first,
+            edge_scale=edge_scale
+        )
+        
+        if streaming:
+            result = lottie_writer.write_lottie_streaming(
+                frames, output_path, encode=_encode_frame,
+                fps=target_fps, name="MP4 Animation", workers=workers, stage_stats=stage_stats,
+                dedup=AssetDeduplicator() if dedup else None, container=container,
+                delta=DeltaEncoder() if delta else None
+            )
+            if result is None:
+                print("❌ No frames extracted. Conversion failed.")
+                return None
+        else:
+            if not frames:
+                print("❌ No frames extracted. Conversion failed.")
+                return None
+            
+            if profile is not None:
+                profile.snapshot('frames extracted')
+            
+            # Create Lottie animation
+            result = create_lottie_animation(
+                frames, output_path, fps=target_fps, workers=workers, stage_stats=stage_stats,
+                dedup=dedup, container=container, delta=delta, target_kb=target_kb
+            )
+        
+        if workers > 1:
+            print_stage_report(stage_stats, workers)
+        
+        if cache is not None:
+            cache.put_output(output_key, result)
+            cache.evict()
+            cache.print_report()
+        
+        if profile is not None:
+            profile.snapshot('animation written')
+    finally:
+        profiler.finish(profile, result or output_path)
+    
+    print(f"Peak memory (RSS): {format_bytes(peak_rss_bytes())}")
     
-    # Create Lottie animation
-    result = create_lottie_animation(frames, output_path, fps=target_fps)
+    if budgets:
+        enforce_budgets(result, budgets)
     
     print("=" * 60)
     print("✓ CONVERSION COMPLETE!")
@@ -539,6 +1043,21 @@ convert_mp4_to_lottie(
     bg_method='simple'
 )
 
+# Parallel (same output, uses 4 cores)
+convert_mp4_to_lottie(
+    mp4_path="video.mp4",
+    output_path="output_parallel.json",
+    bg_method='ai',
+    workers=4
+)
+
+# Long clips: constant memory, writes frames as they are produced
+convert_mp4_to_lottie(
+    mp4_path="long_video.mp4",
+    output_path="output_long.json",
+    streaming=True
+)
+
 # No background removal (fastest)
 convert_mp4_to_lottie(
     mp4_path="video.mp4",
@@ -558,6 +1077,7 @@ convert_mp4_to_lottie(
         print("  • duplicate_threshold=0.05 removes similar frames")
         print("  • bg_method='ai' for best background removal (slower)")
         print("  • bg_method='simple' for faster processing")
+        print("  • workers=4 spreads frame processing across 4 cores")
         print("\n📦 Install dependencies:")
         print("  pip install opencv-python pillow numpy")
         print("  pip install rembg  # Optional, for AI background removal")
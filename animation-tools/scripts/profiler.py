@@ -0,0 +1,255 @@
+"""
+Conversion profiler
+Per-stage wall/CPU time, byte and frame counters, optional tracemalloc snapshots,
+written as a JSON profile and optionally a Chrome trace (chrome://tracing, Perfetto)
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+class _NullStage:
+    """Stage that records nothing; shared by every call while profiling is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add_bytes(self, nbytes):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullProfiler:
+    """Active when no profile was requested; every call is a no-op"""
+
+    enabled = False
+
+    def stage(self, name, frames=1, nbytes=0):
+        return _NULL_STAGE
+
+    def record(self, name, wall, cpu=None, frames=1, nbytes=0):
+        pass
+
+    def snapshot(self, label):
+        pass
+
+
+class _Stage:
+    def __init__(self, profiler, name, frames, nbytes):
+        self.profiler = profiler
+        self.name = name
+        self.frames = frames
+        self.nbytes = nbytes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self.profiler.record(self.name, end - self.start, time.thread_time() - self.cpu_start,
+                             self.frames, self.nbytes, start=self.start)
+        return False
+
+    def add_bytes(self, nbytes):
+        self.nbytes += nbytes
+
+
+class Profiler:
+    """
+    Collects per-stage timings for one conversion
+
+    Stages are flat: decode, dedup, background, resize, webp, base64, write
+    and so on each time only their own work, so their wall times add up to
+    (at most) the total. CPU time is the thread's own CPU time, which stays
+    correct when encoding runs on a thread pool.
+
+    Stages that ran in worker processes are added with record() from the
+    timings the workers send back; they appear in the totals but not in the
+    trace.
+
+    Usage:
+        profile = Profiler(trace=True, memory=True)
+        convert_mp4_to_lottie("video.mp4", "out.json", profile=profile)
+        # -> out.json.profile.json and out.json.trace.json
+    """
+
+    enabled = True
+
+    def __init__(self, trace=False, memory=False, top_allocations=5):
+        self.trace = trace
+        self.memory = memory
+        self.top_allocations = top_allocations
+        self.stages = {}  # name -> {'count', 'frames', 'wall', 'cpu', 'bytes'}
+        self.events = []
+        self.snapshots = []
+        self.metadata = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._cpu_origin = time.process_time()
+        self._wall = None
+        self._cpu = None
+        self._started_tracemalloc = False
+
+    def stage(self, name, frames=1, nbytes=0):
+        """Context manager timing one piece of work; use .add_bytes() inside it"""
+        return _Stage(self, name, frames, nbytes)
+
+    def record(self, name, wall, cpu=None, frames=1, nbytes=0, start=None):
+        """Add a measurement taken elsewhere (e.g. in a worker process)"""
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = {'count': 0, 'frames': 0, 'wall': 0.0,
+                                             'cpu': 0.0, 'bytes': 0}
+            stats['count'] += 1
+            stats['frames'] += frames
+            stats['wall'] += wall
+            stats['cpu'] += wall if cpu is None else cpu
+            stats['bytes'] += nbytes
+            if self.trace and start is not None:
+                self.events.append({
+                    'name': name, 'cat': 'stage', 'ph': 'X', 'pid': os.getpid(),
+                    'tid': threading.get_ident(),
+                    'ts': round((start - self._origin) * 1e6, 1),
+                    'dur': round(wall * 1e6, 1),
+                    'args': {'frames': frames, 'bytes': nbytes},
+                })
+
+    def snapshot(self, label):
+        """Record traced memory (current, peak, top allocation sites) if memory=True"""
+        if not self.memory or not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ))
+        top = snapshot.statistics('lineno')[:self.top_allocations]
+        self.snapshots.append({
+            'label': label,
+            'time': round(time.perf_counter() - self._origin, 6),
+            'current_bytes': current,
+            'peak_bytes': peak,
+            'top': [{'where': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                     'bytes': stat.size, 'blocks': stat.count} for stat in top],
+        })
+
+    def start(self):
+        self._origin = time.perf_counter()
+        self._cpu_origin = time.process_time()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self):
+        self._wall = time.perf_counter() - self._origin
+        self._cpu = time.process_time() - self._cpu_origin
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def report(self):
+        """The profile as a JSON-serializable dict"""
+        wall = self._wall if self._wall is not None else time.perf_counter() - self._origin
+        cpu = self._cpu if self._cpu is not None else time.process_time() - self._cpu_origin
+        stages = {}
+        for name, stats in self.stages.items():
+            stages[name] = dict(stats)
+            stages[name]['wall_share'] = stats['wall'] / wall if wall > 0 else 0.0
+            if stats['wall'] > 0:
+                stages[name]['frames_per_s'] = stats['frames'] / stats['wall']
+        return {
+            'metadata': self.metadata,
+            'total': {'wall': wall, 'cpu': cpu},
+            'stages': stages,
+            'snapshots': self.snapshots,
+        }
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+    def write_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+    def print_report(self):
+        report = self.report()
+        total = report['total']['wall']
+        print("-" * 60)
+        print(f"Profile ({total:.2f}s wall, {report['total']['cpu']:.2f}s CPU):")
+        print(f"  {'stage':<12}{'frames':>8}{'wall s':>10}{'cpu s':>10}{'share':>8}{'MB':>10}")
+        for name, stats in sorted(report['stages'].items(), key=lambda item: -item[1]['wall']):
+            print(f"  {name:<12}{stats['frames']:>8}{stats['wall']:>10.2f}{stats['cpu']:>10.2f}"
+                  f"{stats['wall_share']:>8.0%}{stats['bytes'] / 1024 / 1024:>10.2f}")
+        print("-" * 60)
+
+
+_NULL_PROFILER = NullProfiler()
+_active = _NULL_PROFILER
+
+
+def current():
+    """The active profiler (a NullProfiler when profiling is off)"""
+    return _active
+
+
+def stage(name, frames=1, nbytes=0):
+    """Time a stage on the active profiler; free when profiling is off"""
+    return _active.stage(name, frames, nbytes)
+
+
+def start(profile, **metadata):
+    """
+    Make a profiler active for a conversion
+
+    Args:
+        profile: None/False (off), True (new Profiler) or a Profiler
+        metadata: Stored in the report (input, output, settings)
+
+    Returns:
+        The active Profiler, or None when profiling is off
+    """
+    global _active
+    if not profile:
+        _active = _NULL_PROFILER
+        return None
+    if profile is True:
+        profile = Profiler()
+    profile.metadata.update(metadata)
+    profile.start()
+    _active = profile
+    return profile
+
+
+def finish(profile, output_path):
+    """
+    Deactivate the profiler and write <output>.profile.json (and .trace.json)
+
+    Returns:
+        Path of the JSON profile, or None when profiling was off
+    """
+    global _active
+    _active = _NULL_PROFILER
+    if profile is None:
+        return None
+    profile.stop()
+    profile.print_report()
+    report_path = profile.write(f"{output_path}.profile.json")
+    print(f"Profile written: {report_path}")
+    if profile.trace:
+        trace_path = profile.write_chrome_trace(f"{output_path}.trace.json")
+        print(f"Chrome trace written: {trace_path} (open in chrome://tracing or ui.perfetto.dev)")
+    return report_path
@@ -6,11 +6,10 @@ import os
 from pathlib import Path
 from PIL import Image
 
-try:
-    from rembg import remove
-    REMBG_AVAILABLE = True
-except ImportError:
-    REMBG_AVAILABLE = False
+import bg_engine
+
+REMBG_AVAILABLE = bg_engine.is_available()
+if not REMBG_AVAILABLE:
     print("⚠️  rembg not available. Install with: pip install rembg")
 
 def remove_background_ai(input_path, output_path):
@@ -30,16 +29,14 @@ def remove_background_ai(input_path, output_path):
     
     try:
         # Open image
-        with open(input_path, 'rb') as input_file:
-            input_data = input_file.read()
+        image = Image.open(input_path)
         
         # Remove background using AI with basic settings to preserve all foreground
         # No alpha matting - just basic background removal
-        output_data = remove(input_data)
+        output_image = bg_engine.get_engine().remove_background([image])[0]
         
         # Save result
-        with open(output_path, 'wb') as output_file:
-            output_file.write(output_data)
+        output_image.save(output_path, 'PNG')
         
         print(f"✅ Background removed successfully!")
         print(f"✅ Saved to: {output_path}")
@@ -6,11 +6,10 @@ import os
 from pathlib import Path
 from PIL import Image
 
-try:
-    from rembg import remove
-    REMBG_AVAILABLE = True
-except ImportError:
-    REMBG_AVAILABLE = False
+import bg_engine
+
+REMBG_AVAILABLE = bg_engine.is_available()
+if not REMBG_AVAILABLE:
     print("⚠️  rembg not available. Install with: pip install rembg")
 
 def remove_background_ai(input_path, output_path, alpha_matting=False):
@@ -30,22 +29,21 @@ def remove_background_ai(input_path, output_path, alpha_matting=False):
     
     try:
         # Open image
-        with open(input_path, 'rb') as input_file:
-            input_data = input_file.read()
+        image = Image.open(input_path)
         
         # Remove background using AI with better settings
         # Use alpha_matting for better edge quality and preservation of details
-        output_data = remove(
-            input_data,
+        # (the engine keeps one model session for every image in this run)
+        output_image = bg_engine.get_engine().remove_background(
+            [image],
             alpha_matting=alpha_matting,
             alpha_matting_foreground_threshold=240,
             alpha_matting_background_threshold=10,
             alpha_matting_erode_size=10
-        )
+        )[0]
         
         # Save result
-        with open(output_path, 'wb') as output_file:
-            output_file.write(output_data)
+        output_image.save(output_path, 'PNG')
         
         print(f"✅ Saved: {output_path}")
         return True
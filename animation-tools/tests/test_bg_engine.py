@@ -0,0 +1,67 @@
+"""
+Tests for bg_engine.RembgEngine
+The batched U2-Net path reimplements rembg's preprocessing, so its cutouts
+must match rembg.remove; rembg versions without the raw ONNX session fall
+back to the session's own predict
+
+Usage:
+    python -m pytest animation-tools/tests
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from bg_engine import RembgEngine
+
+
+def subject(size=(200, 160), offset=0):
+    """A figure on a plain background"""
+    image = Image.new('RGB', size, (20, 120, 40))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((60 + offset, 20, 140 + offset, 100), fill=(230, 190, 160))
+    draw.rectangle((70 + offset, 90, 130 + offset, 150), fill=(40, 60, 200))
+    return image
+
+
+class PredictOnlySession:
+    """rembg session without inner_session: only the public predict()"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, image):
+        self.calls += 1
+        return [Image.new('L', image.size, 255)]
+
+
+def test_falls_back_to_predict_without_inner_session():
+    engine = RembgEngine('u2net', batch_size=4)
+    engine._session = PredictOnlySession()
+    cutouts = engine.remove_background([subject(), subject(offset=10)])
+    assert engine._session.calls == 2
+    assert not engine.batched_inference
+    assert [cutout.mode for cutout in cutouts] == ['RGBA', 'RGBA']
+    assert cutouts[0].getchannel('A').getextrema() == (255, 255)
+
+
+def test_batched_cutouts_match_rembg_remove():
+    rembg = pytest.importorskip('rembg')
+    pytest.importorskip('onnxruntime')
+    model_dir = Path(os.environ.get('U2NET_HOME', Path.home() / '.u2net'))
+    if not (model_dir / 'u2net.onnx').exists():
+        pytest.skip("u2net model not downloaded")
+
+    engine = RembgEngine('u2net', batch_size=2)
+    images = [subject(), subject(offset=25)]
+    cutouts = engine.remove_background(images)
+    assert engine.batched_inference
+    for image, cutout in zip(images, cutouts):
+        expected = rembg.remove(image, session=engine.session)
+        diff = np.abs(np.asarray(cutout, dtype=np.int16) - np.asarray(expected, dtype=np.int16))
+        assert diff.max() <= 1
@@ -0,0 +1,77 @@
+"""
+Tests for frame_dedup.DuplicateDetector
+The luma-thumbnail detector must keep and drop the same frames as the
+full-resolution calculate_frame_difference check it replaced, at the same
+duplicate_threshold
+
+Usage:
+    python -m pytest animation-tools/tests
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from frame_dedup import DuplicateDetector, luma_thumbnail
+from mp4_to_lottie import calculate_frame_difference
+
+THRESHOLD = 0.02
+
+# Horizontal moves of the block between consecutive frames: pauses, small
+# drifts that add up past the threshold, and jumps. Every frame lands at least
+# ~15% away from the threshold relative to the last kept one (a pixel of
+# movement is about 0.0009 on calculate_frame_difference's scale)
+STEPS = [0, 0, 3, 5, 6, 0, 2, 14, 9, 9, 12, 2, 30, 0, 0, 15, 17, 4, 4, 4, 12, 40, 7, 7, 15]
+
+
+def synthetic_frames():
+    """A block sliding across a gradient background, 320x240 RGB"""
+    height, width = 240, 320
+    yy, xx = np.mgrid[0:height, 0:width]
+    background = np.stack([xx * 200 // width + 20, yy * 150 // height + 40,
+                           (xx + yy) * 100 // (width + height) + 60], axis=-1).astype(np.uint8)
+    x = 10
+    for step in STEPS:
+        x += step
+        frame = background.copy()
+        frame[60:180, x:x + 80] = (220, 140, 60)
+        yield frame
+
+
+def legacy_kept(frames, threshold):
+    """Indices kept by the old check: compare each frame with the last kept one"""
+    kept, last = [], None
+    for index, frame in enumerate(frames):
+        image = Image.fromarray(frame)
+        if last is None or calculate_frame_difference(last, image) >= threshold:
+            kept.append(index)
+            last = image
+    return kept
+
+
+def detector_kept(frames, detector):
+    kept = []
+    for index, frame in enumerate(frames):
+        thumb = luma_thumbnail(frame)
+        if detector.match(thumb) is None:
+            detector.add(thumb)
+            kept.append(index)
+    return kept
+
+
+def test_detector_matches_legacy_decisions():
+    frames = list(synthetic_frames())
+    expected = legacy_kept(frames, THRESHOLD)
+    assert 1 < len(expected) < len(frames)
+    assert detector_kept(frames, DuplicateDetector(THRESHOLD)) == expected
+
+
+def test_threshold_is_rescaled_for_luma_thumbnails():
+    # Compared raw, the luma difference would drop frames the old check kept
+    frames = list(synthetic_frames())
+    unscaled = DuplicateDetector(THRESHOLD)
+    unscaled.luma_threshold = THRESHOLD
+    assert len(detector_kept(frames, unscaled)) < len(legacy_kept(frames, THRESHOLD))
@@ -0,0 +1,68 @@
+"""
+Tests for frame_delta.DeltaEncoder
+Delta encoding must never make an animation larger: patches that do not
+encode smaller than their full frame are stored as keyframes instead
+
+Usage:
+    python -m pytest animation-tools/tests
+"""
+
+import math
+import sys
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+import lottie_writer
+from frame_dedup import AssetDeduplicator
+from frame_delta import DeltaEncoder
+from mp4_to_lottie import frame_to_base64
+
+
+def encode(frame):
+    return frame_to_base64(frame, format='WEBP', quality=85)
+
+
+def mostly_static_clip(frame_count=36, size=160):
+    """Static body on a transparent background with a raising arm and blinking eyes"""
+    frames = []
+    for i in range(frame_count):
+        frame = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(frame)
+        draw.ellipse((40, 30, 120, 140), fill=(255, 170, 60, 255), outline=(90, 40, 0, 255), width=3)
+        for x in range(46, 116, 8):
+            draw.line((x, 75, x + 4, 130), fill=(230, 140, 40, 255), width=2)
+        eye_height = 2 if i % 12 == 0 else 10
+        for x in (62, 88):
+            draw.ellipse((x, 60 - eye_height // 2, x + 10, 60 + eye_height // 2), fill=(20, 20, 20, 255))
+        angle = math.radians(60 * i / frame_count - 30)
+        draw.line((118, 80, 118 + 30 * math.cos(angle), 80 - 30 * math.sin(angle)),
+                  fill=(255, 170, 60, 255), width=8)
+        frames.append((frame, 50))
+    return frames
+
+
+def write(frames, path, delta):
+    lottie_writer.create_lottie_animation(frames, str(path), encode=encode, fps=20,
+                                          dedup=AssetDeduplicator(), delta=delta)
+    return path.stat().st_size
+
+
+def test_delta_output_is_never_larger(tmp_path, capsys):
+    frames = mostly_static_clip()
+    full_size = write(frames, tmp_path / "full.json", None)
+    delta = DeltaEncoder()
+    delta_size = write(frames, tmp_path / "delta.json", delta)
+    assert delta.patches
+    assert delta_size <= full_size
+
+
+def test_patch_that_does_not_encode_smaller_becomes_keyframe():
+    frames = [frame for frame, _ in mostly_static_clip(frame_count=3)]
+    delta = DeltaEncoder()
+    same_size = lambda image: "x" * 100
+    assert delta.plan(frames[0], encode=same_size)[0] == 'key'
+    assert delta.plan(frames[1], encode=same_size)[0] == 'key'
+    assert delta.plan(frames[2])[0] == 'patch'
+    assert delta.rejected == 1
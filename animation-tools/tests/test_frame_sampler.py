@@ -0,0 +1,54 @@
+"""
+Tests for frame_sampler.TimestampSampler timing
+Kept frame durations must add up to the source clip's length at any
+target frame rate
+
+Usage:
+    python -m pytest animation-tools/tests
+"""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from frame_sampler import TimestampSampler, sample_store_frames
+
+
+class FakeStore:
+    """Just the parts of frame_store.FrameStore that sample_store_frames reads"""
+
+    def __init__(self, frame_count, source_fps):
+        self.timestamps_ms = [i * 1000 / source_fps for i in range(frame_count)]
+        self.frames = list(range(frame_count))
+        self.end_ms = frame_count * 1000 / source_fps
+
+    def __len__(self):
+        return len(self.frames)
+
+
+def sample(store, target_fps):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return list(sample_store_frames(store, TimestampSampler(target_fps)))
+
+
+@pytest.mark.parametrize("source_fps, target_fps", [(24, 12), (24, 20), (30, 20), (30, 12), (25, 24)])
+def test_durations_add_up_to_clip_length(source_fps, target_fps):
+    frames = sample(FakeStore(source_fps * 8, source_fps), target_fps)
+    assert sum(duration for _, duration in frames) == 8000
+    assert all(duration > 0 for _, duration in frames)
+
+
+def test_frame_starting_at_clip_end_is_dropped():
+    # 24 -> 12 FPS: the last source frame (7958 ms) rounds into the 8000 ms slot
+    frames = sample(FakeStore(192, 24), 12)
+    assert len(frames) == 96
+    assert 191 not in [index for index, _ in frames]
+
+
+def test_single_short_frame_is_kept():
+    frames = sample(FakeStore(1, 30), 12)
+    assert [index for index, _ in frames] == [0]
@@ -0,0 +1,49 @@
+"""
+Tests for lottie_writer.build_timeline
+Frame ranges must stay contiguous and never drop an entry, even when the
+durations drift below the frame grid
+
+Usage:
+    python -m pytest animation-tools/tests
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from lottie_writer import build_timeline
+
+
+def assert_contiguous(ranges):
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+
+
+def test_33ms_frames_at_30fps_keep_every_frame():
+    ranges, total_frames = build_timeline([33] * 120, 30)
+    assert all(end - start >= 1 for start, end in ranges)
+    assert_contiguous(ranges)
+    assert ranges[0][0] == 0
+    assert total_frames == ranges[-1][1] == 120
+
+
+def test_exact_durations_round_to_the_real_length():
+    # Sampler durations at 30 fps alternate 33/34 ms and add up to 4 s
+    durations = [33, 34, 33] * 40
+    ranges, total_frames = build_timeline(durations, 30)
+    assert ranges == [(i, i + 1) for i in range(120)]
+    assert total_frames == 120
+
+
+def test_short_frames_are_absorbed_by_later_entries():
+    ranges, total_frames = build_timeline([10] * 30 + [1000], 30)
+    assert all(end - start >= 1 for start, end in ranges)
+    assert_contiguous(ranges)
+    # 1300 ms at 30 fps: the long last entry gives back the frames the short ones borrowed
+    assert total_frames == 39
+
+
+def test_zero_duration_entries_stay_empty():
+    ranges, total_frames = build_timeline([100, 0, 100], 10)
+    assert ranges == [(0, 1), (1, 1), (1, 2)]
+    assert total_frames == 2
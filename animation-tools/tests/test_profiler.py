@@ -0,0 +1,25 @@
+"""
+Tests for profiler activation around conversions
+A conversion that raises must not leave its profile active for the next one
+
+Usage:
+    python -m pytest animation-tools/tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+import profiler
+from gif_to_lottie import convert_gif_to_lottie
+
+
+def test_failed_conversion_deactivates_profile(tmp_path):
+    output_path = tmp_path / "out.json"
+    with pytest.raises(Exception):
+        convert_gif_to_lottie(str(tmp_path / "missing.gif"), str(output_path), remove_bg=False,
+                              streaming=False, profile=True)
+    assert not profiler.current().enabled
+    assert (tmp_path / "out.json.profile.json").exists()
@@ -0,0 +1,40 @@
+"""
+Tests for converter startup cost
+Importing mp4_to_lottie and checking dependencies must not load the heavy
+modules (rembg, onnxruntime, OpenCV, numpy); they load on first use
+
+Usage:
+    python -m pytest animation-tools/tests
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+HEAVY_MODULES = ('rembg', 'onnxruntime', 'cv2', 'numpy')
+
+# lazy_import leaves a placeholder in sys.modules that turns into a plain
+# module once it runs, so "loaded" means present and no longer lazy
+PROBE = f"""
+import contextlib, io, json, sys, types
+sys.path.insert(0, {str(SCRIPTS_DIR)!r})
+import mp4_to_lottie
+def loaded():
+    return [name for name in {HEAVY_MODULES!r}
+            if type(sys.modules.get(name)) is types.ModuleType]
+after_import = loaded()
+with contextlib.redirect_stdout(io.StringIO()):
+    ok = mp4_to_lottie.check_dependencies()
+print(json.dumps({{'import': after_import, 'check': loaded(), 'ok': ok}}))
+"""
+
+
+def test_import_and_dependency_check_load_no_heavy_modules():
+    output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True,
+                            check=True).stdout
+    result = json.loads(output.splitlines()[-1])
+    assert result['import'] == []
+    assert result['check'] == []
+    assert result['ok']
@@ -6,9 +6,30 @@ Works with any Mangekyo pattern: Itachi, Kakashi, Sasuke, Obito, etc.
 
 import numpy as np
 from PIL import Image, ImageOps, ImageDraw
-import json
 import base64
 import io
+import math
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "animation-tools" / "scripts"))
+from lottie_writer import image_asset, lottie_document, save_lottie, save_dotlottie
+from frame_pipeline import ordered_map
+import bg_kernel
+
+PREVIEW_FRAMES = 90  # one full turn, 3 seconds at 30fps
+PREVIEW_SIZE = 256
+PREVIEW_FPS = 30
+
+# Mean premultiplied difference between the image and its rotation by 360/n
+# degrees, relative to the image's mean: 0.02-0.09 for the Mangekyo patterns'
+# true symmetries, 0.37+ for every other order
+SYMMETRY_TOLERANCE = 0.15
+MAX_SYMMETRY_ORDER = 12
+
+# Palette entry reserved for transparent pixels in the preview GIF
+TRANSPARENT_INDEX = 255
 
 
 def load_and_process_image(image_path):
@@ -28,15 +49,9 @@ def load_and_process_image(image_path):
     data = np.array(img)
     
     # Remove white/light background
-    # Create mask for white-ish pixels
-    r, g, b, a = data[:,:,0], data[:,:,1], data[:,:,2], data[:,:,3]
-    
     # Pixels that are very light (close to white) become transparent
     white_threshold = 200
-    white_mask = (r > white_threshold) & (g > white_threshold) & (b > white_threshold)
-    
-    # Set alpha to 0 for white pixels
-    data[white_mask, 3] = 0
+    bg_kernel.remove_background(data, light_threshold=white_threshold)
     
     # Create clean image
     clean_img = Image.fromarray(data, 'RGBA')
@@ -69,20 +84,29 @@ def load_and_process_image(image_path):
     return clean_img
 
 
-def image_to_base64(img):
-    """Convert PIL Image to base64 string"""
+def image_to_base64(img, format="PNG"):
+    """Convert PIL Image to base64 string (PNG or lossless WEBP)"""
     buffered = io.BytesIO()
-    img.save(buffered, format="PNG")
+    if format == "WEBP":
+        img.save(buffered, format="WEBP", lossless=True, quality=100, method=6)
+    else:
+        img.save(buffered, format="PNG")
     img_str = base64.b64encode(buffered.getvalue()).decode()
     return img_str
 
 
-def create_rotating_lottie_with_image(img, character_name="Sharingan"):
-    """Create Lottie JSON with embedded rotating image"""
+def create_rotating_lottie_with_image(img, character_name="Sharingan", image_format="PNG"):
+    """
+    Create Lottie JSON with embedded rotating image
+    
+    image_format="WEBP" embeds a lossless WebP instead of a PNG; use it for
+    dotLottie output (save_dotlottie), where the image becomes a separate file.
+    """
     print(f"\nCreating Lottie animation with rotating {character_name}...")
     
     # Convert image to base64
-    img_base64 = image_to_base64(img)
+    img_base64 = image_to_base64(img, image_format)
+    mime_type = "image/webp" if image_format == "WEBP" else "image/png"
     
     # Create unique asset ID
     asset_id = f"{character_name.lower()}_sharingan_img"
@@ -91,111 +115,183 @@ def create_rotating_lottie_with_image(img, character_name="Sharingan"):
     frames = 90  # 3 seconds at 30fps
     center = size // 2
     
-    lottie = {
-        "v": "5.9.0",
-        "fr": 30,
-        "ip": 0,
-        "op": frames,
-        "w": size,
-        "h": size,
-        "nm": f"{character_name} Mangekyo Sharingan",
+    rotating_layer = {
         "ddd": 0,
-        "assets": [
-            {
-                "id": asset_id,
-                "w": size,
-                "h": size,
-                "u": "",
-                "p": f"data:image/png;base64,{img_base64}",
-                "e": 0
-            }
-        ],
-        "layers": [
-            {
-                "ddd": 0,
-                "ind": 1,
-                "ty": 2,  # Image layer
-                "nm": f"Rotating {character_name} Sharingan",
-                "refId": asset_id,
-                "sr": 1,
-                "ks": {
-                    "o": {"a": 0, "k": 100},
-                    "r": {
-                        "a": 1,
-                        "k": [
-                            {
-                                "i": {"x": [0.667], "y": [1]},
-                                "o": {"x": [0.333], "y": [0]},
-                                "t": 0,
-                                "s": [0]
-                            },
-                            {
-                                "t": frames,
-                                "s": [360]
-                            }
-                        ]
+        "ind": 1,
+        "ty": 2,  # Image layer
+        "nm": f"Rotating {character_name} Sharingan",
+        "refId": asset_id,
+        "sr": 1,
+        "ks": {
+            "o": {"a": 0, "k": 100},
+            "r": {
+                "a": 1,
+                "k": [
+                    {
+                        "i": {"x": [0.667], "y": [1]},
+                        "o": {"x": [0.333], "y": [0]},
+                        "t": 0,
+                        "s": [0]
                     },
-                    "p": {"a": 0, "k": [center, center, 0]},
-                    "a": {"a": 0, "k": [center, center, 0]},
-                    "s": {"a": 0, "k": [100, 100, 100]}
-                },
-                "ao": 0,
-                "ip": 0,
-                "op": frames,
-                "st": 0,
-                "bm": 0
-            }
-        ],
-        "markers": []
+                    {
+                        "t": frames,
+                        "s": [360]
+                    }
+                ]
+            },
+            "p": {"a": 0, "k": [center, center, 0]},
+            "a": {"a": 0, "k": [center, center, 0]},
+            "s": {"a": 0, "k": [100, 100, 100]}
+        },
+        "ao": 0,
+        "ip": 0,
+        "op": frames,
+        "st": 0,
+        "bm": 0
     }
     
+    lottie = lottie_document(
+        size, size, 30, frames, f"{character_name} Mangekyo Sharingan",
+        assets=[image_asset(asset_id, size, size, f"data:{mime_type};base64,{img_base64}")],
+        layers=[rotating_layer],
+        version="5.9.0"
+    )
+    
     return lottie
 
 
-def create_preview_gif(img, output_path):
-    """Create animated GIF preview"""
-    print("\nCreating preview GIF...")
+def _premultiplied(img):
+    """Float RGB array with colour premultiplied by alpha"""
+    data = np.asarray(img, dtype=np.float32)
+    return data[..., :3] * (data[..., 3:] / 255)
+
+
+def detect_symmetry_order(img, max_order=MAX_SYMMETRY_ORDER, tolerance=SYMMETRY_TOLERANCE):
+    """
+    Rotational symmetry order of a pattern (3 for three tomoe, 1 for none)
     
-    frames = []
-    num_frames = 90
+    Compares a 128px copy with its rotation by 360/n degrees for every n up
+    to max_order and returns the largest n that matches, together with all
+    of its divisors (a 6-fold pattern is also 2- and 3-fold).
+    """
+    small = img.resize((128, 128), Image.LANCZOS)
+    reference = _premultiplied(small)
+    scale = reference.mean()
+    if scale == 0:
+        return 1
     
-    for i in range(num_frames):
-        angle = (i / num_frames) * 360
-        rotated = img.rotate(-angle, resample=Image.BICUBIC, expand=False)
-        
-        # Resize for smaller GIF
-        preview_size = 256
-        small = rotated.resize((preview_size, preview_size), Image.LANCZOS)
-        frames.append(small)
+    matches = {1}
+    for order in range(2, max_order + 1):
+        rotated = _premultiplied(small.rotate(-360 / order, resample=Image.BICUBIC))
+        if np.abs(rotated - reference).mean() / scale <= tolerance:
+            matches.add(order)
+    
+    return max(order for order in matches
+               if all(divisor in matches for divisor in range(1, order) if order % divisor == 0))
+
+
+def build_preview_palette(img, colors=TRANSPARENT_INDEX):
+    """
+    One palette for every preview frame, from the visible pixels of img
     
-    # Save as GIF
+    A rotation only moves pixels around, so the unrotated image has the
+    colours of all frames. Index TRANSPARENT_INDEX is left for transparency.
+    
+    Returns:
+        P-mode image to pass to Image.quantize(palette=...)
+    """
+    data = np.asarray(img)
+    visible = data[data[..., 3] >= 128][:, :3]
+    if len(visible) == 0:
+        visible = np.zeros((1, 3), dtype=np.uint8)
+    sample = Image.fromarray(np.ascontiguousarray(visible[np.newaxis]), 'RGB')
+    palette = sample.quantize(colors=colors, method=Image.Quantize.MEDIANCUT)
+    entries = palette.getpalette()[:colors * 3]
+    entries += [0] * (256 * 3 - len(entries))
+    palette.putpalette(entries)
+    return palette
+
+
+def _render_preview_frame(task):
+    """Rotate one preview frame and map it onto the shared palette"""
+    small, angle, palette = task
+    rotated = small.rotate(-angle, resample=Image.BICUBIC, expand=False)
+    # No dithering: dither patterns would shift from frame to frame and shimmer
+    frame = rotated.convert('RGB').quantize(palette=palette, dither=Image.Dither.NONE)
+    indices = np.array(frame)
+    indices[np.asarray(rotated)[..., 3] < 128] = TRANSPARENT_INDEX
+    frame = Image.fromarray(indices, 'P')
+    frame.putpalette(palette.getpalette())
+    return frame
+
+
+def render_preview_frames(img, num_frames=PREVIEW_FRAMES, preview_size=PREVIEW_SIZE,
+                          order=None, workers=None):
+    """
+    Palettized frames of one turn of img, only as many as its symmetry needs
+    
+    With n-fold symmetry the frame at 360/n degrees looks like the first, so
+    the animation repeats after num_frames / gcd(num_frames, n) frames and a
+    GIF looping just those plays exactly like the full turn. The image is
+    shrunk once and every rotation runs at preview resolution, in parallel.
+    
+    Args:
+        img: Square RGBA image
+        num_frames: Frames per full turn
+        preview_size: Output size in pixels
+        order: Symmetry order (None = detect_symmetry_order)
+        workers: Thread pool size (default: all cores)
+    
+    Returns:
+        (list of P-mode frames, symmetry order)
+    """
+    if order is None:
+        order = detect_symmetry_order(img)
+    unique_frames = num_frames // math.gcd(num_frames, order)
+    
+    small = img.resize((preview_size, preview_size), Image.LANCZOS)
+    palette = build_preview_palette(small)
+    tasks = [(small, i * 360 / num_frames, palette) for i in range(unique_frames)]
+    frames = list(ordered_map(_render_preview_frame, tasks, workers or os.cpu_count() or 1,
+                              kind='thread'))
+    return frames, order
+
+
+def create_preview_gif(img, output_path, workers=None):
+    """Create animated GIF preview (one symmetry period, looped)"""
+    print("\nCreating preview GIF...")
+    
+    frames, order = render_preview_frames(img, workers=workers)
+    if len(frames) < PREVIEW_FRAMES:
+        print(f"Rotational symmetry: {order}-fold, {len(frames)} of {PREVIEW_FRAMES} frames rendered")
+    
+    # Save as GIF: every frame shares the global palette, so no local colour tables
     frames[0].save(
         output_path,
         save_all=True,
         append_images=frames[1:],
-        duration=1000//30,  # 30 FPS
+        duration=1000 // PREVIEW_FPS,
         loop=0,
-        optimize=True,
-        transparency=0
+        transparency=TRANSPARENT_INDEX,
+        disposal=2
     )
     
-    import os
     size_kb = os.path.getsize(output_path) / 1024
     print(f"✓ Preview GIF saved: {output_path} ({size_kb:.2f} KB)")
 
 
 def main():
-    import sys
-    
     print("=" * 70)
     print("🔥 MANGEKYO SHARINGAN ANIMATION - FROM IMAGE 🔥")
     print("=" * 70)
     print()
     
     # Check for command line argument
-    if len(sys.argv) > 1:
-        image_path = sys.argv[1]
-        character_name = sys.argv[2] if len(sys.argv) > 2 else "Custom"
+    args = [arg for arg in sys.argv[1:] if arg != "--dotlottie"]
+    dotlottie = "--dotlottie" in sys.argv
+    if len(args) > 0:
+        image_path = args[0]
+        character_name = args[1] if len(args) > 1 else "Custom"
     else:
         # Default to Kakashi image
         image_path = "Mangekyou_Sharingan_Kakashi.svg.png"
@@ -213,6 +309,8 @@ def main():
     processed_image = f"{char_lower}_processed.png"
     preview_gif = f"{char_lower}_sharingan_preview.gif"
     output_json = f"mangekyo_{char_lower}.json"
+    if dotlottie:
+        output_json = f"mangekyo_{char_lower}.lottie"
     
     # Save processed image for preview
     img.save(processed_image)
@@ -222,15 +320,16 @@ def main():
     create_preview_gif(img, preview_gif)
     
     # Create Lottie JSON
-    lottie_data = create_rotating_lottie_with_image(img, character_name)
-    
-    # Save Lottie JSON
-    with open(output_json, 'w') as f:
-        json.dump(lottie_data, f, separators=(',', ':'))
-    
-    import os
-    size_kb = os.path.getsize(output_json) / 1024
-    print(f"\n✓ Lottie JSON saved: {output_json} ({size_kb:.2f} KB)")
+    if dotlottie:
+        lottie_data = create_rotating_lottie_with_image(img, character_name, image_format="WEBP")
+        size_kb = save_dotlottie(lottie_data, output_json) / 1024
+        print(f"\n✓ dotLottie saved: {output_json} ({size_kb:.2f} KB)")
+    else:
+        lottie_data = create_rotating_lottie_with_image(img, character_name)
+        
+        # Save Lottie JSON
+        size_kb = save_lottie(lottie_data, output_json) / 1024
+        print(f"\n✓ Lottie JSON saved: {output_json} ({size_kb:.2f} KB)")
     
     print("\n" + "=" * 70)
     print(f"✅ {character_name.upper()} MANGEKYO COMPLETE!")
@@ -251,8 +350,11 @@ def main():
     print(f"  # Use custom image")
     print(f"  python create_sharingan_from_image.py <image_path> <character_name>")
     print()
+    print(f"  # dotLottie archive (.lottie) with the image as a separate WebP file")
+    print(f"  python create_sharingan_from_image.py <image_path> <character_name> --dotlottie")
+    print()
     print("Next steps:")
-    print(f"  Copy-Item {output_json} app/src/main/assets/animations/mangekyo_itachi.json -Force")
+    print(f"  Copy-Item {output_json} app/src/main/assets/animations/mangekyo_itachi{Path(output_json).suffix} -Force")
     print("  .\\gradlew.bat installPlaystoreDebug")
     print()
 